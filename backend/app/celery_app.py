@@ -1,13 +1,27 @@
+import os
 from celery import Celery
 from celery.schedules import crontab
-from app.config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from celery.signals import task_prerun, task_postrun, worker_init, worker_process_shutdown
+from kombu import Queue
+from app.config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    LIVE_POLL_INTERVAL,
+    CELERY_METRICS_PORT,
+    LIVE_TASK_TIME_LIMIT,
+    BATCH_FETCH_TIME_LIMIT,
+    BATCH_STATS_TIME_LIMIT,
+    BACKFILL_CHUNK_TIMEOUT,
+    CELERY_RESULT_EXPIRES,
+)
+from app.services.metrics import task_started, task_finished, start_exporter, mark_process_dead
 
 # Initialize Celery app
 celery_app = Celery(
     "packers_hub",
     broker=CELERY_BROKER_URL,
     backend=CELERY_RESULT_BACKEND,
-    include=["app.tasks.periodic_tasks", "app.tasks.realtime_tasks"]
+    include=["app.tasks.periodic_tasks", "app.tasks.realtime_tasks", "app.tasks.backfill_tasks"]
 )
 
 # Celery Configuration
@@ -18,24 +32,93 @@ celery_app.conf.update(
     timezone="America/Chicago",  # Green Bay timezone
     enable_utc=True,
     broker_connection_retry_on_startup=True,
+    task_track_started=True,  # STARTED state lets trigger dedup tell queued from running
+    result_expires=CELERY_RESULT_EXPIRES,  # results are compact, but don't keep them forever
+    # Each worker reserves one task per process, so a long stats refresh never
+    # holds queued work hostage (see the worker profiles in the README)
+    worker_prefetch_multiplier=1,
+)
+
+# Queues: "live" for realtime polling, "batch" for roster/games/stats refreshes and
+# backfills. Separate workers consume each, so batch work can't delay a live poll.
+celery_app.conf.task_queues = (
+    Queue("live", routing_key="live"),
+    Queue("batch", routing_key="batch"),
 )
+celery_app.conf.task_default_queue = "batch"
+celery_app.conf.task_routes = {
+    "app.tasks.realtime_tasks.*": {"queue": "live"},
+    "app.tasks.periodic_tasks.*": {"queue": "batch"},
+    "app.tasks.backfill_tasks.*": {"queue": "batch"},
+}
+
+def _limits(hard: int) -> dict:
+    # Soft limit raises SoftTimeLimitExceeded inside the task so it can return an error; hard kills it
+    return {"soft_time_limit": max(1, int(hard * 0.8)), "time_limit": hard}
+
+celery_app.conf.task_annotations = {
+    "app.tasks.realtime_tasks.coordinate_live_games": _limits(LIVE_TASK_TIME_LIMIT),
+    "app.tasks.realtime_tasks.poll_live_game": _limits(LIVE_TASK_TIME_LIMIT),
+    "app.tasks.realtime_tasks.update_packers_live_stats": _limits(LIVE_TASK_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_team_roster": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_packers_roster": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_team_games": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_packers_games": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.periodic_tasks.refresh_league": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_team_stats": _limits(BATCH_STATS_TIME_LIMIT),
+    "app.tasks.periodic_tasks.update_packers_stats_postgame": _limits(BATCH_STATS_TIME_LIMIT),
+    "app.tasks.periodic_tasks.rebuild_leaderboards": _limits(BATCH_STATS_TIME_LIMIT),
+    "app.tasks.periodic_tasks.build_snapshots": _limits(BATCH_FETCH_TIME_LIMIT),
+    "app.tasks.backfill_tasks.run_backfill_chunk": _limits(BACKFILL_CHUNK_TIMEOUT),
+}
 
 # Celery Beat Schedule for Periodic Tasks
 celery_app.conf.beat_schedule = {
-    "update-packers-roster-weekly": {
-        "task": "app.tasks.periodic_tasks.update_packers_roster",
+    "refresh-league-weekly": {
+        # Rosters, schedules and season stats for all 32 teams (includes the Packers)
+        "task": "app.tasks.periodic_tasks.refresh_league",
         "schedule": crontab(day_of_week=1, hour=2, minute=0),  # Every Monday at 2 AM
+        "options": {"expires": 6 * 3600},
     },
     "update-packers-stats-postgame": {
         "task": "app.tasks.periodic_tasks.update_packers_stats_postgame",
         # Run frequently through typical game end windows (Sunday/Monday early hours)
         "schedule": crontab(day_of_week="0,1", hour="0-6,20-23", minute="*/15"),
+        "options": {"expires": 15 * 60},  # the next run supersedes a backed-up one
+    },
+    "coordinate-live-games": {
+        # Starts one self-rescheduling poller per live game (all teams)
+        "task": "app.tasks.realtime_tasks.coordinate_live_games",
+        "schedule": float(LIVE_POLL_INTERVAL),  # Check every 30 seconds for live games
+        "options": {"expires": LIVE_POLL_INTERVAL},  # drop stale checks instead of running them late
     },
-    "update-packers-live-stats": {
-        "task": "app.tasks.realtime_tasks.update_packers_live_stats",
-        "schedule": 30.0,  # Check every 30 seconds for live games
+    "resume-stalled-backfills": {
+        # Re-dispatch running backfill jobs so chunks lost with a worker are picked up again
+        "task": "app.tasks.backfill_tasks.resume_stalled_backfills",
+        "schedule": crontab(minute="*/10"),
+        "options": {"expires": 10 * 60},
     },
 }
 
+# Prometheus: task duration/outcome for every task, exported by each worker
+@task_prerun.connect
+def _record_task_start(task_id=None, **kwargs):
+    task_started(task_id)
+
+@task_postrun.connect
+def _record_task_end(task_id=None, task=None, retval=None, state=None, **kwargs):
+    task_finished(task_id, task.name if task else "unknown", state, retval)
+
+# worker_init runs in the main process; tasks run in the pool children, which share
+# their samples through PROMETHEUS_MULTIPROC_DIR (see app.services.metrics)
+@worker_init.connect
+def _start_metrics_exporter(**kwargs):
+    if CELERY_METRICS_PORT:
+        start_exporter(CELERY_METRICS_PORT)
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
 if __name__ == "__main__":
     celery_app.start()
@@ -4,12 +4,18 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# API Sports team ID of the Green Bay Packers (default team for every route and task)
+PACKERS_TEAM_ID = 15
+PACKERS_TEAM_NAME = "Green Bay Packers"
+
 # MongoDB Configuration
 MONGO_URL = os.getenv("MONGO_URL")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 
 # API Sports Configuration
 API_SPORTS_KEY = os.getenv("API_KEY")
+# Override to point the services at a local stand-in (see bench/fake_api_sports.py)
+API_SPORTS_BASE_URL = os.getenv("API_SPORTS_BASE_URL", "https://v1.american-football.api-sports.io")
 
 # Redis Configuration
 REDIS_URL = os.getenv("REDIS_URL")
@@ -17,3 +23,91 @@ REDIS_URL = os.getenv("REDIS_URL")
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+
+# API Sports HTTP client settings
+API_HTTP_TIMEOUT = float(os.getenv("API_HTTP_TIMEOUT", "10"))
+API_HTTP_CONNECT_TIMEOUT = float(os.getenv("API_HTTP_CONNECT_TIMEOUT", "3"))
+API_HTTP_MAX_CONNECTIONS = int(os.getenv("API_HTTP_MAX_CONNECTIONS", "20"))
+
+# API response cache (Redis). Set API_CACHE_ENABLED=false to always hit upstream.
+API_CACHE_ENABLED = os.getenv("API_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# API Sports quota governor. Per-minute limit is recalibrated from response headers;
+# these are the starting values until the first response arrives.
+API_RATE_LIMIT_PER_MINUTE = int(os.getenv("API_RATE_LIMIT_PER_MINUTE", "300"))
+API_DAILY_RESERVE = int(os.getenv("API_DAILY_RESERVE", "100"))
+
+# Compressed archive of raw API Sports responses (raw_payloads collection);
+# RAW_PAYLOAD_TTL_DAYS=0 keeps them forever
+RAW_PAYLOADS_ENABLED = os.getenv("RAW_PAYLOADS_ENABLED", "true").lower() not in ("0", "false", "no")
+RAW_PAYLOAD_TTL_DAYS = int(os.getenv("RAW_PAYLOAD_TTL_DAYS", "0"))
+
+# Content-hashed season/week bundles (app.services.snapshots). SNAPSHOT_DIR also writes the
+# files to disk for a static host; older versions are kept so cached URLs stay loadable.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SNAPSHOT_KEEP_VERSIONS = int(os.getenv("SNAPSHOT_KEEP_VERSIONS", "3"))
+SNAPSHOT_CACHE_ENTRIES = int(os.getenv("SNAPSHOT_CACHE_ENTRIES", "64"))
+SNAPSHOT_DEBOUNCE_SECONDS = int(os.getenv("SNAPSHOT_DEBOUNCE_SECONDS", "60"))
+
+# /packers responses: gzip/brotli (per Accept-Encoding) only from this size up; dynamic
+# bodies use fast levels, unlike the snapshot bundles which are compressed once
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+# Derived metrics tables cached per team/season in each API worker; rebuilt when a stats
+# write bumps the Redis version, or (without Redis) after DERIVED_CACHE_MAX_AGE seconds
+DERIVED_CACHE_MAX_AGE = int(os.getenv("DERIVED_CACHE_MAX_AGE", "600"))
+DERIVED_CACHE_ENTRIES = int(os.getenv("DERIVED_CACHE_ENTRIES", "64"))
+
+# Per-endpoint circuit breaker for API Sports
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_OPEN_SECONDS = int(os.getenv("CIRCUIT_OPEN_SECONDS", "60"))
+
+# League-wide refresh fan-out
+LEAGUE_STATS_SHARDS = int(os.getenv("LEAGUE_STATS_SHARDS", "2"))
+LEAGUE_REFRESH_TIMEOUT = int(os.getenv("LEAGUE_REFRESH_TIMEOUT", "1800"))
+
+# Live game polling cadence (seconds), per game
+LIVE_POLL_INTERVAL = int(os.getenv("LIVE_POLL_INTERVAL", "30"))
+
+# In-memory live stats read model in each API worker, kept current over Redis pub/sub
+LIVE_STATE_CHANNEL = os.getenv("LIVE_STATE_CHANNEL", "live:stats")
+LIVE_STATE_SEASONS = {int(s) for s in os.getenv("LIVE_STATE_SEASONS", "2025").split(",") if s.strip()}
+
+# Prometheus exporter port for Celery workers (0 disables it); FastAPI serves GET /metrics
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "9808"))
+
+# FastAPI requests slower than this are logged with their Mongo filters and an explain summary
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Celery task time limits (seconds). Live tasks must finish well inside one poll interval;
+# batch limits cover one team's roster/games fetch and one team's (or shard's) stats refresh.
+LIVE_TASK_TIME_LIMIT = int(os.getenv("LIVE_TASK_TIME_LIMIT", str(LIVE_POLL_INTERVAL)))
+BATCH_FETCH_TIME_LIMIT = int(os.getenv("BATCH_FETCH_TIME_LIMIT", "300"))
+BATCH_STATS_TIME_LIMIT = int(os.getenv("BATCH_STATS_TIME_LIMIT", "1800"))
+
+# How long Celery task results are kept in Redis (seconds)
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", str(24 * 3600)))
+
+# Manual trigger dedup: how long a trigger lock may point at a queued/running task, and an
+# optional cooldown after it finishes before the same refresh can be triggered again (0 = off)
+TRIGGER_LOCK_TTL = int(os.getenv("TRIGGER_LOCK_TTL", "3600"))
+TRIGGER_COOLDOWN_SECONDS = int(os.getenv("TRIGGER_COOLDOWN_SECONDS", "0"))
+# A triggered task that is PENDING but no longer in the broker queue this long after it
+# was queued is treated as lost (Celery reports unknown/expired task IDs as PENDING too)
+TRIGGER_PENDING_GRACE_SECONDS = int(os.getenv("TRIGGER_PENDING_GRACE_SECONDS", "60"))
+
+# Per-stage task timings (capped task_runs collection) and the opt-in sampling profiler
+TASK_RUNS_CAPPED_BYTES = int(os.getenv("TASK_RUNS_CAPPED_BYTES", str(8 * 1024 * 1024)))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+TASK_PROFILE_TASKS = {name.strip() for name in os.getenv("TASK_PROFILE_TASKS", "").split(",") if name.strip()}
+
+# Historical backfill (checkpointed in Mongo, runs in the lowest-priority quota lane)
+BACKFILL_PARALLELISM = int(os.getenv("BACKFILL_PARALLELISM", "4"))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "3"))
+BACKFILL_CHUNK_TIMEOUT = int(os.getenv("BACKFILL_CHUNK_TIMEOUT", "900"))
+# A claimed chunk whose task hasn't started after this long is handed out again
+BACKFILL_CLAIM_TIMEOUT = int(os.getenv("BACKFILL_CLAIM_TIMEOUT", "3600"))
+BACKFILL_STATS_CHUNK_SIZE = int(os.getenv("BACKFILL_STATS_CHUNK_SIZE", "25"))
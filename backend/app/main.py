@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+import sys
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.packers import router as packers_router
-from app.services.db_service import *
+from app.services.db_service import connect_db, close_db
+from app.services.redis_client import close_async_redis
+from app.services.metrics import HTTP_LATENCY, render_metrics
+from app.services.request_timing import start_request_timing, log_if_slow
+from app.services.live_state import start_live_state, stop_live_state
 
 app = FastAPI(title="PackersHub Backend")
 
@@ -12,8 +18,46 @@ app.add_middleware(
   allow_credentials=True,
   allow_methods=["*"],
   allow_headers=["*"],
+  expose_headers=["Server-Timing"],
 )
 
+def _route_template(request: Request) -> str:
+  """Full path with path params put back as {name}, e.g. /packers/player/{player_id}/stats."""
+  if request.scope.get("route") is None:
+    return "unmatched"
+  segments = request.url.path.split("/")
+  for name, value in request.path_params.items():
+    value = str(value)
+    if value in segments:
+      segments[segments.index(value)] = "{" + name + "}"
+  return "/".join(segments)
+
+# Request latency per route template (not raw path, so /player/{player_id}/stats is one series)
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+  started = time.perf_counter()
+  status = 500
+  try:
+    response = await call_next(request)
+    status = response.status_code
+    return response
+  finally:
+    HTTP_LATENCY.labels(
+      method=request.method,
+      route=_route_template(request),
+      status=str(status),
+    ).observe(time.perf_counter() - started)
+
+# Server-Timing breakdown (mongo/handler/serialize/total) and the slow request log
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+  timing = start_request_timing()
+  response = await call_next(request)
+  total_ms = timing.total_ms()
+  response.headers["Server-Timing"] = timing.server_timing(total_ms)
+  log_if_slow(request.method, _route_template(request), timing, total_ms)
+  return response
+
 # Database lifecycle
 @app.on_event("startup")
 async def startup_db():
@@ -23,9 +67,33 @@ async def startup_db():
 async def shutdown_db():
   await close_db()
 
+# Live stats read model (loads from MongoDB, then follows live ingestion over Redis pub/sub)
+@app.on_event("startup")
+async def startup_live_state():
+  start_live_state()
+
+@app.on_event("shutdown")
+async def shutdown_live_state():
+  await stop_live_state()
+
+# API Sports client (fallback_api search only): imported and connected on first use,
+# so a new API process doesn't load aiohttp/requests before it can serve
+@app.on_event("shutdown")
+async def shutdown_api_client():
+  nfl_service = sys.modules.get("app.services.NFL_service")
+  if nfl_service is not None:
+    await nfl_service.close_session()
+  await close_async_redis()
+
 # Routes
 app.include_router(packers_router, prefix="/packers", tags=["Packers"])
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+  body, content_type = render_metrics()
+  return Response(content=body, media_type=content_type)
+
 @app.get("/")
 def root():
   return {"status": "Backend running"}
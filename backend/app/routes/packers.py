@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 from app.services.db_service import (
   get_roster_from_db,
@@ -6,40 +8,152 @@ from app.services.db_service import (
   get_player_stats_from_db,
   get_games_from_db,
   get_live_stats_from_db,
+  get_box_score_from_db,
+  get_teams_from_db,
+  get_task_runs_from_db,
+  get_season_stats_for_players,
+  get_current_live_stats_for_players,
 )
-from app.services.NFL_service import get_player_info  # optional fallback, not used by default
-from app.tasks.periodic_tasks import (
-  update_packers_roster,
-  update_packers_stats_postgame,
-  update_packers_games,
-)
+from app.services.cache_service import get_cache_stats
+from app.services.quota_governor import get_quota_state
+from app.services.circuit_breaker import is_open, get_circuit_states
+from app.services.tracing import summarize_runs, arm_profile
+from app.services.trigger_lock import trigger_once
+from app.services.backfill_store import create_backfill_job, get_backfill_progress
+from app.services.live_state import live_state
+from app.services.leaderboards import get_leaders_from_db
+from app.services.current_game import get_current_game_from_db
+from app.services.raw_payloads import get_raw_payload
+from app.services.snapshots import get_snapshot_manifest, get_snapshot_variants, parse_snapshot_file
+from app.services.response_encoding import NegotiatedRoute, NegotiatedResponse, choose_encoding
+from app.services import task_client
+from app.tasks.task_results import PROGRESS, describe_progress
+from app.config import PACKERS_TEAM_ID, PACKERS_TEAM_NAME
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
 
 # Request model for live stats
 class LiveStatsRequest(BaseModel):
   player_ids: list[int]
   season: int = 2025
 
+async def _freshness(endpoint: str, docs: list) -> dict:
+  """Staleness info for DB-served data.
+  stale is True while the upstream endpoint feeding this data is circuit-broken, so the
+  stored copy can't currently be refreshed; age_seconds is the age of the newest doc.
+  """
+  timestamps = [d["last_updated"] for d in docs if isinstance(d, dict) and isinstance(d.get("last_updated"), datetime)]
+  age = (datetime.utcnow() - max(timestamps)).total_seconds() if timestamps else None
+  return {
+    "stale": await is_open(endpoint),
+    "age_seconds": round(age, 1) if age is not None else None,
+  }
+
+def _trigger_response(what: str, task: dict) -> dict:
+  """Common body for the refresh triggers; deduplicated triggers point at the existing task."""
+  if task.get("retry_after") is not None:
+    return {
+      "message": f"{what} finished recently; try again later",
+      "task_id": task["task_id"],
+      "deduplicated": True,
+      "retry_after": task["retry_after"],
+      "status": "Cooling down",
+    }
+  if task.get("deduplicated"):
+    return {
+      "message": f"{what} already in progress",
+      "task_id": task["task_id"],
+      "deduplicated": True,
+      "status": f"Existing task {task.get('state', 'PENDING').lower()}",
+    }
+  return {
+    "message": f"{what} task triggered",
+    "task_id": task["task_id"],
+    "deduplicated": False,
+    "status": "Task queued for processing",
+  }
+
+SEARCH_INCLUDES = ("season_stats", "live_stats")
+
+def _hit_id(player: dict):
+  return player.get("id") or (player.get("player") or {}).get("id")
+
+async def _live_stats_for(player_ids: list, season: int):
+  """Newest live stats per player, from the in-memory live state when it serves the season."""
+  if live_state.serves(season):
+    return [
+      {"player_id": d["player_id"], "game_id": d["game_id"], "season": d["season"], "groups": d.get("groups", []), "last_updated": d.get("last_updated")}
+      for d in live_state.get(player_ids, season)
+    ]
+  return await get_current_live_stats_for_players(player_ids, season)
+
+async def _join_player_stats(players: list, include: set):
+  """Attach season_stats / live_stats to each search hit: one batched query per kind, run concurrently."""
+  ids = sorted({pid for pid in map(_hit_id, players) if pid})
+  seasons = sorted({p["season"] for p in players if p.get("season") is not None})
+  lookups = {}
+  if "season_stats" in include:
+    lookups["season_stats"] = get_season_stats_for_players(ids, seasons)
+  if "live_stats" in include:
+    for s in seasons:
+      lookups[("live_stats", s)] = _live_stats_for(ids, s)
+  results = dict(zip(lookups, await asyncio.gather(*lookups.values())))
+  for result in results.values():
+    if isinstance(result, dict) and result.get("error"):
+      return result
+
+  season_stats = {}
+  for doc in results.get("season_stats", []):
+    # Sorted newest first, so the first document per team wins
+    season_stats.setdefault((doc["player_id"], doc["season"]), {}).setdefault(doc.get("team_id"), doc)
+  live_stats = {
+    (doc["player_id"], key[1]): doc
+    for key, docs in results.items() if isinstance(key, tuple)
+    for doc in docs
+  }
+  for p in players:
+    key = (_hit_id(p), p.get("season"))
+    if "season_stats" in include:
+      by_team = season_stats.get(key, {})
+      # The hit's own team; a traded player's hit on another team gets the latest team's
+      p["season_stats"] = by_team.get(p.get("team_id")) or next(iter(by_team.values()), None)
+    if "live_stats" in include:
+      p["live_stats"] = live_stats.get(key)
+  return None
+
 # GET /packers/player/{player_name}
 @router.get("/player/{player_name}")
-async def player_info(player_name: str, season: int | None = None, fallback_api: bool = False):
-  """Search for a player in our database. Optionally filter by season.
+async def player_info(player_name: str, season: int | None = None, team_id: int | None = None, fallback_api: bool = False, include: str | None = None):
+  """Search for a player in our database. Optionally filter by season and team.
+  include=season_stats,live_stats attaches each hit's season stats and newest live stats
+  (batched lookups), so a results page needs no per-player requests.
   Set fallback_api=true to query API Sports if not found (disabled by default).
   """
-  players = await search_players_by_name(player_name, season=season)
+  includes = {i.strip() for i in (include or "").split(",") if i.strip()}
+  unknown = includes - set(SEARCH_INCLUDES)
+  if unknown:
+    return {"error": f"Unknown include '{', '.join(sorted(unknown))}'", "includes": list(SEARCH_INCLUDES)}
+
+  players = await search_players_by_name(player_name, season=season, team_id=team_id)
   if isinstance(players, dict) and players.get("error"):
     return players
 
   if players:
+    if includes:
+      error = await _join_player_stats(players, includes)
+      if error:
+        return error
     return {
       "source": "database",
       "query": player_name,
       "count": len(players),
       "players": players,
+      **await _freshness("/players", players),
     }
 
   if fallback_api:
+    # Optional fallback, not used by default; the API Sports client loads on first use
+    from app.services.NFL_service import get_player_info
     api_result = await get_player_info(player_name, season=season or 2025)
     return {
       "source": "api",
@@ -58,101 +172,375 @@ async def player_info(player_name: str, season: int | None = None, fallback_api:
 
 # GET /packers/player/{player_id}/stats
 @router.get("/player/{player_id}/stats")
-async def player_stats(player_id: int, season: int | None = None):
-  """Return stored stats for a player from our DB."""
-  stats = await get_player_stats_from_db(player_id, season=season)
+async def player_stats(player_id: int, season: int | None = None, team_id: int | None = None, derived: bool = False):
+  """Return stored stats for a player from our DB.
+  derived=true adds rate stats, per-game averages and percentile ranks within the roster.
+  """
+  stats = await get_player_stats_from_db(player_id, season=season, team_id=team_id)
   if not stats:
     return {"message": "No stats found", "player_id": player_id, "season": season}
   if isinstance(stats, dict) and stats.get("error"):
     return stats
-  return stats
+  if derived:
+    # Imported here so the API process only loads NumPy once derived metrics are asked for
+    from app.services.derived_metrics import get_derived_table
+    # Docs from before stats were keyed by team have no team_id (they were all Packers stats)
+    table = await get_derived_table(season=stats.get("season", season), team_id=stats.get("team_id", team_id or PACKERS_TEAM_ID))
+    if isinstance(table, dict) and table.get("error"):
+      return table
+    row = table.row(player_id) or {}
+    stats = {**stats, "games_played": row.get("games_played"), "derived": row.get("derived"), "percentiles": row.get("percentiles")}
+  return {**stats, **await _freshness("/players/statistics", [stats])}
 
 # POST /packers/live-stats - Get live stats for specific player IDs
 @router.post("/live-stats")
 async def get_live_stats(request: LiveStatsRequest):
-  """Get live stats for multiple players by their IDs."""
-  stats = await get_live_stats_from_db(request.player_ids, season=request.season)
+  """Get live stats for multiple players by their IDs.
+  Served from this worker's in-memory live state while it is synced; MongoDB otherwise.
+  """
+  if live_state.serves(request.season):
+    stats, source = live_state.get(request.player_ids, request.season), "memory"
+  else:
+    stats, source = await get_live_stats_from_db(request.player_ids, season=request.season), "database"
   if isinstance(stats, dict) and stats.get("error"):
     return stats
   return {
+    "source": source,
     "player_count": len(stats),
     "stats": stats,
-    "season": request.season
+    "season": request.season,
+    **await _freshness("/games/statistics/players", stats),
+  }
+
+# GET /packers/leaders - Team stat leaders from the materialized leaderboards
+@router.get("/leaders")
+async def get_leaders(category: str, season: int = 2025, team_id: int = PACKERS_TEAM_ID, limit: int = 10):
+  """Top `limit` players of a team in one stat category (e.g. rushing_yards, sacks)."""
+  board = await get_leaders_from_db(category, season=season, team_id=team_id, limit=min(max(limit, 1), 100))
+  if isinstance(board, dict) and board.get("error"):
+    return board
+  if not board:
+    return {"message": "No leaderboard found", "category": category, "team_id": team_id, "season": season, "leaders": []}
+  return {
+    "category": category,
+    "team_id": team_id,
+    "season": season,
+    **board,
+    **await _freshness("/players/statistics", [board]),
+  }
+
+# POST /packers/leaders/rebuild - Recompute leaderboards from player_stats
+@router.post("/leaders/rebuild")
+async def trigger_leaders_rebuild(season: int = 2025, team_id: int | None = None):
+  """Rebuild the season's leaderboards (one team, or all teams when team_id is omitted)."""
+  task = await trigger_once(task_client.REBUILD_LEADERBOARDS, (team_id or "all", season), season=season, team_id=team_id)
+  return {
+    **_trigger_response("Leaderboard rebuild", task),
+    "team_id": team_id,
+    "season": season,
+  }
+
+# GET /packers/roster/compare - Derived metrics for the whole roster, ranked
+@router.get("/roster/compare")
+async def compare_roster(sort: str = "passer_rating", position: str | None = None, limit: int = 25, season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Players with a value for the `sort` metric, best first, each with every derived metric and percentile."""
+  from app.services.derived_metrics import get_derived_table, METRICS
+  if sort not in METRICS:
+    return {"error": f"Unknown metric '{sort}'", "metrics": list(METRICS)}
+  table = await get_derived_table(season=season, team_id=team_id)
+  if isinstance(table, dict):
+    return table
+  players = table.compare(sort, position=position, limit=limit)
+  return {
+    "team_id": team_id,
+    "season": season,
+    "sort": sort,
+    "games_played": table.games_played,
+    "roster_size": len(table),
+    "player_count": len(players),
+    "players": players,
   }
 
 # GET /packers/roster - Get current roster from database
 @router.get("/roster")
-async def get_roster(season: int = 2025):
-  """Retrieve the current Packers roster from the database."""
-  roster = await get_roster_from_db(season=season)
+async def get_roster(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Retrieve a team's current roster (Packers by default) from the database."""
+  roster = await get_roster_from_db(season=season, team_id=team_id)
+  if isinstance(roster, dict) and roster.get("error"):
+    return roster
   return {
-    "team": "Green Bay Packers",
+    "team": roster[0].get("team") if roster else None,
+    "team_id": team_id,
     "season": season,
     "player_count": len(roster),
-    "players": roster
+    "players": roster,
+    **await _freshness("/players", roster),
   }
 
 # POST /packers/roster/update - Manually trigger roster update
 @router.post("/roster/update")
-async def trigger_roster_update(season: int = 2025):
-  """Manually trigger a roster update task."""
-  task = update_packers_roster.delay(season=season)
+async def trigger_roster_update(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Manually trigger a roster update task (returns the in-flight task if one is already queued)."""
+  task = await trigger_once(task_client.UPDATE_TEAM_ROSTER, (team_id, season), team_id=team_id, season=season)
   return {
-    "message": "Roster update task triggered",
-    "task_id": task.id,
+    **_trigger_response("Roster update", task),
+    "team_id": team_id,
     "season": season,
-    "status": "Task queued for processing"
   }
 
 # POST /packers/stats/update - Trigger a full stats refresh for players in DB
 @router.post("/stats/update")
-async def trigger_stats_update(season: int = 2025):
-  """Trigger a postgame stats refresh for all Packers players in the DB."""
-  task = update_packers_stats_postgame.delay(season=season, force=True)
+async def trigger_stats_update(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Trigger a postgame stats refresh for all of a team's players in the DB."""
+  task = await trigger_once(task_client.UPDATE_TEAM_STATS, (team_id, season), team_id=team_id, season=season, force=True)
   return {
-    "message": "Stats update task triggered",
-    "task_id": task.id,
+    **_trigger_response("Stats update", task),
+    "team_id": team_id,
     "season": season,
-    "status": "Task queued for processing"
   }
 
 # GET /packers/games - Get games from database
 @router.get("/games")
-async def get_games(season: int = 2025):
-  """Retrieve Packers games from the database."""
-  games = await get_games_from_db(season=season, team_id=15)
+async def get_games(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Retrieve a team's games (Packers by default) from the database."""
+  games = await get_games_from_db(season=season, team_id=team_id)
   if isinstance(games, dict) and games.get("error"):
     return games
   return {
-    "team": "Green Bay Packers",
-    "team_id": 15,
+    "team": _team_name(team_id, games),
+    "team_id": team_id,
     "season": season,
     "game_count": len(games),
-    "games": games
+    "games": games,
+    **await _freshness("/games", games),
+  }
+
+def _team_name(team_id: int, games: list):
+  """The team's name as it appears in its own schedule."""
+  for game in games:
+    for side in ((game.get("teams") or {}).get("home") or {}, (game.get("teams") or {}).get("away") or {}):
+      if side.get("id") == team_id and side.get("name"):
+        return side["name"]
+  return PACKERS_TEAM_NAME if team_id == PACKERS_TEAM_ID else None
+
+# GET /packers/games/next - The team's current game (live, or the next one to be played)
+@router.get("/games/next")
+async def get_next_game(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """The first game of the schedule that isn't over, from the precomputed current_games record."""
+  record = await get_current_game_from_db(season=season, team_id=team_id)
+  if isinstance(record, dict) and record.get("error"):
+    return record
+  if not record or not record.get("next_game"):
+    return {"message": "No upcoming game", "team_id": team_id, "season": season, "game": None}
+  return {"team_id": team_id, "season": season, "game": record["next_game"], "last_updated": record.get("last_updated")}
+
+# GET /packers/games/live - The team's game in progress, if any
+@router.get("/games/live")
+async def get_live_game(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Status and score of the team's live game (game is null when none is in progress)."""
+  record = await get_current_game_from_db(season=season, team_id=team_id)
+  if isinstance(record, dict) and record.get("error"):
+    return record
+  game = (record or {}).get("live_game")
+  return {"team_id": team_id, "season": season, "live": game is not None, "game": game, "last_updated": (record or {}).get("last_updated")}
+
+# GET /packers/games/{game_id}/boxscore - Team totals for one game
+@router.get("/games/{game_id}/boxscore")
+async def get_box_score(game_id: int):
+  """Team box score (stat group totals per team), rebuilt on every live ingest of the game."""
+  box_score, source = live_state.box_score(game_id), "memory"
+  if box_score is None:
+    box_score, source = await get_box_score_from_db(game_id), "database"
+  if isinstance(box_score, dict) and box_score.get("error"):
+    return box_score
+  if not box_score:
+    return {"message": "No box score found", "game_id": game_id}
+  return {
+    "source": source,
+    **box_score,
+    **await _freshness("/games/statistics/players", [box_score]),
   }
 
 # POST /packers/games/update - Trigger games fetch and store
 @router.post("/games/update")
-async def trigger_games_update(season: int = 2025):
-  """Manually trigger a games update task to fetch and store Packers schedule."""
-  task = update_packers_games.delay(season=season)
+async def trigger_games_update(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Manually trigger a games update task to fetch and store a team's schedule."""
+  task = await trigger_once(task_client.UPDATE_TEAM_GAMES, (team_id, season), team_id=team_id, season=season)
   return {
-    "message": "Games update task triggered",
-    "task_id": task.id,
+    **_trigger_response("Games update", task),
+    "team_id": team_id,
     "season": season,
+  }
+
+# GET /packers/teams - League teams stored by the league refresh
+@router.get("/teams")
+async def get_teams(season: int = 2025):
+  """List every team stored for the season (use the IDs as team_id on the other routes)."""
+  teams = await get_teams_from_db(season=season)
+  if isinstance(teams, dict) and teams.get("error"):
+    return teams
+  return {"season": season, "team_count": len(teams), "teams": teams}
+
+# POST /packers/league/update - Refresh every team in parallel
+@router.post("/league/update")
+async def trigger_league_update(season: int = 2025, include_stats: bool = True):
+  """Fan out roster, schedule and (optionally) stats refreshes for all teams."""
+  task = await trigger_once(task_client.REFRESH_LEAGUE, (season,), season=season, include_stats=include_stats)
+  return {
+    **_trigger_response("League refresh", task),
+    "season": season,
+  }
+
+# POST /packers/backfill - Start a checkpointed multi-season backfill
+@router.post("/backfill")
+async def trigger_backfill(start_season: int, end_season: int = 2025, team_id: int = PACKERS_TEAM_ID, all_teams: bool = False, include_stats: bool = True, force: bool = False):
+  """Backfill rosters, games and (optionally) player stats for start_season..end_season.
+  Progress is checkpointed in Mongo; poll GET /packers/backfill/{job_id}.
+  """
+  if start_season > end_season:
+    return {"error": "start_season must not be after end_season"}
+  seasons = list(range(start_season, end_season + 1))
+  job = await create_backfill_job(seasons, team_ids=None if all_teams else [team_id], include_stats=include_stats, force=force)
+  if job.get("error"):
+    return job
+  task = task_client.send_task(task_client.PLAN_BACKFILL, {"job_id": job["job_id"]})
+  return {
+    "message": "Backfill job created",
+    "job_id": job["job_id"],
+    "task_id": task.id,
+    "seasons": seasons,
+    "status": "Task queued for processing"
+  }
+
+# GET /packers/backfill/{job_id} - Backfill progress and ETA
+@router.get("/backfill/{job_id}")
+async def backfill_progress(job_id: str):
+  """Chunk counts by kind and status, percent complete and an ETA."""
+  return await get_backfill_progress(job_id)
+
+# POST /packers/backfill/{job_id}/resume - Continue a stopped job from its checkpoints
+@router.post("/backfill/{job_id}/resume")
+async def trigger_backfill_resume(job_id: str, retry_failed: bool = True):
+  """Resume a job, optionally retrying chunks that ran out of attempts."""
+  progress = await get_backfill_progress(job_id)
+  if progress.get("error"):
+    return progress
+  task = task_client.send_task(task_client.RESUME_BACKFILL, {"job_id": job_id, "retry_failed": retry_failed})
+  return {
+    "message": "Backfill resume triggered",
+    "job_id": job_id,
+    "task_id": task.id,
     "status": "Task queued for processing"
   }
 
 # GET /packers/roster/task/{task_id} - Check task status
 @router.get("/roster/task/{task_id}")
 async def check_task_status(task_id: str):
-  """Check the status of a roster update task."""
-  from app.celery_app import celery_app
-  task = celery_app.AsyncResult(task_id)
-  
+  """Check the status of any refresh task: result when done, progress while it runs.
+  poll_after suggests how many seconds to wait before asking again.
+  """
+  task = task_client.task_result(task_id)
+  state = task.state
+  response = {"task_id": task_id, "status": state, "result": None, "progress": None, "poll_after": None}
+
+  if task.ready():
+    # Failures carry the exception; report its message instead of the object
+    response["result"] = task.result if task.successful() else str(task.result)
+  elif state == PROGRESS and isinstance(task.info, dict):
+    progress = describe_progress(task.info)
+    response["progress"] = progress
+    eta = progress.get("eta_seconds")
+    response["poll_after"] = min(10, max(1, round(eta / 5))) if eta else 2
+  else:
+    response["poll_after"] = 2
+  return response
+
+
+
+# GET /packers/raw/{payload_id} - Archived upstream response
+@router.get("/raw/{payload_id}")
+async def raw_payload(payload_id: str):
+  """The API Sports response a stored document was built from (see its raw_payload_id)."""
+  payload = await get_raw_payload(payload_id)
+  if not payload:
+    return {"message": "No raw payload found", "payload_id": payload_id}
+  return payload
+
+# GET /packers/snapshots - Current static bundle URLs for a team and season
+@router.get("/snapshots")
+async def snapshot_manifest(response: Response, season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Content-hashed URLs of the season bundle and each finished week's bundle.
+  The list changes after ingestion, so it's only cached briefly; the bundles themselves never change.
+  """
+  bundles = await get_snapshot_manifest(season=season, team_id=team_id)
+  if isinstance(bundles, dict) and bundles.get("error"):
+    return bundles
+  response.headers["Cache-Control"] = "public, max-age=60"
+  return {"team_id": team_id, "season": season, "bundle_count": len(bundles), "bundles": bundles}
+
+# POST /packers/snapshots/build - Rebuild a team's bundles now
+@router.post("/snapshots/build")
+async def trigger_snapshot_build(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+  """Rebuild the bundles without waiting for the next games/stats refresh."""
+  task = await trigger_once(task_client.BUILD_SNAPSHOTS, (team_id, season), season=season, team_id=team_id)
   return {
-    "task_id": task_id,
-    "status": task.state,
-    "result": task.result if task.ready() else None
+    **_trigger_response("Snapshot build", task),
+    "team_id": team_id,
+    "season": season,
+  }
+
+# GET /packers/snapshots/{file} - One immutable bundle version, precompressed
+@router.get("/snapshots/{filename}")
+async def snapshot_file(filename: str, request: Request):
+  """Serve {name}.{hash}.json as stored: brotli or gzip per Accept-Encoding, cacheable forever."""
+  parsed = parse_snapshot_file(filename)
+  variants = await get_snapshot_variants(*parsed) if parsed else None
+  if not variants:
+    return Response(status_code=404, content=b'{"message":"No snapshot found"}', media_type="application/json", headers={"Cache-Control": "no-store"})
+  etag = f'"{parsed[1]}"'
+  headers = {
+    "Cache-Control": "public, max-age=31536000, immutable",
+    "ETag": etag,
+    "Vary": "Accept-Encoding",
   }
+  if etag in request.headers.get("if-none-match", ""):
+    return Response(status_code=304, headers=headers)
+  encoding = choose_encoding(request.headers.get("accept-encoding", ""), variants)
+  if encoding != "identity":
+    headers["Content-Encoding"] = encoding
+  return Response(content=variants[encoding], media_type="application/json", headers=headers)
+
+# GET /packers/cache/stats - API Sports response cache counters
+@router.get("/cache/stats")
+async def cache_stats():
+  """Hit/stale/miss counters for the API Sports response cache, per endpoint."""
+  return await get_cache_stats()
+
+# GET /packers/quota - Shared API Sports quota governor state
+@router.get("/quota")
+async def quota_state():
+  """Token bucket state shared by all workers, plus the priority lane settings."""
+  return await get_quota_state()
+
+# GET /packers/upstream/status - Circuit breaker state per API Sports endpoint
+@router.get("/upstream/status")
+async def upstream_status():
+  """Breaker state (closed/open), consecutive failures and when it opened, per endpoint."""
+  return await get_circuit_states()
+
+# GET /packers/tasks/timings - Per-stage timings of recent task runs
+@router.get("/tasks/timings")
+async def task_timings(task: str = "update_packers_live_stats", limit: int = 20):
+  """Average time per stage over the last `limit` runs of a task, slowest stage first."""
+  runs = await get_task_runs_from_db(task, limit=min(max(limit, 1), 200))
+  if isinstance(runs, dict) and runs.get("error"):
+    return runs
+  return {"task": task, **summarize_runs(runs), "recent": runs}
 
+# POST /packers/tasks/{task}/profile - Capture a flame graph of the task's next run
+@router.post("/tasks/{task}/profile")
+async def profile_next_run(task: str):
+  """Arm the sampling profiler for the next run of `task` (folded stacks written to PROFILE_DIR)."""
+  if not await arm_profile(task):
+    return {"error": "Redis not configured; set TASK_PROFILE_TASKS on the worker instead"}
+  return {"task": task, "status": "Next run will be profiled"}
@@ -4,10 +4,41 @@ from datetime import datetime
 import json
 import os
 import requests  # For synchronous requests in Celery tasks
-from typing import Optional, Dict, Any
-from app.config import API_SPORTS_KEY
-
-BASE_URL = "https://v1.american-football.api-sports.io"
+import time
+from typing import Optional, Dict, Any, Tuple
+from app.config import (
+    PACKERS_TEAM_ID,
+    API_SPORTS_KEY,
+    API_SPORTS_BASE_URL,
+    API_HTTP_TIMEOUT,
+    API_HTTP_CONNECT_TIMEOUT,
+    API_HTTP_MAX_CONNECTIONS,
+)
+from app.services.cache_service import cached_fetch, cached_fetch_sync
+from app.services.quota_governor import (
+    acquire,
+    acquire_sync,
+    record_response,
+    record_response_sync,
+    LANE_LIVE,
+    LANE_POSTGAME,
+    LANE_SCHEDULE,
+    LANE_FALLBACK,
+)
+from app.services.circuit_breaker import (
+    allow_request,
+    allow_request_sync,
+    record_success,
+    record_success_sync,
+    record_failure,
+    record_failure_sync,
+    is_failure_status,
+)
+from app.services.metrics import observe_api_call
+from app.services.tracing import span
+from app.services.raw_payloads import archive_raw_payload_sync
+
+BASE_URL = API_SPORTS_BASE_URL
 
 def _get_headers():
     """Get headers with API key. Validates key is set when called."""
@@ -20,10 +51,17 @@ HEADERS = None  # Will be initialized on first use
 # --- Module-level aiohttp ClientSession ---
 _session: Optional[aiohttp.ClientSession] = None
 
+# In-flight upstream requests keyed by URL + normalized params. Concurrent identical
+# requests await the same task, so a burst of lookups costs one API-Sports call.
+_inflight: Dict[Tuple[str, Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]], "asyncio.Task[Any]"] = {}
+
 async def init_session():
+    """Create the shared ClientSession (on the API process's first upstream request)."""
     global _session
     if _session is None or _session.closed:
-        _session = aiohttp.ClientSession(headers=_get_headers())
+        connector = aiohttp.TCPConnector(limit=API_HTTP_MAX_CONNECTIONS, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=API_HTTP_TIMEOUT, connect=API_HTTP_CONNECT_TIMEOUT)
+        _session = aiohttp.ClientSession(headers=_get_headers(), connector=connector, timeout=timeout)
 
 async def close_session():
     global _session
@@ -31,29 +69,84 @@ async def close_session():
         await _session.close()
         _session = None
 
+def _endpoint_of(url: str) -> str:
+    return url[len(BASE_URL):] if url.startswith(BASE_URL) else url
+
+def _request_key(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+    """Build a hashable key for a request; param and header order and value types don't matter."""
+    return (
+        url,
+        tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())),
+        tuple(sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())),
+    )
+
 # --- Core Async Fetch Function ---
-async def fetch_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+async def fetch_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, lane: str = LANE_FALLBACK):
     """
     Asynchronously fetches a JSON response from a given URL with optional parameters and headers.
+    `headers` are sent on top of the session's (API key) headers.
+    Responses go through the Redis cache; on a miss, identical concurrent requests
+    share a single in-flight call and its result. Upstream calls spend quota from `lane`.
     """
-    global _session
-    if headers is None:
-        headers = _get_headers()
+    endpoint = _endpoint_of(url)
+    return await cached_fetch(endpoint, params, lambda: _fetch_json_coalesced(url, params, lane, headers), headers=headers)
+
+async def _fetch_json_coalesced(url: str, params: Optional[Dict[str, Any]], lane: str, headers: Optional[Dict[str, str]] = None):
+    key = _request_key(url, params, headers)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_json_uncoalesced(url, params, lane, headers))
+        _inflight[key] = task
+
+        def _forget(done, key=key):
+            if _inflight.get(key) is done:
+                _inflight.pop(key, None)
+
+        task.add_done_callback(_forget)
+    # shield() keeps one caller's cancellation (client disconnect) from
+    # cancelling the request the other waiters depend on.
+    return await asyncio.shield(task)
+
+async def _fetch_json_uncoalesced(url: str, params: Optional[Dict[str, Any]], lane: str, headers: Optional[Dict[str, str]] = None):
+    """Perform the actual HTTP request on the shared session."""
     if _session is None or _session.closed:
-        raise RuntimeError("aiohttp ClientSession is not initialized. Call init_session() before making requests.")
+        try:
+            await init_session()
+        except RuntimeError as e:
+            # Missing API key
+            return {"error": str(e)}
+    endpoint = _endpoint_of(url)
+    if not await allow_request(endpoint):
+        return {"error": "API Sports unavailable (circuit open)", "circuit_open": True}
+    if not await acquire(lane):
+        return {"error": "API quota exhausted, request shed", "quota_shed": True}
+    started = time.perf_counter()
     try:
-        async with _session.get(url, params=params) as response:
-            
+        async with _session.get(url, params=params, headers=headers) as response:
+            observe_api_call(endpoint, response.status, time.perf_counter() - started)
+            await record_response(response.status, response.headers)
+
             # Check for HTTP status code errors
             if response.status != 200:
                 print(f"Error: {response.status} for URL: {url} with params: {params}")
                 print(f"Response Text: {await response.text()}")
+                if is_failure_status(response.status):
+                    await record_failure(endpoint)
                 return {"error": f"HTTP Error {response.status}"}
                 
             # aiohttp handles JSON decoding
-            return await response.json()
+            data = await response.json()
+            await record_success(endpoint)
+            return data
+    except asyncio.TimeoutError:
+        print(f"Timed out fetching {url} with params: {params}")
+        observe_api_call(endpoint, "timeout", time.perf_counter() - started)
+        await record_failure(endpoint)
+        return {"error": "Timeout"}
     except aiohttp.ClientError as e:
         print(f"Aiohttp Client Error: {e}")
+        observe_api_call(endpoint, "error", time.perf_counter() - started)
+        await record_failure(endpoint)
         return {"error": f"Client Error: {e}"}
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
@@ -114,103 +207,120 @@ async def get_team_roster(team_id: int, season: int = 2025):
     }
     return await fetch_json(url, params=params)
 
+# --- Core Sync Fetch Function (Celery tasks) ---
+def _get_sync(endpoint: str, params: Dict[str, Any], what: str, lane: str, bypass_cache: bool = False, fetched_after: Optional[float] = None):
+    """
+    Synchronously GET an API Sports endpoint through the response cache.
+    Cache misses spend quota from `lane` (see quota_governor) and fail fast while the
+    endpoint's circuit breaker is open.
+    `what` names the call in error logs. Returns parsed JSON (with "raw_payload_id",
+    the archived copy of the response) or {"error": ...}.
+    """
+    def _fetch():
+        if not allow_request_sync(endpoint):
+            return {"error": "API Sports unavailable (circuit open)", "circuit_open": True}
+        with span("quota.wait"):
+            acquired = acquire_sync(lane)
+        if not acquired:
+            return {"error": "API quota exhausted, request shed", "quota_shed": True}
+        started = time.perf_counter()
+        try:
+            with span(f"api {endpoint}"):
+                response = requests.get(
+                    f"{BASE_URL}{endpoint}",
+                    headers=_get_headers(),
+                    params=params,
+                    timeout=(API_HTTP_CONNECT_TIMEOUT, API_HTTP_TIMEOUT),
+                )
+            observe_api_call(endpoint, response.status_code, time.perf_counter() - started)
+            record_response_sync(response.status_code, response.headers)
+            if is_failure_status(response.status_code):
+                record_failure_sync(endpoint)
+            response.raise_for_status()
+            data = response.json()
+            record_success_sync(endpoint)
+            if isinstance(data, dict):
+                with span("mongo.archive_raw_payload"):
+                    payload_id = archive_raw_payload_sync(endpoint, params, data)
+                if payload_id:
+                    data["raw_payload_id"] = payload_id
+            return data
+        except requests.RequestException as e:
+            print(f"Error fetching {what}: {e}")
+            if not isinstance(e, requests.HTTPError):
+                # Timeouts and connection errors; HTTP 5xx were recorded above
+                observe_api_call(endpoint, "timeout" if isinstance(e, requests.Timeout) else "error", time.perf_counter() - started)
+                record_failure_sync(endpoint)
+            return {"error": str(e)}
+
+    return cached_fetch_sync(endpoint, params, _fetch, bypass=bypass_cache, fetched_after=fetched_after)
+
+# Synchronous: get all NFL teams
+def get_nfl_teams_sync(season: int = 2025, league_id: int = 1):
+    """Fetch the league's teams for a season (sync, for the league-wide fan-out)."""
+    params = {
+        "league": league_id,
+        "season": season,
+    }
+    return _get_sync("/teams", params, "teams", LANE_SCHEDULE)
+
 # Synchronous: get team roster (for Celery tasks)
-def get_team_roster_sync(team_id: int = 15, season: int = 2025):
+def get_team_roster_sync(team_id: int = PACKERS_TEAM_ID, season: int = 2025, bypass_cache: bool = False):
     """
     Synchronously fetches the roster for a specific team and season.
     Used in Celery tasks since they don't support async operations by default.
     Team ID 15 is Green Bay Packers.
     """
-    url = f"{BASE_URL}/players"
     params = {
         "team": team_id,
         "season": season
     }
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching roster: {e}")
-        return {"error": str(e)}
+    return _get_sync("/players", params, "roster", LANE_SCHEDULE, bypass_cache=bypass_cache)
 
 # Synchronous: get player statistics
-def get_player_statistics_sync(player_id: int, season: int = 2025):
-    """Fetch season statistics for a player (sync, for Celery tasks)."""
-    url = f"{BASE_URL}/players/statistics"
+def get_player_statistics_sync(player_id: int, season: int = 2025, bypass_cache: bool = False, fetched_after: Optional[float] = None):
+    """Fetch season statistics for a player (sync, for Celery tasks).
+    A cached response from before `fetched_after` (unix time) is refetched.
+    """
     params = {
         "id": player_id,  # API uses 'id' parameter, not 'player'
         "season": season,
     }
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching player statistics: {e}")
-        return {"error": str(e)}
+    return _get_sync("/players/statistics", params, "player statistics", LANE_POSTGAME, bypass_cache=bypass_cache, fetched_after=fetched_after)
 
 # Synchronous: get live games
 def get_live_games_sync(league_id: int = 1, season: int = 2025):
-    """Fetch currently live games (sync helper for Celery tasks)."""
-    url = f"{BASE_URL}/games"
+    """Fetch currently live games (sync helper for Celery tasks). Never cached."""
     params = {
         "live": "all",
         "league": league_id,
         "season": season,
     }
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching live games: {e}")
-        return {"error": str(e)}
+    return _get_sync("/games", params, "live games", LANE_LIVE)
 
 # Synchronous: get team games
-def get_team_games_sync(team_id: int = 15, season: int = 2025):
+def get_team_games_sync(team_id: int = PACKERS_TEAM_ID, season: int = 2025, bypass_cache: bool = False):
     """Fetch games for a team (sync, for Celery tasks). Team ID 15 = Packers."""
-    url = f"{BASE_URL}/games"
     params = {
         "team": team_id,
         "season": season,
         "timezone": "America/Chicago",  # Get times in Chicago timezone
     }
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching team games: {e}")
-        return {"error": str(e)}
+    return _get_sync("/games", params, "team games", LANE_SCHEDULE, bypass_cache=bypass_cache)
 
 # Synchronous: get specific game by ID
 def get_game_by_id_sync(game_id: int):
     """Fetch a specific game by ID (sync, for Celery tasks)."""
-    url = f"{BASE_URL}/games"
     params = {"id": game_id}
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching game: {e}")
-        return {"error": str(e)}
+    return _get_sync("/games", params, "game", LANE_LIVE)
 
 # Synchronous: get live game player statistics
 def get_game_player_statistics_sync(game_id: int):
     """Fetch live player statistics for a specific game (sync, for Celery tasks).
-    This endpoint updates every 30 seconds during live games.
+    This endpoint updates every 30 seconds during live games, so it is never cached.
     """
-    url = f"{BASE_URL}/games/statistics/players"
     params = {"id": game_id}
-    try:
-        response = requests.get(url, headers=_get_headers(), params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching game player statistics: {e}")
-        return {"error": str(e)}
+    return _get_sync("/games/statistics/players", params, "game player statistics", LANE_LIVE)
 
 
 
@@ -319,11 +429,17 @@ def print_live_games(data):
 
 async def main():
     """Runs all async functions concurrently and prints the results."""
-    
+    await init_session()
+    try:
+        await _run_examples()
+    finally:
+        await close_session()
+
+async def _run_examples():
     # Define tasks to run concurrently
     tasks = [
         get_nfl_teams(season=2025), 
-        get_team_games(team_id=15, season=2025), # Green Bay Packers ID 15
+        get_team_games(team_id=PACKERS_TEAM_ID, season=2025), # Green Bay Packers
         get_live_games(season=2025),
     ]
 
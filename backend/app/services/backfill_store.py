@@ -0,0 +1,303 @@
+"""
+Mongo checkpoint store for historical backfill jobs.
+
+A job is planned into chunks (one roster and one games chunk per season and team,
+plus stats chunks of up to BACKFILL_STATS_CHUNK_SIZE players, planned once that
+team's roster is stored). Every chunk's status lives in Mongo, so a job picks up
+where it stopped after a worker restart:
+
+    backfill_jobs    {_id: job_id, seasons, team_ids, include_stats, force, status, ...}
+    backfill_chunks  {_id: "<job>:<season>:<team>:<kind>[:<n>]", job_id, season, team_id,
+                      kind, order, status, attempts, claim_id, claimed_at, started_at,
+                      player_ids, done_player_ids, ...}
+
+Chunk status: pending -> running -> done | failed (after BACKFILL_MAX_ATTEMPTS).
+
+A chunk is "running" from the moment the dispatcher claims it, so queued chunks count
+against BACKFILL_PARALLELISM. Each claim gets a claim_id that travels with the task;
+the task only runs the chunk if the claim is still current, and stamps started_at
+(and uses up an attempt) when it does. A started chunk is reset once it has been
+running longer than the task's hard limit plus STALE_MARGIN_SECONDS (the worker is
+gone), or marked failed when that was its last attempt; a claim whose task never
+started is reset after BACKFILL_CLAIM_TIMEOUT. A late task for a reset claim finds
+its claim_id replaced and does nothing, so a chunk never runs twice at once.
+"""
+import math
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.services.db_service import get_database, get_sync_database
+from app.config import (
+    BACKFILL_PARALLELISM,
+    BACKFILL_MAX_ATTEMPTS,
+    BACKFILL_STATS_CHUNK_SIZE,
+    BACKFILL_CLAIM_TIMEOUT,
+)
+
+JOBS = "backfill_jobs"
+CHUNKS = "backfill_chunks"
+
+KIND_ROSTER = "roster"
+KIND_GAMES = "games"
+KIND_STATS = "stats"
+KIND_RANK = {KIND_ROSTER: 0, KIND_GAMES: 1, KIND_STATS: 2}
+
+# How long past its hard time limit a started chunk may stay "running" before it's reset
+STALE_MARGIN_SECONDS = 300
+# How long one dispatcher holds a job's dispatch lease (it only needs milliseconds)
+DISPATCH_LEASE_SECONDS = 60
+
+# Used for the ETA before any roster has been stored (a typical 53-man roster plus practice squad)
+TYPICAL_ROSTER_SIZE = 70
+
+def chunk_id(job_id: str, season: int, team_id: int, kind: str, part: Optional[int] = None) -> str:
+    base = f"{job_id}:{season}:{team_id}:{kind}"
+    return base if part is None else f"{base}:{part}"
+
+def chunk_order(season: int, kind: str) -> int:
+    """Newest seasons first; within a season rosters, then games, then stats."""
+    return -season * 10 + KIND_RANK[kind]
+
+def make_chunk(job_id: str, season: int, team_id: int, kind: str, part: Optional[int] = None, player_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    doc = {
+        "_id": chunk_id(job_id, season, team_id, kind, part),
+        "job_id": job_id,
+        "season": season,
+        "team_id": team_id,
+        "kind": kind,
+        "order": chunk_order(season, kind),
+        "status": "pending",
+        "attempts": 0,
+        "created_at": datetime.utcnow(),
+    }
+    if player_ids is not None:
+        doc["player_ids"] = player_ids
+        doc["done_player_ids"] = []
+    return doc
+
+def stats_chunks(job_id: str, season: int, team_id: int, player_ids: List[int]) -> List[Dict[str, Any]]:
+    size = max(1, BACKFILL_STATS_CHUNK_SIZE)
+    return [
+        make_chunk(job_id, season, team_id, KIND_STATS, part=i // size, player_ids=player_ids[i:i + size])
+        for i in range(0, len(player_ids), size)
+    ]
+
+# --- Sync operations (Celery workers) ---
+
+def get_job_sync(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_sync_database()[JOBS].find_one({"_id": job_id})
+
+def update_job_sync(job_id: str, fields: Dict[str, Any]):
+    get_sync_database()[JOBS].update_one({"_id": job_id}, {"$set": {**fields, "updated_at": datetime.utcnow()}})
+
+def running_job_ids_sync() -> List[str]:
+    return [doc["_id"] for doc in get_sync_database()[JOBS].find({"status": "running"}, {"_id": 1})]
+
+def plan_chunks_sync(chunks: List[Dict[str, Any]]) -> int:
+    """Insert chunks that don't exist yet; re-planning an existing job is a no-op. Returns new chunk count."""
+    collection = get_sync_database()[CHUNKS]
+    inserted = 0
+    for chunk in chunks:
+        try:
+            collection.insert_one(chunk)
+            inserted += 1
+        except DuplicateKeyError:
+            pass
+    return inserted
+
+def count_chunks_sync(job_id: str, status: str) -> int:
+    return get_sync_database()[CHUNKS].count_documents({"job_id": job_id, "status": status})
+
+def reset_stale_chunks_sync(job_id: str, time_limit_seconds: int) -> int:
+    """
+    Chunks left running by a dead worker go back to pending (their attempt still counts),
+    or to failed when it was their last attempt; claims whose task never started go back
+    to pending. Returns how many chunks were reset.
+    """
+    collection = get_sync_database()[CHUNKS]
+    now = datetime.utcnow()
+    # The hard limit has killed the task by now
+    timed_out = {"job_id": job_id, "status": "running", "started_at": {"$lt": now - timedelta(seconds=time_limit_seconds + STALE_MARGIN_SECONDS)}}
+    failed = collection.update_many(
+        {**timed_out, "attempts": {"$gte": BACKFILL_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "last_error": "timed out", "finished_at": now}},
+    )
+    retried = collection.update_many(timed_out, {"$set": {"status": "pending", "last_error": "timed out"}})
+    never_started = collection.update_many(
+        {"job_id": job_id, "status": "running", "started_at": None, "claimed_at": {"$lt": now - timedelta(seconds=BACKFILL_CLAIM_TIMEOUT)}},
+        {"$set": {"status": "pending", "last_error": "task never started"}},
+    )
+    return failed.modified_count + retried.modified_count + never_started.modified_count
+
+def claim_chunk_sync(job_id: str) -> Optional[Dict[str, Any]]:
+    """Atomically move the next pending chunk to running under a new claim_id, so no two workers run the same chunk."""
+    return get_sync_database()[CHUNKS].find_one_and_update(
+        {"job_id": job_id, "status": "pending"},
+        {"$set": {"status": "running", "claim_id": uuid.uuid4().hex, "claimed_at": datetime.utcnow()}, "$unset": {"started_at": ""}},
+        sort=[("order", 1), ("_id", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+def start_chunk_sync(chunk_id: str, claim_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Stamp started_at and count the attempt, if `claim_id` is still the chunk's current, unstarted claim."""
+    return get_sync_database()[CHUNKS].find_one_and_update(
+        {"_id": chunk_id, "status": "running", "claim_id": claim_id, "started_at": None},
+        {"$set": {"started_at": datetime.utcnow()}, "$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+def acquire_dispatch_lease_sync(job_id: str, wait_seconds: float = 30) -> Optional[str]:
+    """
+    Take the job's dispatch lease, so concurrent dispatchers (one per finished chunk plus
+    the periodic sweep) count and claim one at a time. Returns a token for
+    release_dispatch_lease_sync, or None if another dispatcher held it for `wait_seconds`.
+    """
+    collection = get_sync_database()[JOBS]
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        now = datetime.utcnow()
+        taken = collection.update_one(
+            {"_id": job_id, "$or": [{"dispatch_lease_until": None}, {"dispatch_lease_until": {"$lt": now}}]},
+            {"$set": {"dispatch_lease": token, "dispatch_lease_until": now + timedelta(seconds=DISPATCH_LEASE_SECONDS)}},
+        )
+        if taken.modified_count:
+            return token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.2)
+
+def release_dispatch_lease_sync(job_id: str, token: str):
+    get_sync_database()[JOBS].update_one({"_id": job_id, "dispatch_lease": token}, {"$set": {"dispatch_lease_until": None}})
+
+def get_chunk_sync(chunk_id: str) -> Optional[Dict[str, Any]]:
+    return get_sync_database()[CHUNKS].find_one({"_id": chunk_id})
+
+def checkpoint_player_sync(chunk_id: str, player_id: int):
+    get_sync_database()[CHUNKS].update_one({"_id": chunk_id}, {"$addToSet": {"done_player_ids": player_id}})
+
+def complete_chunk_sync(chunk: Dict[str, Any], result: Dict[str, Any]):
+    finished = datetime.utcnow()
+    started = chunk.get("started_at") or finished
+    get_sync_database()[CHUNKS].update_one(
+        {"_id": chunk["_id"]},
+        {"$set": {
+            "status": "done",
+            "finished_at": finished,
+            "duration_seconds": round((finished - started).total_seconds(), 2),
+            "result": result,
+        }},
+    )
+
+def fail_chunk_sync(chunk: Dict[str, Any], error: str) -> str:
+    """Record a failed attempt; the chunk is retried until BACKFILL_MAX_ATTEMPTS. Returns the new status."""
+    status = "failed" if chunk.get("attempts", 0) >= BACKFILL_MAX_ATTEMPTS else "pending"
+    get_sync_database()[CHUNKS].update_one(
+        {"_id": chunk["_id"]},
+        {"$set": {"status": status, "last_error": error, "finished_at": datetime.utcnow()}},
+    )
+    return status
+
+def release_chunk_sync(chunk: Dict[str, Any], reason: str):
+    """Put a chunk back without using up an attempt (e.g. the upstream circuit is open)."""
+    get_sync_database()[CHUNKS].update_one(
+        {"_id": chunk["_id"]},
+        {"$set": {"status": "pending", "last_error": reason}, "$inc": {"attempts": -1}},
+    )
+
+def retry_failed_chunks_sync(job_id: str) -> int:
+    result = get_sync_database()[CHUNKS].update_many(
+        {"job_id": job_id, "status": "failed"},
+        {"$set": {"status": "pending", "attempts": 0}},
+    )
+    return result.modified_count
+
+# --- Async operations (FastAPI) ---
+
+async def create_backfill_job(seasons: List[int], team_ids: Optional[List[int]] = None, include_stats: bool = True, force: bool = False):
+    """Record a new job (status "planning"); plan_backfill turns it into chunks."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    job_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    await db[JOBS].insert_one({
+        "_id": job_id,
+        "seasons": sorted(set(seasons), reverse=True),
+        "team_ids": team_ids,  # None = every team stored for the season
+        "include_stats": include_stats,
+        "force": force,
+        "status": "planning",
+        "created_at": now,
+        "updated_at": now,
+    })
+    return {"job_id": job_id}
+
+async def get_backfill_progress(job_id: str):
+    """Chunk counts per kind/status plus an ETA from the average duration of finished chunks."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    job = await db[JOBS].find_one({"_id": job_id})
+    if not job:
+        return {"error": f"Backfill job {job_id} not found"}
+
+    rows = await db[CHUNKS].aggregate([
+        {"$match": {"job_id": job_id}},
+        {"$group": {
+            "_id": {"kind": "$kind", "status": "$status"},
+            "count": {"$sum": 1},
+            "avg_duration": {"$avg": "$duration_seconds"},
+        }},
+    ]).to_list(length=None)
+
+    by_kind: Dict[str, Dict[str, int]] = {kind: {"pending": 0, "running": 0, "done": 0, "failed": 0} for kind in KIND_RANK}
+    durations: Dict[str, float] = {}
+    for row in rows:
+        kind, status = row["_id"]["kind"], row["_id"]["status"]
+        by_kind.setdefault(kind, {"pending": 0, "running": 0, "done": 0, "failed": 0})[status] = row["count"]
+        if status == "done" and row.get("avg_duration") is not None:
+            durations[kind] = row["avg_duration"]
+
+    totals = {status: sum(counts[status] for counts in by_kind.values()) for status in ("pending", "running", "done", "failed")}
+    totals["total"] = sum(totals.values())
+
+    # Stats chunks are only planned once a team's roster is stored; estimate the ones still to come
+    unplanned_stats = 0
+    if job.get("include_stats"):
+        roster = by_kind[KIND_ROSTER]
+        rosters_left = roster["pending"] + roster["running"]
+        planned_stats = sum(by_kind[KIND_STATS].values())
+        per_roster = planned_stats / roster["done"] if roster["done"] else math.ceil(TYPICAL_ROSTER_SIZE / max(1, BACKFILL_STATS_CHUNK_SIZE))
+        unplanned_stats = round(rosters_left * per_roster)
+
+    remaining = {kind: counts["pending"] + counts["running"] for kind, counts in by_kind.items()}
+    remaining[KIND_STATS] = remaining.get(KIND_STATS, 0) + unplanned_stats
+
+    eta_seconds = None
+    if durations:
+        fallback = sum(durations.values()) / len(durations)
+        work = sum(count * durations.get(kind, fallback) for kind, count in remaining.items())
+        eta_seconds = round(work / max(1, BACKFILL_PARALLELISM), 1)
+
+    expected_total = totals["total"] + unplanned_stats
+    return {
+        "job_id": job_id,
+        "status": job.get("status"),
+        "seasons": job.get("seasons"),
+        "team_ids": job.get("team_ids"),
+        "include_stats": job.get("include_stats"),
+        "created_at": job.get("created_at"),
+        "finished_at": job.get("finished_at"),
+        "chunks": totals,
+        "by_kind": by_kind,
+        "estimated_unplanned_chunks": unplanned_stats,
+        "percent_complete": round(100 * (totals["done"] + totals["failed"]) / expected_total, 1) if expected_total else 0.0,
+        "eta_seconds": eta_seconds if job.get("status") == "running" else None,
+        "eta_at": (datetime.utcnow() + timedelta(seconds=eta_seconds)).isoformat() if eta_seconds is not None and job.get("status") == "running" else None,
+    }
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+from redis import asyncio as aioredis
+
+from app.services.redis_client import get_sync_redis, get_async_redis
+
+from app.config import API_CACHE_ENABLED
+
+CACHE_PREFIX = "apicache"
+STATS_KEY = f"{CACHE_PREFIX}:stats"
+REVALIDATE_LOCK_SECONDS = 30
+
+# Background revalidations started by the async path; held here so they aren't
+# garbage-collected before they finish
+_revalidations: "set[asyncio.Future[Any]]" = set()
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# --- TTL policy ---
+# Each entry is (fresh_ttl, stale_ttl) in seconds. Within fresh_ttl a cached response is
+# served as-is. For the following stale_ttl the API serves it and refreshes it in the
+# background; Celery tasks refresh it first and only fall back to it when the refresh
+# fails. None means the endpoint is never cached.
+CachePolicy = Optional[Tuple[int, int]]
+
+def cache_policy(endpoint: str, params: Optional[Dict[str, Any]] = None) -> CachePolicy:
+    """Return the (fresh, stale) TTLs for an API Sports endpoint + params, or None."""
+    params = params or {}
+    if endpoint == "/teams":
+        return (3 * DAY, 7 * DAY)
+    if endpoint == "/players":
+        if "search" in params:
+            return (6 * HOUR, 1 * DAY)
+        return (12 * HOUR, 7 * DAY)  # team roster
+    if endpoint == "/players/statistics":
+        # Season stats only move when a game is played
+        return (2 * HOUR, 1 * DAY)
+    if endpoint == "/games":
+        if "live" in params:
+            return None
+        if "id" in params:
+            return (5 * MINUTE, 1 * HOUR)
+        return (6 * HOUR, 2 * DAY)  # season schedule
+    # /games/statistics/players is live data
+    return None
+
+def cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> str:
+    """Key by endpoint, normalized params and any extra request headers (sorted, stringified)."""
+    normalized = "&".join(f"{k}={v}" for k, v in sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    key = f"{CACHE_PREFIX}:{endpoint}?{normalized}"
+    if headers:
+        key += "#" + "&".join(f"{k}={v}" for k, v in sorted((str(k).lower(), str(v)) for k, v in headers.items()))
+    return key
+
+def is_cacheable_response(data: Any) -> bool:
+    """Only cache successful payloads; API Sports reports some failures with HTTP 200 + 'errors'."""
+    return isinstance(data, dict) and "error" not in data and not data.get("errors")
+
+# --- Redis clients ---
+
+def _get_sync_client():
+    return get_sync_redis() if API_CACHE_ENABLED else None
+
+def _get_async_client():
+    return get_async_redis() if API_CACHE_ENABLED else None
+
+def _encode(data: Any) -> str:
+    return json.dumps({"fetched_at": time.time(), "data": data})
+
+def _decode(raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+def _classify(entry: Optional[Dict[str, Any]], policy: Tuple[int, int]) -> str:
+    if entry is None:
+        return "miss"
+    age = time.time() - entry.get("fetched_at", 0)
+    return "hit" if age < policy[0] else "stale"
+
+# --- Sync path (Celery tasks) ---
+
+def cached_fetch_sync(endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any], bypass: bool = False, fetched_after: Optional[float] = None):
+    """
+    Serve an upstream call from the Redis cache.
+    `fetch` performs the real request. `bypass` skips the read but still stores the result.
+    An entry fetched before `fetched_after` (unix time) counts as a miss.
+    A stale entry is refreshed inline (tasks store what they get, so they shouldn't get
+    old data) and only returned when the refresh fails. Redis problems never fail the
+    call; they just fall through to upstream.
+    """
+    policy = cache_policy(endpoint, params)
+    client = _get_sync_client()
+    if policy is None or client is None:
+        return fetch()
+
+    key = cache_key(endpoint, params)
+    try:
+        entry = None if bypass else _decode(client.get(key))
+    except redis.RedisError as e:
+        print(f"[CACHE] Redis unavailable, bypassing cache: {e}")
+        return fetch()
+    if entry is not None and fetched_after is not None and entry.get("fetched_at", 0) < fetched_after:
+        entry = None
+
+    state = "bypass" if bypass else _classify(entry, policy)
+    _count_sync(client, endpoint, state)
+    if state == "hit":
+        return entry["data"]  # type: ignore[index]
+    data = _refresh_sync(client, key, policy, fetch)
+    if state == "stale" and not is_cacheable_response(data):
+        print(f"[CACHE] Refresh of {key} failed, serving stale entry")
+        return entry["data"]  # type: ignore[index]
+    return data
+
+def _refresh_sync(client: redis.Redis, key: str, policy: Tuple[int, int], fetch: Callable[[], Any]):
+    data = fetch()
+    if is_cacheable_response(data):
+        try:
+            client.set(key, _encode(data), ex=policy[0] + policy[1])
+        except redis.RedisError as e:
+            print(f"[CACHE] Failed to store {key}: {e}")
+    return data
+
+def _count_sync(client: redis.Redis, endpoint: str, state: str):
+    try:
+        client.hincrby(STATS_KEY, f"{endpoint}:{state}", 1)
+    except redis.RedisError:
+        pass
+
+# --- Async path (FastAPI) ---
+
+async def cached_fetch(endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Awaitable[Any]], bypass: bool = False, headers: Optional[Dict[str, str]] = None):
+    """Async counterpart of cached_fetch_sync; revalidation runs as a background task.
+    `headers` are the extra request headers, if any; responses are cached per header set.
+    """
+    policy = cache_policy(endpoint, params)
+    client = _get_async_client()
+    if policy is None or client is None:
+        return await fetch()
+
+    key = cache_key(endpoint, params, headers)
+    try:
+        entry = None if bypass else _decode(await client.get(key))
+    except redis.RedisError as e:
+        print(f"[CACHE] Redis unavailable, bypassing cache: {e}")
+        return await fetch()
+
+    state = "bypass" if bypass else _classify(entry, policy)
+    await _count(client, endpoint, state)
+    if state == "hit":
+        return entry["data"]  # type: ignore[index]
+    if state == "stale":
+        if await _try_revalidate_lock(client, key):
+            task = asyncio.ensure_future(_refresh(client, key, policy, fetch))
+            _revalidations.add(task)
+            task.add_done_callback(_revalidations.discard)
+        return entry["data"]  # type: ignore[index]
+    return await _refresh(client, key, policy, fetch)
+
+async def _refresh(client: aioredis.Redis, key: str, policy: Tuple[int, int], fetch: Callable[[], Awaitable[Any]]):
+    data = await fetch()
+    if is_cacheable_response(data):
+        try:
+            await client.set(key, _encode(data), ex=policy[0] + policy[1])
+        except redis.RedisError as e:
+            print(f"[CACHE] Failed to store {key}: {e}")
+    return data
+
+async def _try_revalidate_lock(client: aioredis.Redis, key: str) -> bool:
+    try:
+        return bool(await client.set(f"{key}:revalidating", 1, nx=True, ex=REVALIDATE_LOCK_SECONDS))
+    except redis.RedisError:
+        return False
+
+async def _count(client: aioredis.Redis, endpoint: str, state: str):
+    try:
+        await client.hincrby(STATS_KEY, f"{endpoint}:{state}", 1)
+    except redis.RedisError:
+        pass
+
+async def get_cache_stats():
+    """Return hit/stale/miss/bypass counters per endpoint plus overall hit ratio."""
+    client = _get_async_client()
+    if client is None:
+        return {"enabled": False}
+    try:
+        raw = await client.hgetall(STATS_KEY)
+    except redis.RedisError as e:
+        return {"enabled": True, "error": str(e)}
+
+    endpoints: Dict[str, Dict[str, int]] = {}
+    for field, value in raw.items():
+        endpoint, _, state = field.decode().rpartition(":")
+        endpoints.setdefault(endpoint, {"hit": 0, "stale": 0, "miss": 0, "bypass": 0})[state] = int(value)
+
+    served = sum(c["hit"] + c["stale"] for c in endpoints.values())
+    total = served + sum(c["miss"] + c["bypass"] for c in endpoints.values())
+    return {
+        "enabled": True,
+        "endpoints": endpoints,
+        "hit_ratio": round(served / total, 4) if total else None,
+    }
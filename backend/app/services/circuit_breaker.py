@@ -0,0 +1,152 @@
+import time
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.services.redis_client import get_sync_redis, get_async_redis
+
+from app.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS
+
+CIRCUIT_PREFIX = "apicircuit"
+ENDPOINTS = ["/teams", "/players", "/players/statistics", "/games", "/games/statistics/players"]
+
+# State lives in Redis so every worker sees the same breaker:
+#   apicircuit:{endpoint}        hash {state: closed|open, failures, opened_at}
+#   apicircuit:{endpoint}:probe  set while one half-open probe is in flight
+# After CIRCUIT_FAILURE_THRESHOLD consecutive failures the breaker opens and calls fail
+# fast. Once CIRCUIT_OPEN_SECONDS have passed, a single caller is let through as a
+# probe; success closes the breaker, failure re-opens it for another period.
+
+def _key(endpoint: str) -> str:
+    return f"{CIRCUIT_PREFIX}:{endpoint}"
+
+def is_failure_status(status: int) -> bool:
+    """Upstream faults trip the breaker; 4xx (including 429, handled by the quota governor) don't."""
+    return status >= 500
+
+def _decode_state(raw: Dict[bytes, bytes]) -> Dict[str, Any]:
+    state = {k.decode(): v.decode() for k, v in raw.items()}
+    return {
+        "state": state.get("state", "closed"),
+        "failures": int(state.get("failures", 0)),
+        "opened_at": float(state["opened_at"]) if state.get("opened_at") else None,
+    }
+
+# --- Sync path (Celery tasks) ---
+
+def allow_request_sync(endpoint: str) -> bool:
+    """True if a call to `endpoint` may go upstream (closed, or this caller is the half-open probe)."""
+    client = get_sync_redis()
+    if client is None:
+        return True
+    try:
+        state = _decode_state(client.hgetall(_key(endpoint)))
+        if state["state"] != "open":
+            return True
+        if time.time() - (state["opened_at"] or 0) < CIRCUIT_OPEN_SECONDS:
+            return False
+        return bool(client.set(f"{_key(endpoint)}:probe", 1, nx=True, ex=CIRCUIT_OPEN_SECONDS))
+    except redis.RedisError as e:
+        print(f"[CIRCUIT] Redis unavailable, allowing request: {e}")
+        return True
+
+def record_success_sync(endpoint: str):
+    client = get_sync_redis()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        pipe.hset(_key(endpoint), mapping={"state": "closed", "failures": 0})
+        pipe.delete(f"{_key(endpoint)}:probe")
+        pipe.execute()
+    except redis.RedisError:
+        pass
+
+def record_failure_sync(endpoint: str):
+    client = get_sync_redis()
+    if client is None:
+        return
+    try:
+        failures = client.hincrby(_key(endpoint), "failures", 1)
+        probing = client.delete(f"{_key(endpoint)}:probe")
+        if probing or failures >= CIRCUIT_FAILURE_THRESHOLD:
+            client.hset(_key(endpoint), mapping={"state": "open", "opened_at": time.time()})
+            print(f"[CIRCUIT] Opened breaker for {endpoint} after {failures} failures")
+    except redis.RedisError:
+        pass
+
+def is_open_sync(endpoint: str) -> bool:
+    """True while the breaker is open and not yet due for a probe. Lets tasks bail out early."""
+    client = get_sync_redis()
+    if client is None:
+        return False
+    try:
+        state = _decode_state(client.hgetall(_key(endpoint)))
+    except redis.RedisError:
+        return False
+    return state["state"] == "open" and time.time() - (state["opened_at"] or 0) < CIRCUIT_OPEN_SECONDS
+
+# --- Async path (FastAPI) ---
+
+async def allow_request(endpoint: str) -> bool:
+    client = get_async_redis()
+    if client is None:
+        return True
+    try:
+        state = _decode_state(await client.hgetall(_key(endpoint)))
+        if state["state"] != "open":
+            return True
+        if time.time() - (state["opened_at"] or 0) < CIRCUIT_OPEN_SECONDS:
+            return False
+        return bool(await client.set(f"{_key(endpoint)}:probe", 1, nx=True, ex=CIRCUIT_OPEN_SECONDS))
+    except redis.RedisError as e:
+        print(f"[CIRCUIT] Redis unavailable, allowing request: {e}")
+        return True
+
+async def record_success(endpoint: str):
+    client = get_async_redis()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        pipe.hset(_key(endpoint), mapping={"state": "closed", "failures": 0})
+        pipe.delete(f"{_key(endpoint)}:probe")
+        await pipe.execute()
+    except redis.RedisError:
+        pass
+
+async def record_failure(endpoint: str):
+    client = get_async_redis()
+    if client is None:
+        return
+    try:
+        failures = await client.hincrby(_key(endpoint), "failures", 1)
+        probing = await client.delete(f"{_key(endpoint)}:probe")
+        if probing or failures >= CIRCUIT_FAILURE_THRESHOLD:
+            await client.hset(_key(endpoint), mapping={"state": "open", "opened_at": time.time()})
+            print(f"[CIRCUIT] Opened breaker for {endpoint} after {failures} failures")
+    except redis.RedisError:
+        pass
+
+async def is_open(endpoint: str) -> bool:
+    client = get_async_redis()
+    if client is None:
+        return False
+    try:
+        state = _decode_state(await client.hgetall(_key(endpoint)))
+    except redis.RedisError:
+        return False
+    return state["state"] == "open"
+
+async def get_circuit_states() -> Dict[str, Any]:
+    """Breaker state for every API Sports endpoint we call."""
+    client = get_async_redis()
+    if client is None:
+        return {"enabled": False}
+    states = {}
+    try:
+        for endpoint in ENDPOINTS:
+            states[endpoint] = _decode_state(await client.hgetall(_key(endpoint)))
+    except redis.RedisError as e:
+        return {"enabled": True, "error": str(e)}
+    return {"enabled": True, "endpoints": states}
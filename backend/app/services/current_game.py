@@ -0,0 +1,133 @@
+"""
+Precomputed "current game" per team and season.
+
+One `current_games` document per team and season holds the game to show now:
+
+    {_id: "15:2025", team_id, season,
+     next_game: {game, league, teams, scores},   first game that isn't over (live or upcoming)
+     live_game: {...} or None,                   the game in progress, if any
+     last_final_at,                              when the team's latest game went final
+     last_updated}
+
+It is rewritten only when its content changes:
+  - save_games_to_db_sync recomputes it from the schedule it just stored
+  - the live coordinator applies the status and scores of every live game (to the
+    stored games too), and fetches the final result once a game drops off the live list
+
+GET /packers/games/next and GET /packers/games/live read this one document, and
+get_next_game_sync uses it as well, so the worker and the frontend agree on which
+game is current. update_team_stats refetches season stats cached before last_final_at,
+so the final numbers aren't served from a pre-game cache entry.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import PACKERS_TEAM_ID
+
+# Statuses as sent by API Sports (game.status.short); the single source for every module
+LIVE_STATUSES = ("Q1", "Q2", "Q3", "Q4", "HT", "OT")
+SCHEDULED_STATUSES = ("NS", "TBD")
+# Played to the end (counts as a game played)
+FINISHED_STATUSES = ("FT", "AOT")
+# Will never be played or change again: the schedule moves past them
+OVER_STATUSES = FINISHED_STATUSES + ("CANC",)
+# Nothing to poll: over, or postponed (a postponed game stays the next game until it is
+# rescheduled, so PST isn't in OVER_STATUSES)
+NOT_ACTIVE_STATUSES = OVER_STATUSES + ("PST",)
+# Schedule fields the record keeps (no storage metadata)
+GAME_FIELDS = ("game", "league", "teams", "scores")
+
+def record_id(team_id: int, season: int) -> str:
+    return f"{team_id}:{season}"
+
+def _status(game: Dict[str, Any]) -> Optional[str]:
+    return ((game.get("game") or {}).get("status") or {}).get("short")
+
+def _game_id(game: Dict[str, Any]) -> Optional[int]:
+    return (game.get("game") or {}).get("id")
+
+def _kickoff(game: Dict[str, Any]):
+    date = (game.get("game") or {}).get("date") or {}
+    return (str(date.get("date") or ""), str(date.get("time") or ""))
+
+def _summary(game: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return {k: game[k] for k in GAME_FIELDS if k in game} if game else None
+
+def pick_current(games: Iterable[Dict[str, Any]]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """{"next_game", "live_game"} from a team's schedule."""
+    ordered = sorted(games, key=_kickoff)
+    live = next((g for g in ordered if _status(g) in LIVE_STATUSES), None)
+    upcoming = next((g for g in ordered if _status(g) not in OVER_STATUSES), None)
+    return {"next_game": _summary(upcoming), "live_game": _summary(live)}
+
+def recompute_current_game_sync(db, team_id: int, season: int, games: Optional[List[Dict[str, Any]]] = None) -> bool:
+    """Rebuild one team's record (from `games`, or the stored schedule); returns whether it changed."""
+    if games is None:
+        games = list(db["games"].find({"team_id": team_id, "season": season}, {k: 1 for k in GAME_FIELDS}))
+    current = pick_current(games)
+    _id = record_id(team_id, season)
+    stored = db["current_games"].find_one({"_id": _id}, {"next_game": 1, "live_game": 1, "last_final_at": 1}) or {}
+    if not games and not stored:
+        return False  # team's schedule isn't stored (e.g. the opponent outside a league refresh)
+    if stored and stored.get("next_game") == current["next_game"] and stored.get("live_game") == current["live_game"]:
+        return False
+    now = datetime.utcnow()
+    # The game the record showed has just gone final
+    statuses = {_game_id(g): _status(g) for g in games}
+    shown = {_game_id(stored[k]) for k in ("next_game", "live_game") if stored.get(k)}
+    just_final = any(statuses.get(game_id) in FINISHED_STATUSES for game_id in shown)
+    db["current_games"].replace_one(
+        {"_id": _id},
+        {
+            "team_id": team_id,
+            "season": season,
+            **current,
+            "last_final_at": now if just_final else stored.get("last_final_at"),
+            "last_updated": now,
+        },
+        upsert=True,
+    )
+    return True
+
+def apply_game_updates_sync(db, season: int, games: List[Dict[str, Any]]) -> List[int]:
+    """
+    Store the status and scores of `games` (live or just finished, as returned by
+    /games) on both teams' schedule entries, then refresh those teams' records.
+    Returns the team IDs whose record changed.
+    """
+    team_ids = set()
+    for game in games:
+        game_id = _game_id(game)
+        if game_id is None:
+            continue
+        update = {"game.status": (game.get("game") or {}).get("status"), "last_updated": datetime.utcnow()}
+        if game.get("scores") is not None:
+            update["scores"] = game["scores"]
+        db["games"].update_many({"game.id": game_id, "season": season}, {"$set": update})
+        teams = game.get("teams") or {}
+        team_ids.update(t.get("id") for t in (teams.get("home") or {}, teams.get("away") or {}) if t.get("id") is not None)
+    return [team_id for team_id in sorted(team_ids) if recompute_current_game_sync(db, team_id, season)]
+
+def ended_live_games_sync(db, season: int, live_game_ids: List[int], team_id: Optional[int] = None) -> List[int]:
+    """Games a record still shows as live that the API no longer lists as live."""
+    query: Dict[str, Any] = {"season": season, "live_game": {"$ne": None}, "live_game.game.id": {"$nin": live_game_ids}}
+    if team_id is not None:
+        query["team_id"] = team_id
+    return sorted({doc["live_game"]["game"]["id"] for doc in db["current_games"].find(query, {"live_game.game.id": 1})})
+
+def get_current_game_sync(db, team_id: int, season: int) -> Optional[Dict[str, Any]]:
+    return db["current_games"].find_one({"_id": record_id(team_id, season)})
+
+async def get_current_game_from_db(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """The team's record; computed from the stored schedule when it hasn't been built yet."""
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    doc = await db["current_games"].find_one({"_id": record_id(team_id, season)}, {"_id": 0})
+    if doc is not None:
+        return doc
+    games = await db["games"].find({"team_id": team_id, "season": season}, {k: 1 for k in GAME_FIELDS}).to_list(length=None)
+    if not games:
+        return None
+    return {"team_id": team_id, "season": season, **pick_current(games), "last_updated": None}
@@ -1,20 +1,86 @@
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from typing import Dict, Any, List, Optional
-from app.config import MONGO_URL, DATABASE_NAME
+from app.config import MONGO_URL, DATABASE_NAME, RAW_PAYLOAD_TTL_DAYS, PACKERS_TEAM_ID, PACKERS_TEAM_NAME
+from app.services.metrics import mongo_command_listener
+from app.services.request_timing import request_mongo_listener
+from app.services.tracing import stage
+from app.services.leaderboards import update_leaderboards_sync
+from app.services.redis_client import bump_stats_version_sync
+from app.services.current_game import recompute_current_game_sync, get_current_game_sync, OVER_STATUSES, NOT_ACTIVE_STATUSES, SCHEDULED_STATUSES
 from datetime import datetime
 
 client = None
 database = None
+_sync_client = None
+_index_task = None
+
+# Every collection is keyed by team so one deployment can serve the whole league
+INDEXES = {
+    "players": [[("team_id", 1), ("season", 1)], [("id", 1), ("season", 1)]],
+    "player_stats": [[("player_id", 1), ("season", 1), ("team_id", 1)], [("team_id", 1), ("season", 1)]],
+    "games": [[("team_id", 1), ("season", 1)], [("game.id", 1)]],
+    "live_stats": [[("game_id", 1), ("player_id", 1)], [("player_id", 1), ("season", 1)], [("season", 1), ("last_updated", -1)]],
+    "teams": [[("team.id", 1), ("season", 1)]],
+    "boxscores": [[("season", 1)]],
+    "raw_payloads": [[("endpoint", 1), ("fetched_at", -1)]],
+    "backfill_chunks": [[("job_id", 1), ("status", 1), ("order", 1)]],
+    "snapshots": [[("name", 1), ("created_at", -1)]],
+    "snapshot_manifest": [[("team_id", 1), ("season", 1), ("order", 1)]],
+}
 
 async def connect_db():
-    global client, database
-    client = AsyncIOMotorClient(MONGO_URL)
+    global client, database, _index_task
+    client = AsyncIOMotorClient(MONGO_URL, event_listeners=[mongo_command_listener, request_mongo_listener])
     database = client[DATABASE_NAME] # type: ignore
     print(f"Connected to MongoDB: {DATABASE_NAME}")
+    # Indexes already exist on every start but the first; don't hold up serving for the round trips
+    _index_task = asyncio.get_running_loop().create_task(ensure_indexes())
+
+async def ensure_indexes():
+    """Create the compound indexes the team-keyed queries rely on (idempotent)."""
+    if database is None:
+        return
+    try:
+        await migrate_legacy_player_stats()
+        for collection_name, indexes in INDEXES.items():
+            for keys in indexes:
+                await database[collection_name].create_index(keys)
+        if RAW_PAYLOAD_TTL_DAYS:
+            await database["raw_payloads"].create_index("fetched_at", expireAfterSeconds=RAW_PAYLOAD_TTL_DAYS * 86400)
+    except Exception as e:
+        print(f"Error creating indexes: {e}")
+
+async def migrate_legacy_player_stats(team_id: int = PACKERS_TEAM_ID):
+    """
+    Give player_stats documents from before stats were keyed by team their team_id
+    (they were all Packers stats), so the team-scoped upserts and queries find them.
+    Where an ingestion already wrote the team-keyed document, the legacy one is dropped.
+    Idempotent; a no-op once every document has a team_id.
+    """
+    collection = database["player_stats"]
+    legacy = await collection.find({"team_id": {"$exists": False}}, {"player_id": 1, "season": 1}).to_list(length=None)
+    if not legacy:
+        return 0
+    keyed = await collection.find(
+        {"team_id": team_id, "player_id": {"$in": list({d.get("player_id") for d in legacy})}},
+        {"_id": 0, "player_id": 1, "season": 1},
+    ).to_list(length=None)
+    existing = {(d["player_id"], d.get("season")) for d in keyed}
+    duplicates = [d["_id"] for d in legacy if (d.get("player_id"), d.get("season")) in existing]
+    adopt = [d["_id"] for d in legacy if (d.get("player_id"), d.get("season")) not in existing]
+    if duplicates:
+        await collection.delete_many({"_id": {"$in": duplicates}})
+    if adopt:
+        await collection.update_many({"_id": {"$in": adopt}}, {"$set": {"team_id": team_id}})
+    print(f"[MIGRATE] player_stats: set team_id {team_id} on {len(adopt)} legacy docs, dropped {len(duplicates)} superseded")
+    return len(adopt)
 
 async def close_db():
     global client, database
+    if _index_task is not None and not _index_task.done():
+        _index_task.cancel()
     if client:
         client.close()
         print("Closed MongoDB connection")
@@ -24,23 +90,68 @@ def get_database():
 
 # Synchronous database operations for Celery tasks
 def get_sync_database():
-    """Get synchronous MongoDB client for Celery tasks."""
+    """Get synchronous MongoDB client for Celery tasks.
+    The client (and its connection pool) is created once per process and reused;
+    league-wide fan-out would otherwise open a new pool for every call.
+    """
+    global _sync_client
     if not MONGO_URL or not DATABASE_NAME:
         raise RuntimeError("MONGO_URL or DATABASE_NAME not configured")
-    sync_client = MongoClient(MONGO_URL)
-    return sync_client[DATABASE_NAME]
+    if _sync_client is None:
+        _sync_client = MongoClient(MONGO_URL, event_listeners=[mongo_command_listener])
+    return _sync_client[DATABASE_NAME]
+
+def save_teams_to_db_sync(teams_data: List[Dict[str, Any]], season: int = 2025):
+    """Replace the league's team list for a season (API Sports /teams payload)."""
+    try:
+        db = get_sync_database()
+        collection = db["teams"]
+        collection.delete_many({"season": season})
+        docs = [{**team, "season": season, "last_updated": datetime.utcnow()} for team in teams_data]
+        if docs:
+            collection.insert_many(docs)
+        return {"success": True, "inserted_count": len(docs), "season": season}
+    except Exception as e:
+        print(f"Error saving teams: {e}")
+        return {"success": False, "error": str(e)}
+
+def get_team_ids_sync(season: int = 2025) -> List[int]:
+    """Team IDs stored for a season by save_teams_to_db_sync."""
+    db = get_sync_database()
+    return [
+        doc["team"]["id"]
+        for doc in db["teams"].find({"season": season}, {"team.id": 1})
+        if doc.get("team", {}).get("id")
+    ]
+
+@stage("mongo.get_team_name")
+def get_team_name_sync(team_id: int, season: int = 2025) -> str:
+    db = get_sync_database()
+    doc = db["teams"].find_one({"team.id": team_id, "season": season}, {"team.name": 1})
+    if doc and doc.get("team", {}).get("name"):
+        return doc["team"]["name"]
+    return PACKERS_TEAM_NAME if team_id == PACKERS_TEAM_ID else f"Team {team_id}"
+
+async def get_teams_from_db(season: int = 2025):
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    teams = await db["teams"].find({"season": season}, {"_id": 0}).to_list(length=None)
+    return teams
 
-def save_roster_to_db_sync(roster_data: List[Dict[str, Any]], season: int = 2025):
+@stage("mongo.save_roster_to_db")
+def save_roster_to_db_sync(roster_data: List[Dict[str, Any]], season: int = 2025, team_id: int = PACKERS_TEAM_ID, team_name: str = PACKERS_TEAM_NAME, raw_payload_id: Optional[str] = None):
     """
-    Synchronously saves the Packers roster to MongoDB.
-    Replaces the existing roster for the given season.
+    Synchronously saves a team's roster to MongoDB.
+    Replaces the existing roster for the given team and season.
+    raw_payload_id references the archived /players response (see raw_payloads).
     """
     try:
         db = get_sync_database()
         collection = db["players"]
         
-        # Clear existing roster for this season
-        collection.delete_many({"season": season})
+        # Clear existing roster for this team and season
+        collection.delete_many({"season": season, "team_id": team_id})
         
         # Add metadata to each player
         players_with_metadata = []
@@ -49,8 +160,9 @@ def save_roster_to_db_sync(roster_data: List[Dict[str, Any]], season: int = 2025
                 **player,
                 "season": season,
                 "last_updated": datetime.utcnow(),
-                "team": "Green Bay Packers",
-                "team_id": 15
+                "team": team_name,
+                "team_id": team_id,
+                "raw_payload_id": raw_payload_id,
             }
             players_with_metadata.append(player_doc)
         
@@ -61,6 +173,7 @@ def save_roster_to_db_sync(roster_data: List[Dict[str, Any]], season: int = 2025
                 "success": True,
                 "inserted_count": len(result.inserted_ids),
                 "season": season,
+                "team_id": team_id,
                 "updated_at": datetime.utcnow()
             }
         else:
@@ -75,14 +188,14 @@ def save_roster_to_db_sync(roster_data: List[Dict[str, Any]], season: int = 2025
             "error": str(e)
         }
 
-async def get_roster_from_db(season: int = 2025):
-    """Asynchronously retrieves the Packers roster from MongoDB."""
+async def get_roster_from_db(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """Asynchronously retrieves a team's roster (Packers by default) from MongoDB."""
     db = get_database()
     if db is None:
         return {"error": "Database not connected"}
     
     collection = db["players"]
-    roster = await collection.find({"season": season}).to_list(length=None)
+    roster = await collection.find({"season": season, "team_id": team_id}).to_list(length=None)
     
     # Convert ObjectId to string for JSON serialization
     for player in roster:
@@ -91,10 +204,10 @@ async def get_roster_from_db(season: int = 2025):
     
     return roster
 
-async def search_players_by_name(name: str, season: int | None = None):
+async def search_players_by_name(name: str, season: int | None = None, team_id: int | None = None):
     """Search players in our MongoDB by name (case-insensitive).
     Tries common fields from API Sports payload: top-level 'name' or nested 'player.name'.
-    Optionally filter by season.
+    Optionally filter by season and team.
     """
     db = get_database()
     if db is None:
@@ -108,6 +221,8 @@ async def search_players_by_name(name: str, season: int | None = None):
     }
     if season is not None:
         query["season"] = season
+    if team_id is not None:
+        query["team_id"] = team_id
 
     collection = db["players"]
     players = await collection.find(query).to_list(length=None)
@@ -118,9 +233,137 @@ async def search_players_by_name(name: str, season: int | None = None):
 
     return players
 
-def upsert_player_stats_sync(player_id: int, season: int, stats_payload: Dict[str, Any] | list):
+async def get_season_stats_for_players(player_ids: List[int], seasons: List[int]):
+    """Season stats documents for a batch of players (one $in query), compact projection.
+    Callers pick each player's season/team; a traded player has one document per team.
+    """
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    if not player_ids:
+        return []
+    return await db["player_stats"].find(
+        {"player_id": {"$in": player_ids}, "season": {"$in": seasons}},
+        {"_id": 0, "player_id": 1, "season": 1, "team_id": 1, "stats": 1, "last_updated": 1},
+    ).sort("last_updated", -1).to_list(length=None)
+
+def _newest_live_stats_pipeline(player_ids: List[int], season: int, projection: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Newest live_stats document per player, as the in-memory live state holds them."""
+    return [
+        {"$match": {"player_id": {"$in": player_ids}, "season": season}},
+        {"$sort": {"last_updated": -1}},
+        {"$group": {"_id": "$player_id", "doc": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$doc"}},
+        {"$project": projection},
+    ]
+
+async def get_current_live_stats_for_players(player_ids: List[int], season: int):
+    """Newest live_stats document per player, compact (one aggregation over the player_id/season index)."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    if not player_ids:
+        return []
+    projection = {"_id": 0, "player_id": 1, "game_id": 1, "season": 1, "groups": 1, "last_updated": 1}
+    return await db["live_stats"].aggregate(_newest_live_stats_pipeline(player_ids, season, projection)).to_list(length=None)
+
+def aggregate_season_stats(groups: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Parse API Sports stat groups (Passing, Rushing, ...) into our structured stats dict."""
+    # Aggregate stats from all games
+    aggregated_stats = {
+        "passing": {"yards": 0, "touchdowns": 0, "interceptions": 0, "completions": 0, "attempts": 0},
+        "rushing": {"yards": 0, "touchdowns": 0, "carries": 0},
+        "receiving": {"yards": 0, "touchdowns": 0, "receptions": 0, "targets": 0},
+        "defense": {"tackles": 0, "sacks": 0.0, "interceptions": 0, "forced_fumbles": 0},
+        "kicking": {"field_goals_made": 0, "field_goals_attempts": 0, "extra_points_made": 0, "extra_points_attempts": 0},
+        "punting": {"punts": 0, "yards": 0, "avg": 0.0, "inside_20": 0, "touchbacks": 0},
+        "returning": {"kick_returns": 0, "kick_return_yards": 0, "punt_returns": 0, "punt_return_yards": 0, "touchdowns": 0},
+        "scoring": {"touchdowns": 0, "two_point_conversions": 0, "points": 0},
+    }
+
+    # Helper to safely parse integer from string (handles "1,653" format)
+    def safe_int(val):
+        if not val:
+            return 0
+        return int(str(val).replace(",", ""))
+
+    def safe_float(val):
+        if not val:
+            return 0.0
+        return float(str(val).replace(",", ""))
+
+    # Parse stats from groups (each group is a category like Rushing, Receiving, etc.)
+    for group in groups:
+        if not isinstance(group, dict):
+            continue
+
+        group_name = group.get("name", "")
+        statistics = group.get("statistics", [])
+
+        # Convert statistics array to dict for easier lookup
+        stats_dict = {}
+        for stat in statistics:
+            if isinstance(stat, dict):
+                stats_dict[stat.get("name", "")] = stat.get("value", "0")
+
+        # Parse based on group name
+        if group_name == "Passing":
+            aggregated_stats["passing"]["yards"] += safe_int(stats_dict.get("yards"))
+            aggregated_stats["passing"]["touchdowns"] += safe_int(stats_dict.get("passing touchdowns"))
+            aggregated_stats["passing"]["interceptions"] += safe_int(stats_dict.get("interceptions thrown"))
+            aggregated_stats["passing"]["completions"] += safe_int(stats_dict.get("completions"))
+            aggregated_stats["passing"]["attempts"] += safe_int(stats_dict.get("passing attempts"))
+
+        elif group_name == "Rushing":
+            aggregated_stats["rushing"]["yards"] += safe_int(stats_dict.get("yards"))
+            aggregated_stats["rushing"]["touchdowns"] += safe_int(stats_dict.get("rushing touchdowns"))
+            aggregated_stats["rushing"]["carries"] += safe_int(stats_dict.get("rushing attempts"))
+
+        elif group_name == "Receiving":
+            aggregated_stats["receiving"]["yards"] += safe_int(stats_dict.get("receiving yards"))
+            aggregated_stats["receiving"]["touchdowns"] += safe_int(stats_dict.get("receiving touchdowns"))
+            aggregated_stats["receiving"]["receptions"] += safe_int(stats_dict.get("receptions"))
+            aggregated_stats["receiving"]["targets"] += safe_int(stats_dict.get("receiving targets"))
+
+        elif group_name == "Defense":
+            aggregated_stats["defense"]["tackles"] += safe_int(stats_dict.get("total tackles"))
+            aggregated_stats["defense"]["sacks"] += safe_float(stats_dict.get("sacks"))
+            aggregated_stats["defense"]["interceptions"] += safe_int(stats_dict.get("interceptions"))
+            aggregated_stats["defense"]["forced_fumbles"] += safe_int(stats_dict.get("forced fumbles"))
+
+        elif group_name == "Kicking":
+            aggregated_stats["kicking"]["field_goals_made"] += safe_int(stats_dict.get("field goals made"))
+            aggregated_stats["kicking"]["field_goals_attempts"] += safe_int(stats_dict.get("field goal attempts"))
+            aggregated_stats["kicking"]["extra_points_made"] += safe_int(stats_dict.get("extra points made"))
+            aggregated_stats["kicking"]["extra_points_attempts"] += safe_int(stats_dict.get("extra point attempts"))
+
+        elif group_name == "Punting":
+            aggregated_stats["punting"]["punts"] += safe_int(stats_dict.get("punts"))
+            aggregated_stats["punting"]["yards"] += safe_int(stats_dict.get("gross punt yards"))
+            aggregated_stats["punting"]["avg"] = safe_float(stats_dict.get("yards per punt avg"))
+            aggregated_stats["punting"]["inside_20"] += safe_int(stats_dict.get("punts inside 20"))
+            aggregated_stats["punting"]["touchbacks"] += safe_int(stats_dict.get("touchbacks"))
+
+        elif group_name == "Returning":
+            aggregated_stats["returning"]["kick_returns"] += safe_int(stats_dict.get("kick returns"))
+            aggregated_stats["returning"]["kick_return_yards"] += safe_int(stats_dict.get("kick return yards"))
+            aggregated_stats["returning"]["punt_returns"] += safe_int(stats_dict.get("punt returns"))
+            aggregated_stats["returning"]["punt_return_yards"] += safe_int(stats_dict.get("punt return yards"))
+            aggregated_stats["returning"]["touchdowns"] += safe_int(stats_dict.get("return touchdowns"))
+
+        elif group_name == "Scoring":
+            aggregated_stats["scoring"]["touchdowns"] += safe_int(stats_dict.get("total touchdowns"))
+            aggregated_stats["scoring"]["two_point_conversions"] += safe_int(stats_dict.get("two point conversions"))
+            aggregated_stats["scoring"]["points"] += safe_int(stats_dict.get("total points"))
+    
+    return aggregated_stats
+
+@stage("mongo.upsert_player_stats")
+def upsert_player_stats_sync(player_id: int, season: int, stats_payload: Dict[str, Any] | list, team_id: int = PACKERS_TEAM_ID, raw_payload_id: Optional[str] = None):
     """Upsert player season stats into 'player_stats' collection.
     Extracts relevant football stats from API response and stores them in a structured format.
+    Only the stats recorded for `team_id` are kept; documents are keyed by player, season and team.
+    The API response itself is not copied in; raw_payload_id references its archived copy.
     """
     try:
         db = get_sync_database()
@@ -140,129 +383,47 @@ def upsert_player_stats_sync(player_id: int, season: int, stats_payload: Dict[st
         player_name = player_info.get("name", "")
         position = player_info.get("position", "")
         
-        # API response groups stats by teams - filter to only Green Bay Packers (team_id: 15)
+        # API response groups stats by teams - filter to the requested team
         teams = player_data.get("teams", [])
-        packers_team = None
+        team_stats = None
         for team in teams:
-            if isinstance(team, dict) and team.get("team", {}).get("id") == 15:
-                packers_team = team
+            if isinstance(team, dict) and team.get("team", {}).get("id") == team_id:
+                team_stats = team
                 break
         
-        # If no Packers stats found, skip this player
-        if not packers_team:
-            return {"success": False, "error": "No stats for Packers team"}
-        
-        # Extract groups (stat categories) from Packers team
-        groups = packers_team.get("groups", [])
-        
-        # Create filtered raw response with only Packers data
-        filtered_raw_response = {
-            "player": player_data.get("player", {}),
-            "team": packers_team
-        }
-        
-        # Aggregate stats from all games
-        aggregated_stats = {
-            "passing": {"yards": 0, "touchdowns": 0, "interceptions": 0, "completions": 0, "attempts": 0},
-            "rushing": {"yards": 0, "touchdowns": 0, "carries": 0},
-            "receiving": {"yards": 0, "touchdowns": 0, "receptions": 0, "targets": 0},
-            "defense": {"tackles": 0, "sacks": 0.0, "interceptions": 0, "forced_fumbles": 0},
-            "kicking": {"field_goals_made": 0, "field_goals_attempts": 0, "extra_points_made": 0, "extra_points_attempts": 0},
-            "punting": {"punts": 0, "yards": 0, "avg": 0.0, "inside_20": 0, "touchbacks": 0},
-            "returning": {"kick_returns": 0, "kick_return_yards": 0, "punt_returns": 0, "punt_return_yards": 0, "touchdowns": 0},
-            "scoring": {"touchdowns": 0, "two_point_conversions": 0, "points": 0},
-        }
-        
-        # Helper to safely parse integer from string (handles "1,653" format)
-        def safe_int(val):
-            if not val:
-                return 0
-            return int(str(val).replace(",", ""))
+        # If no stats for this team found, skip this player
+        if not team_stats:
+            return {"success": False, "error": f"No stats for team {team_id}"}
         
-        def safe_float(val):
-            if not val:
-                return 0.0
-            return float(str(val).replace(",", ""))
+        # Extract groups (stat categories) for this team
+        groups = team_stats.get("groups", [])
         
-        # Parse stats from groups (each group is a category like Rushing, Receiving, etc.)
-        for group in groups:
-            if not isinstance(group, dict):
-                continue
-            
-            group_name = group.get("name", "")
-            statistics = group.get("statistics", [])
-            
-            # Convert statistics array to dict for easier lookup
-            stats_dict = {}
-            for stat in statistics:
-                if isinstance(stat, dict):
-                    stats_dict[stat.get("name", "")] = stat.get("value", "0")
-            
-            # Parse based on group name
-            if group_name == "Passing":
-                aggregated_stats["passing"]["yards"] += safe_int(stats_dict.get("yards"))
-                aggregated_stats["passing"]["touchdowns"] += safe_int(stats_dict.get("passing touchdowns"))
-                aggregated_stats["passing"]["interceptions"] += safe_int(stats_dict.get("interceptions thrown"))
-                aggregated_stats["passing"]["completions"] += safe_int(stats_dict.get("completions"))
-                aggregated_stats["passing"]["attempts"] += safe_int(stats_dict.get("passing attempts"))
-            
-            elif group_name == "Rushing":
-                aggregated_stats["rushing"]["yards"] += safe_int(stats_dict.get("yards"))
-                aggregated_stats["rushing"]["touchdowns"] += safe_int(stats_dict.get("rushing touchdowns"))
-                aggregated_stats["rushing"]["carries"] += safe_int(stats_dict.get("rushing attempts"))
-            
-            elif group_name == "Receiving":
-                aggregated_stats["receiving"]["yards"] += safe_int(stats_dict.get("receiving yards"))
-                aggregated_stats["receiving"]["touchdowns"] += safe_int(stats_dict.get("receiving touchdowns"))
-                aggregated_stats["receiving"]["receptions"] += safe_int(stats_dict.get("receptions"))
-                aggregated_stats["receiving"]["targets"] += safe_int(stats_dict.get("receiving targets"))
-            
-            elif group_name == "Defense":
-                aggregated_stats["defense"]["tackles"] += safe_int(stats_dict.get("total tackles"))
-                aggregated_stats["defense"]["sacks"] += safe_float(stats_dict.get("sacks"))
-                aggregated_stats["defense"]["interceptions"] += safe_int(stats_dict.get("interceptions"))
-                aggregated_stats["defense"]["forced_fumbles"] += safe_int(stats_dict.get("forced fumbles"))
-            
-            elif group_name == "Kicking":
-                aggregated_stats["kicking"]["field_goals_made"] += safe_int(stats_dict.get("field goals made"))
-                aggregated_stats["kicking"]["field_goals_attempts"] += safe_int(stats_dict.get("field goal attempts"))
-                aggregated_stats["kicking"]["extra_points_made"] += safe_int(stats_dict.get("extra points made"))
-                aggregated_stats["kicking"]["extra_points_attempts"] += safe_int(stats_dict.get("extra point attempts"))
-            
-            elif group_name == "Punting":
-                aggregated_stats["punting"]["punts"] += safe_int(stats_dict.get("punts"))
-                aggregated_stats["punting"]["yards"] += safe_int(stats_dict.get("gross punt yards"))
-                aggregated_stats["punting"]["avg"] = safe_float(stats_dict.get("yards per punt avg"))
-                aggregated_stats["punting"]["inside_20"] += safe_int(stats_dict.get("punts inside 20"))
-                aggregated_stats["punting"]["touchbacks"] += safe_int(stats_dict.get("touchbacks"))
-            
-            elif group_name == "Returning":
-                aggregated_stats["returning"]["kick_returns"] += safe_int(stats_dict.get("kick returns"))
-                aggregated_stats["returning"]["kick_return_yards"] += safe_int(stats_dict.get("kick return yards"))
-                aggregated_stats["returning"]["punt_returns"] += safe_int(stats_dict.get("punt returns"))
-                aggregated_stats["returning"]["punt_return_yards"] += safe_int(stats_dict.get("punt return yards"))
-                aggregated_stats["returning"]["touchdowns"] += safe_int(stats_dict.get("return touchdowns"))
-            
-            elif group_name == "Scoring":
-                aggregated_stats["scoring"]["touchdowns"] += safe_int(stats_dict.get("total touchdowns"))
-                aggregated_stats["scoring"]["two_point_conversions"] += safe_int(stats_dict.get("two point conversions"))
-                aggregated_stats["scoring"]["points"] += safe_int(stats_dict.get("total points"))
+        aggregated_stats = aggregate_season_stats(groups)
         
         result = collection.update_one(
-            {"player_id": player_id, "season": season},
+            {"player_id": player_id, "season": season, "team_id": team_id},
             {
                 "$set": {
                     "player_id": player_id,
+                    "team_id": team_id,
                     "player_name": player_name,
                     "position": position,
                     "season": season,
                     "stats": aggregated_stats,
-                    "raw_response": filtered_raw_response,  # Only store Packers team data
+                    "raw_payload_id": raw_payload_id,
                     "last_updated": datetime.utcnow(),
-                }
+                },
+                # Documents written before raw_payloads embedded the whole response
+                "$unset": {"raw_response": ""},
             },
             upsert=True,
         )
+        try:
+            update_leaderboards_sync(db, player_id, season, team_id, player_name, position, aggregated_stats)
+        except Exception as e:
+            # Stats are stored; the boards catch up on the next upsert or a rebuild
+            print(f"[WARN] Could not update leaderboards for player {player_id}: {e}")
+        bump_stats_version_sync(team_id, season)
         return {
             "success": True,
             "matched": result.matched_count,
@@ -273,7 +434,7 @@ def upsert_player_stats_sync(player_id: int, season: int, stats_payload: Dict[st
         print(f"Error upserting player stats: {e}")
         return {"success": False, "error": str(e)}
 
-async def get_player_stats_from_db(player_id: int, season: Optional[int] = None):
+async def get_player_stats_from_db(player_id: int, season: Optional[int] = None, team_id: Optional[int] = None):
     db = get_database()
     if db is None:
         return {"error": "Database not connected"}
@@ -281,9 +442,12 @@ async def get_player_stats_from_db(player_id: int, season: Optional[int] = None)
     query: Dict[str, Any] = {"player_id": player_id}
     if season is not None:
         query["season"] = season
+    if team_id is not None:
+        query["team_id"] = team_id
 
     collection = db["player_stats"]
-    doc = await collection.find_one(query)
+    # A player traded mid-season has one doc per team; default to the latest
+    doc = await collection.find_one(query, {"raw_response": 0}, sort=[("last_updated", -1)])
     if not doc:
         return None
     if "_id" in doc:
@@ -307,6 +471,7 @@ def upsert_live_stats_sync(game_id: int, player_id: int, player_stat: Dict[str,
             "season": season,
             "player_data": player_stat.get("player", {}),
             "team_data": player_stat.get("team", {}),
+            "team_id": player_stat.get("team", {}).get("id"),
             "groups": player_stat.get("groups", []),  # Array of stat groups
             "last_updated": datetime.utcnow(),
         }
@@ -328,63 +493,159 @@ def upsert_live_stats_sync(game_id: int, player_id: int, player_stat: Dict[str,
         print(f"Error upserting live stats: {e}")
         return {"success": False, "error": str(e)}
 
+@stage("mongo.upsert_game_live_stats_bulk")
+def upsert_game_live_stats_bulk_sync(game_id: int, players: List[Dict[str, Any]], season: int = 2025, version: Optional[int] = None, now: Optional[datetime] = None, raw_payload_id: Optional[str] = None):
+    """Upsert every player's live stats for one game in a single bulk write.
+    Each item has the same shape as upsert_live_stats_sync's player_stat, plus player_id.
+    version is the live update version (see live_state) and is stored with each document.
+    """
+    try:
+        db = get_sync_database()
+        collection = db["live_stats"]
+        now = now or datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"game_id": game_id, "player_id": item["player_id"]},
+                {"$set": {
+                    "game_id": game_id,
+                    "player_id": item["player_id"],
+                    "season": season,
+                    "player_data": item.get("player", {}),
+                    "team_data": item.get("team", {}),
+                    "team_id": item.get("team", {}).get("id"),
+                    "groups": item.get("groups", []),
+                    "version": version,
+                    "raw_payload_id": raw_payload_id,
+                    "last_updated": now,
+                }},
+                upsert=True,
+            )
+            for item in players
+        ]
+        if not ops:
+            return {"success": True, "matched": 0, "modified": 0, "upserted": 0}
+        result = collection.bulk_write(ops, ordered=False)
+        return {
+            "success": True,
+            "matched": result.matched_count,
+            "modified": result.modified_count,
+            "upserted": result.upserted_count,
+        }
+    except Exception as e:
+        print(f"Error bulk upserting live stats for game {game_id}: {e}")
+        return {"success": False, "error": str(e)}
+
 async def get_live_stats_from_db(player_ids: List[int], season: int = 2025):
-    """Get live stats for multiple players from the live_stats collection."""
+    """Newest live_stats document per player, whole (same shape as the in-memory live state)."""
     db = get_database()
     if db is None:
         return {"error": "Database not connected"}
+    if not player_ids:
+        return []
+    pipeline = _newest_live_stats_pipeline(player_ids, season, {"_id": 0})
+    return await db["live_stats"].aggregate(pipeline).to_list(length=None)
 
-    collection = db["live_stats"]
-    
-    # Query for all player IDs in the list
-    query = {
-        "player_id": {"$in": player_ids},
-        "season": season
-    }
-    
-    docs = await collection.find(query).to_list(length=None)
-    
-    # Convert ObjectId to string for JSON serialization
-    for doc in docs:
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-    
-    return docs
+@stage("mongo.upsert_box_score")
+def upsert_box_score_sync(game_id: int, teams: List[Dict[str, Any]], season: int = 2025, version: Optional[int] = None, now: Optional[datetime] = None, raw_payload_id: Optional[str] = None):
+    """Replace a game's team box score (one document per game, keyed by game_id)."""
+    try:
+        db = get_sync_database()
+        db["boxscores"].replace_one(
+            {"_id": game_id},
+            {
+                "game_id": game_id,
+                "season": season,
+                "teams": teams,
+                "version": version,
+                "raw_payload_id": raw_payload_id,
+                "last_updated": now or datetime.utcnow(),
+            },
+            upsert=True,
+        )
+        return {"success": True}
+    except Exception as e:
+        print(f"Error storing box score for game {game_id}: {e}")
+        return {"success": False, "error": str(e)}
+
+async def get_box_score_from_db(game_id: int):
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    return await db["boxscores"].find_one({"_id": game_id}, {"_id": 0})
+
+async def get_box_scores_from_db(seasons: List[int]):
+    """Every stored box score for the given seasons (loads the in-memory live state)."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    return await db["boxscores"].find({"season": {"$in": seasons}}, {"_id": 0}).to_list(length=None)
+
+async def get_latest_live_stats_from_db(seasons: List[int]):
+    """Newest live_stats document per player and season (loads the in-memory live state)."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+
+    pipeline = [
+        {"$match": {"season": {"$in": seasons}}},
+        {"$sort": {"last_updated": -1}},
+        {"$group": {"_id": {"season": "$season", "player_id": "$player_id"}, "doc": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$doc"}},
+    ]
+    return await db["live_stats"].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
 
 # --- Games storage and retrieval ---
 
-def save_games_to_db_sync(games_data: List[Dict[str, Any]], season: int = 2025):
-    """Save Packers games to MongoDB, replacing existing games for the season."""
+@stage("mongo.save_games_to_db")
+def save_games_to_db_sync(games_data: List[Dict[str, Any]], season: int = 2025, team_id: int = PACKERS_TEAM_ID, raw_payload_id: Optional[str] = None):
+    """Save a team's games to MongoDB, replacing existing games for the team and season.
+    raw_payload_id references the archived /games response (see raw_payloads).
+    """
     try:
         db = get_sync_database()
         collection = db["games"]
         
         # Clear existing games for this season and team
-        collection.delete_many({"season": season, "team_id": 15})
+        collection.delete_many({"season": season, "team_id": team_id})
         
         games_with_metadata = []
         for game in games_data:
             game_doc = {
                 **game,
                 "season": season,
-                "team_id": 15,
+                "team_id": team_id,
+                "raw_payload_id": raw_payload_id,
                 "last_updated": datetime.utcnow(),
             }
             games_with_metadata.append(game_doc)
         
         if games_with_metadata:
             result = collection.insert_many(games_with_metadata)
+            try:
+                recompute_current_game_sync(db, team_id, season, games_with_metadata)
+            except Exception as e:
+                # The schedule is stored; the record catches up on the next live run or refresh
+                print(f"[WARN] Could not update current game for team {team_id}: {e}")
             return {
                 "success": True,
                 "inserted_count": len(result.inserted_ids),
                 "season": season,
+                "team_id": team_id,
             }
         return {"success": False, "error": "No games to insert"}
     except Exception as e:
         print(f"Error saving games: {e}")
         return {"success": False, "error": str(e)}
 
-async def get_games_from_db(season: int = 2025, team_id: int = 15):
+async def get_task_runs_from_db(task: str, limit: int = 20):
+    """Most recent runs of a traced task from the capped task_runs collection."""
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    runs = await db["task_runs"].find({"task": task}, {"_id": 0}).sort("$natural", -1).limit(limit).to_list(length=limit)
+    return runs
+
+async def get_games_from_db(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
     """Retrieve games from MongoDB."""
     db = get_database()
     if db is None:
@@ -399,10 +660,16 @@ async def get_games_from_db(season: int = 2025, team_id: int = 15):
     
     return games
 
-def get_next_game_sync(season: int = 2025, team_id: int = 15):
-    """Get the next upcoming or live game for the team (sync)."""
+@stage("mongo.get_next_game")
+def get_next_game_sync(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """Get the next upcoming or live game for the team (sync).
+    Reads the precomputed current_games record; queries the schedule only when it hasn't been built.
+    """
     try:
         db = get_sync_database()
+        record = get_current_game_sync(db, team_id, season)
+        if record is not None:
+            return record.get("next_game")
         collection = db["games"]
         
         # Find games that are not finished, sorted by date
@@ -410,7 +677,7 @@ def get_next_game_sync(season: int = 2025, team_id: int = 15):
             {
                 "season": season,
                 "team_id": team_id,
-                "game.status.short": {"$nin": ["FT", "AOT"]},  # Not finished
+                "game.status.short": {"$nin": list(OVER_STATUSES)},  # Not over
             },
             sort=[("game.date.date", 1), ("game.date.time", 1)]
         )
@@ -418,3 +685,26 @@ def get_next_game_sync(season: int = 2025, team_id: int = 15):
     except Exception as e:
         print(f"Error getting next game: {e}")
         return None
+
+@stage("mongo.has_active_games")
+def has_active_games_sync(season: int = 2025, team_id: Optional[int] = None, today: Optional[str] = None) -> bool:
+    """Cheap DB gate for the live coordinator: any unfinished game scheduled today
+    (Chicago date, as stored) or already marked in progress. Optionally for one team."""
+    try:
+        db = get_sync_database()
+        query: Dict[str, Any] = {
+            "season": season,
+            "game.status.short": {"$nin": list(NOT_ACTIVE_STATUSES)},
+        }
+        if today:
+            query["$or"] = [
+                {"game.date.date": today},
+                {"game.status.short": {"$nin": list(SCHEDULED_STATUSES)}},
+            ]
+        if team_id is not None:
+            query["team_id"] = team_id
+        return db["games"].find_one(query, {"_id": 1}) is not None
+    except Exception as e:
+        print(f"Error checking for active games: {e}")
+        # Don't block live polling on a DB hiccup
+        return True
@@ -0,0 +1,224 @@
+"""
+Derived metrics for a team's season, computed column-wise with NumPy.
+
+A team/season's `player_stats` documents are loaded once into arrays (one column
+per normalized stat), and every derived metric and roster percentile rank is
+computed for all players in one pass:
+
+    passer_rating, completion_pct, yards_per_attempt      passing
+    yards_per_carry                                       rushing
+    catch_rate, yards_per_target, yards_per_reception     receiving
+    field_goal_pct                                        kicking
+    *_per_game                                            season totals / team games played
+
+Games played is the team's finished games (FT/AOT) in `games`; player_stats doesn't
+record per-player appearances. A metric whose denominator is 0 (and a per-game
+average of a stat the player never recorded) is null for that player and left out
+of the ranks. Percentiles are 0-100 within the roster (ties
+share the midpoint).
+
+Each API worker caches the computed table per team and season. upsert_player_stats_sync
+bumps a Redis counter (stats:version:{team_id}:{season}, see
+redis_client.bump_stats_version_sync) on every write, and a
+cached table is rebuilt when the counter moved; without Redis it is rebuilt after
+DERIVED_CACHE_MAX_AGE seconds.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import DERIVED_CACHE_MAX_AGE, DERIVED_CACHE_ENTRIES, PACKERS_TEAM_ID
+from app.services.current_game import FINISHED_STATUSES
+from app.services.redis_client import get_async_redis, stats_version_key
+
+# column -> (stats section, field) in player_stats.stats
+COLUMNS = {
+    "pass_cmp": ("passing", "completions"),
+    "pass_att": ("passing", "attempts"),
+    "pass_yds": ("passing", "yards"),
+    "pass_td": ("passing", "touchdowns"),
+    "pass_int": ("passing", "interceptions"),
+    "rush_att": ("rushing", "carries"),
+    "rush_yds": ("rushing", "yards"),
+    "rush_td": ("rushing", "touchdowns"),
+    "rec": ("receiving", "receptions"),
+    "rec_tgt": ("receiving", "targets"),
+    "rec_yds": ("receiving", "yards"),
+    "rec_td": ("receiving", "touchdowns"),
+    "tackles": ("defense", "tackles"),
+    "sacks": ("defense", "sacks"),
+    "fg_made": ("kicking", "field_goals_made"),
+    "fg_att": ("kicking", "field_goals_attempts"),
+    "points": ("scoring", "points"),
+    "total_td": ("scoring", "touchdowns"),
+}
+# Season totals that get a *_per_game average
+PER_GAME = ("pass_yds", "rush_yds", "rec_yds", "rec", "tackles", "sacks", "points", "total_td")
+PER_GAME_NAMES = {
+    "pass_yds": "passing_yards_per_game",
+    "rush_yds": "rushing_yards_per_game",
+    "rec_yds": "receiving_yards_per_game",
+    "rec": "receptions_per_game",
+    "tackles": "tackles_per_game",
+    "sacks": "sacks_per_game",
+    "points": "points_per_game",
+    "total_td": "touchdowns_per_game",
+}
+# Higher is better for all of them, so a higher percentile is always the better player
+METRICS = (
+    "passer_rating", "completion_pct", "yards_per_attempt",
+    "yards_per_carry",
+    "catch_rate", "yards_per_target", "yards_per_reception",
+    "field_goal_pct",
+) + tuple(PER_GAME_NAMES[c] for c in PER_GAME)
+
+# --- Engine ---
+
+def _ratio(num: np.ndarray, den: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """num / den * scale, NaN where den is 0."""
+    out = np.full(num.shape, np.nan)
+    np.divide(num * scale, den, out=out, where=den > 0)
+    return out
+
+def passer_rating(cmp: np.ndarray, att: np.ndarray, yds: np.ndarray, td: np.ndarray, ints: np.ndarray) -> np.ndarray:
+    """NFL passer rating (0-158.3); NaN without attempts."""
+    components = np.stack([
+        (_ratio(cmp, att) - 0.3) * 5,
+        (_ratio(yds, att) - 3) * 0.25,
+        _ratio(td, att) * 20,
+        2.375 - _ratio(ints, att) * 25,
+    ])
+    return np.clip(components, 0, 2.375).sum(axis=0) / 6 * 100
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Percentile (0-100) of each value among the non-NaN values; NaN stays NaN."""
+    ranks = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return ranks
+    ordered = np.sort(values[valid])
+    below = np.searchsorted(ordered, values[valid], side="left")
+    at_or_below = np.searchsorted(ordered, values[valid], side="right")
+    ranks[valid] = (below + at_or_below) / 2 / len(ordered) * 100
+    return ranks
+
+def compute_metrics(columns: Dict[str, np.ndarray], games_played: int) -> Dict[str, np.ndarray]:
+    c = columns
+    metrics = {
+        "passer_rating": passer_rating(c["pass_cmp"], c["pass_att"], c["pass_yds"], c["pass_td"], c["pass_int"]),
+        "completion_pct": _ratio(c["pass_cmp"], c["pass_att"], 100),
+        "yards_per_attempt": _ratio(c["pass_yds"], c["pass_att"]),
+        "yards_per_carry": _ratio(c["rush_yds"], c["rush_att"]),
+        "catch_rate": _ratio(c["rec"], c["rec_tgt"], 100),
+        "yards_per_target": _ratio(c["rec_yds"], c["rec_tgt"]),
+        "yards_per_reception": _ratio(c["rec_yds"], c["rec"]),
+        "field_goal_pct": _ratio(c["fg_made"], c["fg_att"], 100),
+    }
+    games = np.full(len(c["pass_att"]), float(games_played))
+    for column in PER_GAME:
+        # Only players who recorded the stat; zeros would crowd the bottom of every rank
+        metrics[PER_GAME_NAMES[column]] = _ratio(c[column], np.where(c[column] != 0, games, 0))
+    return metrics
+
+class DerivedTable:
+    """Derived metrics and roster percentiles for every player of one team and season."""
+
+    def __init__(self, docs: List[Dict[str, Any]], games_played: int, version: Optional[int] = None, positions: Optional[Dict[int, str]] = None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.games_played = games_played
+        positions = positions or {}
+        self.players = [
+            {"player_id": d["player_id"], "player_name": d.get("player_name", ""), "position": d.get("position") or positions.get(d["player_id"], "")}
+            for d in docs
+        ]
+        self._row = {p["player_id"]: i for i, p in enumerate(self.players)}
+        columns = {
+            name: np.array([float(((d.get("stats") or {}).get(section) or {}).get(field) or 0) for d in docs])
+            for name, (section, field) in COLUMNS.items()
+        }
+        self.metrics = compute_metrics(columns, games_played)
+        self.percentiles = {name: percentile_ranks(values) for name, values in self.metrics.items()}
+
+    def __len__(self):
+        return len(self.players)
+
+    @staticmethod
+    def _value(x: float, digits: int = 1) -> Optional[float]:
+        return None if np.isnan(x) else round(float(x), digits)
+
+    def row(self, player_id: int) -> Optional[Dict[str, Any]]:
+        i = self._row.get(player_id)
+        if i is None:
+            return None
+        return {
+            **self.players[i],
+            "games_played": self.games_played,
+            "derived": {name: self._value(values[i], 2) for name, values in self.metrics.items()},
+            "percentiles": {name: self._value(values[i]) for name, values in self.percentiles.items()},
+        }
+
+    def compare(self, sort: str, position: Optional[str] = None, limit: int = 25) -> List[Dict[str, Any]]:
+        """Players with a value for `sort`, best first (optionally one position)."""
+        values = self.metrics[sort]
+        order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")
+        rows = []
+        for i in order:
+            if np.isnan(values[i]):
+                break
+            if position and self.players[i]["position"] != position:
+                continue
+            rows.append(self.row(self.players[i]["player_id"]))
+            if len(rows) >= limit:
+                break
+        return rows
+
+# --- Cache (FastAPI process) ---
+
+_tables: "OrderedDict[Tuple[int, int], DerivedTable]" = OrderedDict()
+
+async def _stats_version(team_id: int, season: int) -> Tuple[bool, Optional[int]]:
+    """(redis_ok, version) for the team/season."""
+    client = get_async_redis()
+    if client is None:
+        return False, None
+    try:
+        value = await client.get(stats_version_key(team_id, season))
+    except Exception:
+        return False, None
+    return True, int(value) if value is not None else 0
+
+async def get_derived_table(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """The cached table, rebuilt when the stats version changed (or, without Redis, after DERIVED_CACHE_MAX_AGE)."""
+    key = (team_id, season)
+    redis_ok, version = await _stats_version(team_id, season)
+    table = _tables.get(key)
+    if table is not None:
+        fresh = table.version == version if redis_ok else time.monotonic() - table.built_at < DERIVED_CACHE_MAX_AGE
+        if fresh:
+            _tables.move_to_end(key)
+            return table
+
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    docs = await db["player_stats"].find(
+        {"team_id": team_id, "season": season},
+        {"_id": 0, "player_id": 1, "player_name": 1, "position": 1, "stats": 1},
+    ).to_list(length=None)
+    games_played = await db["games"].count_documents({
+        "team_id": team_id,
+        "season": season,
+        "game.status.short": {"$in": list(FINISHED_STATUSES)},
+    })
+    # The stats endpoint often leaves position empty; the roster has it
+    roster = await db["players"].find({"team_id": team_id, "season": season}, {"_id": 0, "id": 1, "position": 1}).to_list(length=None)
+    positions = {p["id"]: p.get("position") or "" for p in roster if p.get("id") is not None}
+    table = DerivedTable(docs, games_played, version=version, positions=positions)
+    _tables[key] = table
+    while len(_tables) > DERIVED_CACHE_ENTRIES:
+        _tables.popitem(last=False)
+    return table
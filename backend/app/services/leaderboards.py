@@ -0,0 +1,189 @@
+"""
+Materialized team stat leaderboards.
+
+One `leaderboards` document per team, season and category holds every player with a
+non-zero value, sorted best first:
+
+    {_id: "15:2025:rushing_yards", team_id, season, category, stat: "rushing.yards",
+     leaders: [{player_id, player_name, position, value}, ...], last_updated}
+
+upsert_player_stats_sync keeps them current by replacing the player's entry in each
+board ($pull, then $push with $sort), so GET /packers/leaders reads one document and
+slices the top N. rebuild_leaderboards_sync recomputes boards from player_stats and
+check_leaderboards_sync compares them against an aggregation over player_stats:
+
+    python -m app.services.leaderboards check --season 2025 --team-id 15
+    python -m app.services.leaderboards rebuild --season 2025
+"""
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne, ReplaceOne
+
+from app.config import PACKERS_TEAM_ID
+
+# category -> (stats section, field) in player_stats.stats
+LEADERBOARD_CATEGORIES = {
+    "passing_yards": ("passing", "yards"),
+    "passing_touchdowns": ("passing", "touchdowns"),
+    "rushing_yards": ("rushing", "yards"),
+    "rushing_touchdowns": ("rushing", "touchdowns"),
+    "receiving_yards": ("receiving", "yards"),
+    "receptions": ("receiving", "receptions"),
+    "receiving_touchdowns": ("receiving", "touchdowns"),
+    "tackles": ("defense", "tackles"),
+    "sacks": ("defense", "sacks"),
+    "interceptions": ("defense", "interceptions"),
+    "forced_fumbles": ("defense", "forced_fumbles"),
+    "field_goals_made": ("kicking", "field_goals_made"),
+    "points": ("scoring", "points"),
+}
+LEADER_SORT = {"value": -1, "player_id": 1}
+
+def board_id(team_id: int, season: int, category: str) -> str:
+    return f"{team_id}:{season}:{category}"
+
+def _value(stats: Dict[str, Any], category: str):
+    section, field = LEADERBOARD_CATEGORIES[category]
+    return (stats.get(section) or {}).get(field) or 0
+
+def _entry(player_id: int, player_name: str, position: str, value) -> Dict[str, Any]:
+    return {"player_id": player_id, "player_name": player_name, "position": position, "value": value}
+
+def leaderboard_ops(player_id: int, season: int, team_id: int, player_name: str, position: str, stats: Dict[str, Any]) -> List[UpdateOne]:
+    """Bulk ops that move one player's entry in every category board to its new value."""
+    now = datetime.utcnow()
+    ops = []
+    for category in LEADERBOARD_CATEGORIES:
+        _id = board_id(team_id, season, category)
+        ops.append(UpdateOne({"_id": _id}, {"$pull": {"leaders": {"player_id": player_id}}}))
+        value = _value(stats, category)
+        if value:
+            section, field = LEADERBOARD_CATEGORIES[category]
+            ops.append(UpdateOne(
+                {"_id": _id},
+                {
+                    "$push": {"leaders": {"$each": [_entry(player_id, player_name, position, value)], "$sort": LEADER_SORT}},
+                    "$set": {"last_updated": now},
+                    "$setOnInsert": {"team_id": team_id, "season": season, "category": category, "stat": f"{section}.{field}"},
+                },
+                upsert=True,
+            ))
+    return ops
+
+def update_leaderboards_sync(db, player_id: int, season: int, team_id: int, player_name: str, position: str, stats: Dict[str, Any]):
+    """Apply one player's new season stats to the team's boards (ordered: pull before push)."""
+    db["leaderboards"].bulk_write(leaderboard_ops(player_id, season, team_id, player_name, position, stats), ordered=True)
+
+def _team_seasons(db, season: Optional[int], team_id: Optional[int]) -> List[Dict[str, int]]:
+    match: Dict[str, Any] = {"team_id": {"$ne": None}}
+    if season is not None:
+        match["season"] = season
+    if team_id is not None:
+        match["team_id"] = team_id
+    pairs = db["player_stats"].aggregate([
+        {"$match": match},
+        {"$group": {"_id": {"team_id": "$team_id", "season": "$season"}}},
+    ])
+    return [p["_id"] for p in pairs]
+
+def rebuild_leaderboards_sync(db, season: Optional[int] = None, team_id: Optional[int] = None) -> Dict[str, Any]:
+    """Recompute every board for the matching teams/seasons from player_stats."""
+    now = datetime.utcnow()
+    rebuilt = 0
+    for pair in _team_seasons(db, season, team_id):
+        docs = list(db["player_stats"].find(
+            {"team_id": pair["team_id"], "season": pair["season"]},
+            {"player_id": 1, "player_name": 1, "position": 1, "stats": 1},
+        ))
+        ops = []
+        for category, (section, field) in LEADERBOARD_CATEGORIES.items():
+            leaders = [
+                _entry(d["player_id"], d.get("player_name", ""), d.get("position", ""), _value(d.get("stats") or {}, category))
+                for d in docs
+            ]
+            leaders = sorted((e for e in leaders if e["value"]), key=lambda e: (-e["value"], e["player_id"]))
+            _id = board_id(pair["team_id"], pair["season"], category)
+            ops.append(ReplaceOne({"_id": _id}, {
+                "team_id": pair["team_id"],
+                "season": pair["season"],
+                "category": category,
+                "stat": f"{section}.{field}",
+                "leaders": leaders,
+                "last_updated": now,
+            }, upsert=True))
+        db["leaderboards"].bulk_write(ops, ordered=False)
+        rebuilt += len(ops)
+    return {"success": True, "boards_rebuilt": rebuilt}
+
+def check_leaderboards_sync(db, season: Optional[int] = None, team_id: Optional[int] = None, limit: int = 10) -> Dict[str, Any]:
+    """Compare each board's top `limit` with the same ranking aggregated from player_stats."""
+    checked, mismatches = 0, []
+    for pair in _team_seasons(db, season, team_id):
+        for category, (section, field) in LEADERBOARD_CATEGORIES.items():
+            path = f"stats.{section}.{field}"
+            expected = [
+                (d["player_id"], d["value"])
+                for d in db["player_stats"].aggregate([
+                    {"$match": {"team_id": pair["team_id"], "season": pair["season"], path: {"$gt": 0}}},
+                    {"$sort": {path: -1, "player_id": 1}},
+                    {"$limit": limit},
+                    {"$project": {"_id": 0, "player_id": 1, "value": f"${path}"}},
+                ])
+            ]
+            board = db["leaderboards"].find_one(
+                {"_id": board_id(pair["team_id"], pair["season"], category)},
+                {"leaders": {"$slice": limit}},
+            ) or {}
+            actual = [(e["player_id"], e["value"]) for e in board.get("leaders", [])]
+            checked += 1
+            if actual != expected:
+                mismatches.append({
+                    "team_id": pair["team_id"],
+                    "season": pair["season"],
+                    "category": category,
+                    "expected": expected,
+                    "actual": actual,
+                })
+    return {"consistent": not mismatches, "boards_checked": checked, "mismatches": mismatches}
+
+async def get_leaders_from_db(category: str, season: int = 2025, team_id: int = PACKERS_TEAM_ID, limit: int = 10):
+    """Top `limit` players of one board (a single document read)."""
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    if category not in LEADERBOARD_CATEGORIES:
+        return {"error": f"Unknown category '{category}'", "categories": list(LEADERBOARD_CATEGORIES)}
+
+    doc = await db["leaderboards"].find_one(
+        {"_id": board_id(team_id, season, category)},
+        {"leaders": {"$slice": limit}, "stat": 1, "last_updated": 1},
+    )
+    if not doc:
+        return None
+    doc.pop("_id", None)
+    return doc
+
+def main():
+    from app.services.db_service import get_sync_database
+    parser = argparse.ArgumentParser(description="Rebuild or check the materialized leaderboards")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--season", type=int, default=None, help="default: every season in player_stats")
+    parser.add_argument("--team-id", type=int, default=None, help="default: every team")
+    parser.add_argument("--limit", type=int, default=10, help="leaders compared per board (check)")
+    args = parser.parse_args()
+
+    db = get_sync_database()
+    if args.command == "rebuild":
+        print(rebuild_leaderboards_sync(db, season=args.season, team_id=args.team_id))
+        return
+    report = check_leaderboards_sync(db, season=args.season, team_id=args.team_id, limit=args.limit)
+    for m in report["mismatches"]:
+        print(f"MISMATCH team {m['team_id']} season {m['season']} {m['category']}: expected {m['expected']}, board has {m['actual']}")
+    print(f"{report['boards_checked']} boards checked, {len(report['mismatches'])} inconsistent")
+    raise SystemExit(0 if report["consistent"] else 1)
+
+if __name__ == "__main__":
+    main()
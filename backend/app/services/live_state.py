@@ -0,0 +1,197 @@
+"""
+In-process read model for live game stats (one per uvicorn worker).
+
+Each live poll bumps a Redis counter (live:version), writes that version into the
+live_stats documents it upserts and publishes the same players on LIVE_STATE_CHANNEL.
+API workers subscribe on startup, load the newest live_stats document per player for
+LIVE_STATE_SEASONS from Mongo, and apply every published update with a newer version.
+POST /packers/live-stats and GET /packers/games/{id}/boxscore then answer from memory.
+
+The store only serves while its subscription is up; without Redis, before the first
+load, after a disconnect (until it has resubscribed and reloaded) or for other
+seasons, the endpoint reads live_stats from Mongo as before.
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis import asyncio as aioredis
+
+from app.config import REDIS_URL, LIVE_STATE_CHANNEL, LIVE_STATE_SEASONS
+from app.services.redis_client import get_sync_redis
+
+VERSION_KEY = "live:version"
+MAX_RECONNECT_DELAY = 30
+
+# --- Publishing (Celery live tasks) ---
+
+def next_live_version_sync() -> Optional[int]:
+    """Next live update version, or None when Redis isn't available."""
+    client = get_sync_redis()
+    if client is None:
+        return None
+    try:
+        return int(client.incr(VERSION_KEY))
+    except Exception as e:
+        print(f"[WARN] Could not get live update version: {e}")
+        return None
+
+def publish_live_update_sync(game_id: int, season: int, version: Optional[int], players: List[Dict[str, Any]], last_updated: datetime, box_score: Optional[List[Dict[str, Any]]] = None):
+    """Announce one game's freshly upserted players (and team box score) to the API workers (best effort)."""
+    client = get_sync_redis()
+    if client is None or version is None:
+        return
+    event = {
+        "game_id": game_id,
+        "season": season,
+        "version": version,
+        "last_updated": last_updated.isoformat(),
+        "players": players,
+        "box_score": box_score,
+    }
+    try:
+        client.publish(LIVE_STATE_CHANNEL, json.dumps(event, default=str))
+    except Exception as e:
+        print(f"[WARN] Could not publish live update for game {game_id}: {e}")
+
+# --- Store (FastAPI process) ---
+
+class LiveStateStore:
+    """
+    Newest live_stats document per (season, player_id) and box score per game,
+    each with the version that wrote it.
+    """
+
+    def __init__(self, seasons):
+        self.seasons = set(seasons)
+        self.synced = False
+        self._players: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._box_scores: Dict[int, Dict[str, Any]] = {}
+
+    def apply(self, doc: Dict[str, Any]) -> bool:
+        """Keep `doc` unless the stored document for that player is newer."""
+        key = (doc["season"], doc["player_id"])
+        current = self._players.get(key)
+        if current is not None and (current.get("version") or 0) > (doc.get("version") or 0):
+            return False
+        self._players[key] = doc
+        return True
+
+    def apply_box_score(self, doc: Dict[str, Any]) -> bool:
+        current = self._box_scores.get(doc["game_id"])
+        if current is not None and (current.get("version") or 0) > (doc.get("version") or 0):
+            return False
+        self._box_scores[doc["game_id"]] = doc
+        return True
+
+    def apply_event(self, event: Dict[str, Any]) -> int:
+        """Apply a published live update; returns how many players changed."""
+        if event.get("season") not in self.seasons:
+            return 0
+        last_updated = datetime.fromisoformat(event["last_updated"])
+        if event.get("box_score") is not None:
+            self.apply_box_score({
+                "game_id": event["game_id"],
+                "season": event["season"],
+                "teams": event["box_score"],
+                "version": event["version"],
+                "last_updated": last_updated,
+            })
+        applied = 0
+        for item in event.get("players", []):
+            team = item.get("team") or {}
+            applied += self.apply({
+                "game_id": event["game_id"],
+                "player_id": item["player_id"],
+                "season": event["season"],
+                "player_data": item.get("player", {}),
+                "team_data": team,
+                "team_id": team.get("id"),
+                "groups": item.get("groups", []),
+                "version": event["version"],
+                "last_updated": last_updated,
+            })
+        return applied
+
+    def load(self, docs: List[Dict[str, Any]], box_scores: List[Dict[str, Any]] = ()):
+        for doc in docs:
+            doc.pop("_id", None)
+            self.apply(doc)
+        for doc in box_scores:
+            self.apply_box_score(doc)
+
+    def serves(self, season: int) -> bool:
+        return self.synced and season in self.seasons
+
+    def get(self, player_ids: List[int], season: int) -> List[Dict[str, Any]]:
+        return [self._players[(season, pid)] for pid in player_ids if (season, pid) in self._players]
+
+    def box_score(self, game_id: int) -> Optional[Dict[str, Any]]:
+        """The game's box score, or None when not synced or not held (read Mongo instead)."""
+        return self._box_scores.get(game_id) if self.synced else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"synced": self.synced, "seasons": sorted(self.seasons), "players": len(self._players), "box_scores": len(self._box_scores)}
+
+live_state = LiveStateStore(LIVE_STATE_SEASONS)
+_listener: Optional[asyncio.Task] = None
+
+async def _listen(store: LiveStateStore):
+    from app.services.db_service import get_latest_live_stats_from_db, get_box_scores_from_db
+    delay = 1
+    while True:
+        # Own connection without the shared client's 1s socket timeout: a quiet channel
+        # between games would otherwise look like a dead connection
+        client = aioredis.from_url(REDIS_URL, socket_connect_timeout=1, health_check_interval=30)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(LIVE_STATE_CHANNEL)
+            # Load after subscribing so no update published in between is missed;
+            # versions make the order of the two irrelevant
+            docs = await get_latest_live_stats_from_db(sorted(store.seasons))
+            box_scores = await get_box_scores_from_db(sorted(store.seasons))
+            for loaded in (docs, box_scores):
+                if isinstance(loaded, dict):
+                    raise RuntimeError(loaded.get("error"))
+            store.load(docs, box_scores)
+            store.synced = True
+            delay = 1
+            print(f"[LIVE] Live state loaded ({len(docs)} players, {len(box_scores)} box scores), listening on {LIVE_STATE_CHANNEL}")
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    store.apply_event(json.loads(message["data"]))
+                except Exception as e:
+                    print(f"[WARN] Ignoring malformed live update: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WARN] Live state subscription lost ({e}), serving live stats from MongoDB")
+        finally:
+            store.synced = False
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+def start_live_state():
+    """Start this worker's subscription (no-op without Redis)."""
+    global _listener
+    if not REDIS_URL or _listener is not None:
+        return
+    _listener = asyncio.get_running_loop().create_task(_listen(live_state))
+
+async def stop_live_state():
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
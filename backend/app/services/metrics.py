@@ -0,0 +1,163 @@
+"""
+Prometheus metrics for the API process and Celery workers.
+
+FastAPI serves them at GET /metrics; Celery workers start their own exporter on
+CELERY_METRICS_PORT. Tasks run in the prefork pool's child processes while the
+exporter runs in the worker's main process, so the worker profiles (README,
+start-dev.sh) set PROMETHEUS_MULTIPROC_DIR to a directory per worker: children write
+their samples there, the exporter aggregates them with a MultiProcessCollector, and
+a child's files are marked dead when the pool replaces it. Several uvicorn workers
+need the same setting to share one scrape.
+"""
+import glob
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client import REGISTRY, multiprocess
+from pymongo import monitoring
+
+# Latency buckets (seconds): sub-millisecond Mongo ops up to slow upstream calls
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0, 1800.0)
+LAG_BUCKETS = (5.0, 10.0, 15.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0, 600.0)
+
+API_LATENCY = Histogram(
+    "api_sports_request_seconds",
+    "Upstream API Sports request latency",
+    ["endpoint", "status"],
+    buckets=SLOW_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "celery_task_seconds",
+    "Celery task run time",
+    ["task", "outcome"],
+    buckets=SLOW_BUCKETS,
+)
+MONGO_LATENCY = Histogram(
+    "mongo_operation_seconds",
+    "MongoDB command latency",
+    ["collection", "op"],
+    buckets=FAST_BUCKETS,
+)
+LIVE_POLL_LAG = Histogram(
+    "live_poll_lag_seconds",
+    "Age of a live game's stored stats when a poll replaces them",
+    buckets=LAG_BUCKETS,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_seconds",
+    "FastAPI request latency per route",
+    ["method", "route", "status"],
+    buckets=FAST_BUCKETS + (10.0, 30.0),
+)
+
+# --- Upstream API ---
+
+def observe_api_call(endpoint: str, status, seconds: float):
+    """status is the HTTP status code, or a short reason ("timeout", "error") when there was no response."""
+    API_LATENCY.labels(endpoint=endpoint, status=str(status)).observe(seconds)
+
+# --- MongoDB (pymongo command monitoring; covers Motor and the sync client) ---
+
+# Commands whose first value isn't a collection name
+_NO_COLLECTION = {"getMore": "collection", "killCursors": None}
+# Driver housekeeping that would only add noise
+_IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every Mongo command by collection and operation name."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        field = _NO_COLLECTION.get(event.command_name, event.command_name)
+        collection = event.command.get(field) if field else None
+        if not isinstance(collection, str):
+            collection = "unknown"
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def _finish(self, event):
+        with self._lock:
+            labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGO_LATENCY.labels(collection=labels[0], op=labels[1]).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+mongo_command_listener = MongoCommandMetrics()
+
+# --- Live polling ---
+
+def observe_live_poll_lag(seconds: float):
+    LIVE_POLL_LAG.observe(max(0.0, seconds))
+
+# --- Celery tasks ---
+
+_task_started: Dict[str, float] = {}
+
+def task_started(task_id: str):
+    _task_started[task_id] = time.perf_counter()
+
+def task_finished(task_id: str, task_name: str, state: Optional[str], retval=None):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    outcome = (state or "unknown").lower()
+    # Tasks report handled failures as {"success": False, ...} rather than raising
+    if outcome == "success" and isinstance(retval, dict) and retval.get("success") is False:
+        outcome = "error"
+    TASK_DURATION.labels(task=task_name, outcome=outcome).observe(time.perf_counter() - started)
+
+# --- Exposition ---
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body and content type for a /metrics response."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+def _clear_multiprocess_dir(path: str):
+    """Drop sample files left by an earlier run (their processes are gone)."""
+    os.makedirs(path, exist_ok=True)
+    own = f"_{os.getpid()}.db"
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        if not stale.endswith(own):
+            os.remove(stale)
+
+def start_exporter(port: int):
+    """Serve /metrics on `port` from a background thread (Celery worker main process, before the pool forks)."""
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        _clear_multiprocess_dir(path)
+    else:
+        print("[METRICS] PROMETHEUS_MULTIPROC_DIR is not set; task and Mongo metrics from prefork children won't be exported")
+    start_http_server(port, registry=_registry())
+    print(f"[METRICS] Exporter listening on :{port}")
+
+def mark_process_dead(pid: int):
+    """Clean up after a pool child that exited (no-op outside multiprocess mode)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,221 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import redis
+
+from app.services.redis_client import get_sync_redis, get_async_redis
+from app.config import API_RATE_LIMIT_PER_MINUTE, API_DAILY_RESERVE
+
+BUCKET_KEY = "apiquota:bucket"
+
+# --- Priority lanes ---
+# A lane may only take a token while the bucket stays above its reserve (fraction of
+# per-minute capacity), so lower lanes back off first and live polling is the last
+# thing to be throttled. Lanes other than live are shed outright once the daily
+# quota drops to API_DAILY_RESERVE. max_wait is how long a caller queues before
+# its request is shed.
+LANE_LIVE = "live"
+LANE_POSTGAME = "postgame"
+LANE_SCHEDULE = "schedule"      # roster + season schedule refreshes
+LANE_FALLBACK = "fallback"      # user-triggered API fallbacks from the web app
+LANE_BACKFILL = "backfill"      # historical backfill; takes whatever is left over
+
+LANES: Dict[str, Dict[str, float]] = {
+    LANE_LIVE: {"reserve": 0.0, "max_wait": 10.0},
+    LANE_POSTGAME: {"reserve": 0.15, "max_wait": 120.0},
+    LANE_SCHEDULE: {"reserve": 0.30, "max_wait": 300.0},
+    LANE_FALLBACK: {"reserve": 0.50, "max_wait": 2.0},
+    LANE_BACKFILL: {"reserve": 0.60, "max_wait": 600.0},
+}
+
+# Lets a caller (e.g. a backfill chunk) run existing fetch code in another lane
+# without threading a lane argument through every helper.
+_lane_override: ContextVar[Optional[str]] = ContextVar("quota_lane_override", default=None)
+
+@contextmanager
+def use_lane(lane: str):
+    """Spend quota from `lane` for every API call made inside this block."""
+    token = _lane_override.set(lane)
+    try:
+        yield
+    finally:
+        _lane_override.reset(token)
+
+def effective_lane(lane: str) -> str:
+    return _lane_override.get() or lane
+
+# Token bucket refilled continuously at capacity/60 tokens per second. Uses Redis
+# server time so every worker agrees on the clock.
+_REFILL = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'capacity', 'blocked_until', 'daily_remaining')
+local capacity = tonumber(b[3]) or tonumber(ARGV[1])
+local tokens = tonumber(b[1]) or capacity
+local ts = tonumber(b[2]) or now
+local blocked_until = tonumber(b[4]) or 0
+local daily_remaining = tonumber(b[5])
+local rate = capacity / 60.0
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+"""
+
+# ARGV: default_capacity, reserve_fraction, daily_reserve
+# Returns {granted, wait_seconds}; wait of -1 means shed (daily quota reserved).
+_ACQUIRE_SCRIPT = _REFILL + """
+local reserve = capacity * tonumber(ARGV[2])
+local result
+if daily_remaining and daily_remaining <= tonumber(ARGV[3]) then
+  result = {0, '-1'}
+elseif now < blocked_until then
+  result = {0, tostring(blocked_until - now)}
+elseif tokens - 1 >= reserve then
+  tokens = tokens - 1
+  if daily_remaining then
+    redis.call('HSET', KEYS[1], 'daily_remaining', daily_remaining - 1)
+  end
+  result = {1, '0'}
+else
+  result = {0, tostring((reserve + 1 - tokens) / rate)}
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 86400)
+return result
+"""
+
+# ARGV: default_capacity, per_minute_limit, per_minute_remaining, daily_remaining, blocked_seconds
+# Empty-string arguments are ignored.
+_CALIBRATE_SCRIPT = _REFILL + """
+if ARGV[2] ~= '' then
+  local limit = tonumber(ARGV[2])
+  if limit and limit > 0 then
+    capacity = limit
+    tokens = math.min(tokens, capacity)
+    redis.call('HSET', KEYS[1], 'capacity', capacity)
+  end
+end
+if ARGV[3] ~= '' then
+  tokens = math.min(tokens, tonumber(ARGV[3]))
+end
+if ARGV[4] ~= '' then
+  redis.call('HSET', KEYS[1], 'daily_remaining', tonumber(ARGV[4]))
+end
+if ARGV[5] ~= '' and tonumber(ARGV[5]) > 0 then
+  tokens = 0
+  redis.call('HSET', KEYS[1], 'blocked_until', now + tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 86400)
+return 1
+"""
+
+def _lane_args(lane: str):
+    config = LANES[lane]
+    daily_reserve = 0 if lane == LANE_LIVE else API_DAILY_RESERVE
+    return (API_RATE_LIMIT_PER_MINUTE, config["reserve"], daily_reserve)
+
+def _parse_headers(status: int, headers: Mapping[str, str]) -> Tuple[str, str, str, str]:
+    """Pull API Sports rate-limit headers into calibrate-script arguments."""
+    def _h(name: str) -> str:
+        value = headers.get(name)
+        return str(int(value)) if value is not None and str(value).strip().lstrip("-").isdigit() else ""
+
+    blocked = ""
+    if status == 429:
+        retry_after = _h("Retry-After")
+        blocked = retry_after if retry_after and int(retry_after) > 0 else "60"
+    return (
+        _h("X-RateLimit-Limit"),
+        _h("X-RateLimit-Remaining"),
+        _h("x-ratelimit-requests-remaining"),
+        blocked,
+    )
+
+# --- Sync path (Celery tasks) ---
+
+def acquire_sync(lane: str) -> bool:
+    """
+    Block until the lane may spend one API request. Returns False if the request
+    should be shed instead. Fails open when Redis is unreachable.
+    """
+    lane = effective_lane(lane)
+    client = get_sync_redis()
+    if client is None:
+        return True
+    deadline = time.monotonic() + LANES[lane]["max_wait"]
+    while True:
+        try:
+            granted, wait = client.eval(_ACQUIRE_SCRIPT, 1, BUCKET_KEY, *_lane_args(lane))
+        except redis.RedisError as e:
+            print(f"[QUOTA] Redis unavailable, not throttling: {e}")
+            return True
+        if int(granted):
+            return True
+        wait = float(wait)
+        if wait < 0 or time.monotonic() + wait > deadline:
+            print(f"[QUOTA] Shedding {lane} request (wait {wait:.1f}s)")
+            return False
+        time.sleep(max(wait, 0.05))
+
+def record_response_sync(status: int, headers: Mapping[str, str]):
+    """Calibrate the shared bucket from an API Sports response's rate-limit headers."""
+    client = get_sync_redis()
+    if client is None:
+        return
+    try:
+        client.eval(_CALIBRATE_SCRIPT, 1, BUCKET_KEY, API_RATE_LIMIT_PER_MINUTE, *_parse_headers(status, headers))
+    except redis.RedisError as e:
+        print(f"[QUOTA] Failed to calibrate from headers: {e}")
+
+# --- Async path (FastAPI) ---
+
+async def acquire(lane: str) -> bool:
+    """Async counterpart of acquire_sync."""
+    lane = effective_lane(lane)
+    client = get_async_redis()
+    if client is None:
+        return True
+    deadline = time.monotonic() + LANES[lane]["max_wait"]
+    while True:
+        try:
+            granted, wait = await client.eval(_ACQUIRE_SCRIPT, 1, BUCKET_KEY, *_lane_args(lane))
+        except redis.RedisError as e:
+            print(f"[QUOTA] Redis unavailable, not throttling: {e}")
+            return True
+        if int(granted):
+            return True
+        wait = float(wait)
+        if wait < 0 or time.monotonic() + wait > deadline:
+            print(f"[QUOTA] Shedding {lane} request (wait {wait:.1f}s)")
+            return False
+        await asyncio.sleep(max(wait, 0.05))
+
+async def record_response(status: int, headers: Mapping[str, str]):
+    client = get_async_redis()
+    if client is None:
+        return
+    try:
+        await client.eval(_CALIBRATE_SCRIPT, 1, BUCKET_KEY, API_RATE_LIMIT_PER_MINUTE, *_parse_headers(status, headers))
+    except redis.RedisError as e:
+        print(f"[QUOTA] Failed to calibrate from headers: {e}")
+
+async def get_quota_state() -> Dict[str, Any]:
+    """Current bucket state as last written (tokens are not refilled for display)."""
+    client = get_async_redis()
+    if client is None:
+        return {"enabled": False}
+    try:
+        raw = await client.hgetall(BUCKET_KEY)
+    except redis.RedisError as e:
+        return {"enabled": True, "error": str(e)}
+    state = {k.decode(): float(v) for k, v in raw.items()}
+    return {
+        "enabled": True,
+        "capacity_per_minute": state.get("capacity", API_RATE_LIMIT_PER_MINUTE),
+        "tokens": state.get("tokens"),
+        "daily_remaining": state.get("daily_remaining"),
+        "blocked_until": state.get("blocked_until"),
+        "lanes": LANES,
+    }
@@ -0,0 +1,101 @@
+"""
+Compressed archive of raw API Sports responses.
+
+Every successful upstream fetch made by the Celery tasks is stored once in the
+`raw_payloads` collection, compressed (zstd when the `zstandard` package is
+installed, gzip otherwise) and keyed by endpoint, params and fetch time. The
+response handed back to the task carries the new document's ID as
+"raw_payload_id", and the hot documents built from it (players, games,
+player_stats, live_stats, boxscores) keep that reference instead of a copy of
+the payload. Cached responses carry the ID of the fetch that filled the cache.
+
+GET /packers/raw/{payload_id} returns an archived payload decompressed, so any
+stored document can be traced back to, or rebuilt from, what the API returned.
+"""
+import gzip
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import Binary, ObjectId
+from bson.errors import InvalidId
+
+from app.config import RAW_PAYLOADS_ENABLED
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+CODEC = "zstd" if zstandard is not None else "gzip"
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+def compress(data: bytes, codec: str = CODEC) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed; cannot read zstd payloads")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def _encode_doc(endpoint: str, params: Optional[Dict[str, Any]], payload: Any) -> Dict[str, Any]:
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    compressed = compress(raw)
+    return {
+        "endpoint": endpoint,
+        "params": {k: str(v) for k, v in (params or {}).items()},
+        "fetched_at": datetime.utcnow(),
+        "codec": CODEC,
+        "size": len(raw),
+        "compressed_size": len(compressed),
+        "data": Binary(compressed),
+    }
+
+def _decode_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "payload_id": str(doc["_id"]),
+        "endpoint": doc["endpoint"],
+        "params": doc.get("params", {}),
+        "fetched_at": doc["fetched_at"],
+        "size": doc.get("size"),
+        "compressed_size": doc.get("compressed_size"),
+        "payload": json.loads(decompress(bytes(doc["data"]), doc.get("codec", "gzip"))),
+    }
+
+def archive_raw_payload_sync(endpoint: str, params: Optional[Dict[str, Any]], payload: Any) -> Optional[str]:
+    """Store one upstream response; returns its ID, or None when disabled or the write failed."""
+    if not RAW_PAYLOADS_ENABLED:
+        return None
+    from app.services.db_service import get_sync_database
+    try:
+        result = get_sync_database()["raw_payloads"].insert_one(_encode_doc(endpoint, params, payload))
+        return str(result.inserted_id)
+    except Exception as e:
+        # The hot path keeps going; the documents just won't have a raw_payload_id
+        print(f"[WARN] Could not archive raw payload for {endpoint}: {e}")
+        return None
+
+def load_raw_payload_sync(payload_id: str) -> Optional[Dict[str, Any]]:
+    """Archived response with metadata (for replays from a task or shell)."""
+    from app.services.db_service import get_sync_database
+    try:
+        doc = get_sync_database()["raw_payloads"].find_one({"_id": ObjectId(payload_id)})
+    except InvalidId:
+        return None
+    return _decode_doc(doc) if doc else None
+
+async def get_raw_payload(payload_id: str):
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    try:
+        doc = await db["raw_payloads"].find_one({"_id": ObjectId(payload_id)})
+    except InvalidId:
+        return {"error": f"Invalid payload ID '{payload_id}'"}
+    return _decode_doc(doc) if doc else None
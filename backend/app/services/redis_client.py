@@ -0,0 +1,53 @@
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+
+from app.config import REDIS_URL
+
+# Shared, lazily created Redis clients for the cache, quota governor, circuit breaker
+# and live-game coordination. Short timeouts: callers treat Redis as best-effort and
+# fall back (fail open) when it's unreachable.
+_sync_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+def get_sync_redis() -> Optional[redis.Redis]:
+    """Sync client for Celery tasks, or None if REDIS_URL isn't configured."""
+    global _sync_client
+    if not REDIS_URL:
+        return None
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _sync_client
+
+def get_async_redis() -> Optional[aioredis.Redis]:
+    """Async client for the FastAPI process, or None if REDIS_URL isn't configured."""
+    global _async_client
+    if not REDIS_URL:
+        return None
+    if _async_client is None:
+        _async_client = aioredis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _async_client
+
+# --- player_stats version (invalidates the derived metrics tables) ---
+
+STATS_VERSION_PREFIX = "stats:version"
+
+def stats_version_key(team_id: int, season: int) -> str:
+    return f"{STATS_VERSION_PREFIX}:{team_id}:{season}"
+
+def bump_stats_version_sync(team_id: int, season: int):
+    """Mark the team/season's cached derived tables stale (called after every player_stats write)."""
+    client = get_sync_redis()
+    if client is None:
+        return
+    try:
+        client.incr(stats_version_key(team_id, season))
+    except Exception as e:
+        print(f"[WARN] Could not bump stats version for team {team_id}, season {season}: {e}")
+
+async def close_async_redis():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,203 @@
+"""
+Per-request timing for the FastAPI routes, reported as a Server-Timing header.
+
+    mongo      time in Mongo commands (pymongo command monitoring; Motor copies the
+               request's context into its executor threads, so commands are attributed
+               to the request that issued them)
+    handler    route handler time minus Mongo
+    serialize  parameter validation and JSON encoding around the handler
+    total      whole request, middleware included
+
+Requests slower than SLOW_REQUEST_MS are logged with every Mongo command they ran
+(exact filter included) and an `explain` summary of the slowest query, run after
+the response has been sent.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+from app.config import SLOW_REQUEST_MS
+
+# Commands worth explaining, and the keys that are driver/session metadata rather than query shape
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+_COMMAND_METADATA = {"lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "readConcern", "cursor"}
+MAX_LOGGED_COMMANDS = 25
+
+class RequestTiming:
+    __slots__ = ("started", "mongo_ms", "mongo_ops", "endpoint_ms", "route_ms", "commands", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.mongo_ms = 0.0
+        self.mongo_ops = 0
+        self.endpoint_ms = 0.0
+        self.route_ms = 0.0
+        self.commands: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_command(self, command_name: str, command: Dict[str, Any], ms: float):
+        with self._lock:
+            self.mongo_ms += ms
+            self.mongo_ops += 1
+            if len(self.commands) < MAX_LOGGED_COMMANDS:
+                self.commands.append({"op": command_name, "command": command, "ms": round(ms, 2)})
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        handler = max(0.0, self.endpoint_ms - self.mongo_ms)
+        serialize = max(0.0, self.route_ms - self.endpoint_ms)
+        return ", ".join([
+            f'mongo;dur={self.mongo_ms:.1f};desc="{self.mongo_ops} ops"',
+            f"handler;dur={handler:.1f}",
+            f"serialize;dur={serialize:.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def start_request_timing() -> RequestTiming:
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+# --- Mongo ---
+
+class RequestMongoListener(monitoring.CommandListener):
+    """Attributes Mongo command time to the current request (no-op outside requests)."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[RequestTiming, str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        timing = _current.get()
+        if timing is None:
+            return
+        command = {k: v for k, v in event.command.items() if k not in _COMMAND_METADATA}
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (timing, event.command_name, command)
+
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending:
+            timing, name, command = pending
+            timing.add_command(name, command, event.duration_micros / 1000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+request_mongo_listener = RequestMongoListener()
+
+# --- Route handler vs serialization ---
+
+def _timed_endpoint(endpoint):
+    if getattr(endpoint, "_request_timed", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing = _current.get()
+                if timing is not None:
+                    timing.endpoint_ms += (time.perf_counter() - started) * 1000
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timing = _current.get()
+                if timing is not None:
+                    timing.endpoint_ms += (time.perf_counter() - started) * 1000
+
+    wrapper._request_timed = True
+    return wrapper
+
+class TimedRoute(APIRoute):
+    """APIRoute that separates handler time from validation/serialization time."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                timing = _current.get()
+                if timing is not None:
+                    timing.route_ms += (time.perf_counter() - started) * 1000
+
+        return timed_handler
+
+# --- Slow request log ---
+
+def _explain_summary(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Winning plan stages plus the executionStats counters that matter."""
+    planner = explain.get("queryPlanner") or {}
+    if not planner and explain.get("stages"):
+        # aggregate: the $cursor stage carries the query planner output
+        planner = explain["stages"][0].get("$cursor", {}).get("queryPlanner", {})
+    stages, indexes = [], []
+    plan = planner.get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)  # slot-based engine nests the classic plan
+    while plan:
+        stages.append(plan.get("stage"))
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    stats = explain.get("executionStats") or {}
+    return {
+        "plan": " <- ".join(s for s in stages if s),
+        "indexes": indexes,
+        "n_returned": stats.get("nReturned"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+async def _log_explain(op: str, command: Dict[str, Any]):
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return
+    try:
+        explain = await db.command({"explain": command, "verbosity": "executionStats"})
+        print(f"[SLOW] explain {op} {command.get(op)}: {json.dumps(_explain_summary(explain), default=str)}")
+    except Exception as e:
+        print(f"[SLOW] explain failed for {op}: {e}")
+
+def log_if_slow(method: str, route: str, timing: RequestTiming, total_ms: float):
+    """Log a request over SLOW_REQUEST_MS with its Mongo commands, then explain the slowest query."""
+    if total_ms < SLOW_REQUEST_MS:
+        return
+    print(f"[SLOW] {method} {route} {total_ms:.0f}ms ({timing.server_timing(total_ms)})")
+    for cmd in timing.commands:
+        print(f"[SLOW]   {cmd['ms']:.1f}ms {cmd['op']} {json.dumps(cmd['command'], default=str)}")
+    explainable = [c for c in timing.commands if c["op"] in EXPLAINABLE]
+    if explainable:
+        slowest = max(explainable, key=lambda c: c["ms"])
+        # Re-running the query for explain shouldn't hold up the response
+        asyncio.get_running_loop().create_task(_log_explain(slowest["op"], slowest["command"]))
@@ -0,0 +1,129 @@
+"""
+Content negotiation for the /packers routes.
+
+NegotiatedRoute records each request's Accept and Accept-Encoding headers; the
+router's default response class (NegotiatedResponse) then encodes whatever the
+handler returned in a single pass:
+
+    Accept: application/msgpack       MessagePack body instead of JSON (when the
+                                      `msgpack` package is installed)
+    Accept-Encoding: br, gzip         brotli (when `brotli` is installed) or gzip,
+                                      for bodies of RESPONSE_COMPRESSION_MIN_BYTES
+                                      or more; smaller ones fit in a packet anyway
+
+Responses a route builds itself (e.g. the precompressed snapshot bundles) are
+sent as they are. bench/encoding_benchmark.py compares the formats on a full
+roster and season schedule.
+"""
+import gzip
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.config import RESPONSE_COMPRESSION_MIN_BYTES, RESPONSE_GZIP_LEVEL, RESPONSE_BROTLI_QUALITY
+from app.services.request_timing import TimedRoute
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # optional; clients asking for it get JSON
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# (Accept, Accept-Encoding) of the request being handled
+_request_headers: ContextVar[Optional[Tuple[str, str]]] = ContextVar("request_headers", default=None)
+
+def _qualities(header: str) -> Dict[str, float]:
+    """{"gzip": 1.0, "br": 0.5, ...} from an Accept or Accept-Encoding header."""
+    qualities = {}
+    for part in (header or "").split(","):
+        token, *params = part.strip().split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token.strip():
+            qualities[token.strip().lower()] = q
+    return qualities
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Best of `available` the client accepts: br, then gzip, then identity."""
+    accepted = _qualities(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+def wants_msgpack(accept: str) -> bool:
+    """Client ranks MessagePack at least as high as JSON (and we can produce it)."""
+    if msgpack is None:
+        return False
+    accepted = _qualities(accept)
+    q = max(accepted.get(t, 0) for t in MSGPACK_TYPES)
+    return q > 0 and q >= accepted.get(JSON, accepted.get("application/*", accepted.get("*/*", 0)))
+
+def compressors():
+    available = {"gzip": lambda body: gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)}
+    if brotli is not None:
+        available["br"] = lambda body: brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    return available
+
+COMPRESSORS = compressors()
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return COMPRESSORS[encoding](body)
+
+def pack(content) -> bytes:
+    """MessagePack of a JSON-compatible value (what FastAPI hands the response class)."""
+    return msgpack.packb(content, use_bin_type=True)
+
+class NegotiatedResponse(JSONResponse):
+    """JSONResponse that honours the current request's Accept / Accept-Encoding."""
+
+    def __init__(self, content=None, status_code: int = 200, headers=None, media_type=None, background=None):
+        self._negotiated = _request_headers.get()
+        super().__init__(content, status_code=status_code, headers=headers, media_type=media_type, background=background)
+        if self._negotiated is None:
+            return
+        self.headers["Vary"] = "Accept, Accept-Encoding"
+        if len(self.body) < RESPONSE_COMPRESSION_MIN_BYTES:
+            return
+        encoding = choose_encoding(self._negotiated[1], COMPRESSORS)
+        if encoding != "identity":
+            self.body = compress(self.body, encoding)
+            self.headers["Content-Encoding"] = encoding
+            self.headers["Content-Length"] = str(len(self.body))
+
+    def render(self, content) -> bytes:
+        if self._negotiated is not None and wants_msgpack(self._negotiated[0]):
+            # Set before Response.__init__ writes the Content-Type header
+            self.media_type = MSGPACK
+            return pack(content)
+        return super().render(content)
+
+class NegotiatedRoute(TimedRoute):
+    """TimedRoute that makes the request's Accept headers available to NegotiatedResponse."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request):
+            token = _request_headers.set((request.headers.get("accept", ""), request.headers.get("accept-encoding", "")))
+            try:
+                return await handler(request)
+            finally:
+                _request_headers.reset(token)
+
+        return negotiated_handler
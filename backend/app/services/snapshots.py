@@ -0,0 +1,231 @@
+"""
+Static, content-hashed JSON bundles of finished data.
+
+After a games or stats refresh the batch worker rebuilds a team's bundles for the
+season (see build_snapshots in app/tasks/periodic_tasks.py):
+
+    {team_id}-{season}-season   schedule plus every player's season stats
+    {team_id}-{season}-week-3   one finished week: its games and their box scores
+
+Each bundle is serialized deterministically (sorted keys, no last_updated or
+raw_payload_id) and named by the first 12 hex digits of its SHA-256, so unchanged
+data keeps its URL and changed data gets a new one. A new version is stored in the
+`snapshots` collection, already compressed (gzip, plus brotli when the `brotli`
+package is installed), and `snapshot_manifest` points each bundle name at its
+current version. Week bundles are only written once every game of the week is
+final. With SNAPSHOT_DIR set, the files are also written there for a static host
+or CDN origin:
+
+    15-2025-season.3f9a1c0b7d2e.json  .json.gz  .json.br
+
+GET /packers/snapshots lists the current URLs; GET /packers/snapshots/{file}
+serves a version with immutable cache headers.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import Binary
+
+from app.config import SNAPSHOT_DIR, SNAPSHOT_KEEP_VERSIONS, SNAPSHOT_CACHE_ENTRIES, PACKERS_TEAM_ID
+from app.services.current_game import OVER_STATUSES
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Bundles are built once and served many times, so compress as hard as possible
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+HASH_LENGTH = 12
+# Volatile or internal fields that would change the hash without changing the data
+VOLATILE_FIELDS = ("_id", "last_updated", "raw_payload_id", "version")
+
+def bundle_name(team_id: int, season: int, part: str) -> str:
+    return f"{team_id}-{season}-{part}"
+
+def week_slug(week: str) -> str:
+    """"Week 3" -> "week-3", "Preseason 1" -> "preseason-1"."""
+    return re.sub(r"[^a-z0-9]+", "-", str(week).lower()).strip("-") or "unknown"
+
+def snapshot_path(name: str, content_hash: str) -> str:
+    return f"/packers/snapshots/{name}.{content_hash}.json"
+
+def _clean(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in doc.items() if k not in VOLATILE_FIELDS}
+
+def _game_sort_key(game: Dict[str, Any]):
+    info = game.get("game") or {}
+    date = info.get("date") or {}
+    return (str(date.get("date") or ""), str(date.get("time") or ""), info.get("id") or 0)
+
+def serialize(bundle: Dict[str, Any]) -> bytes:
+    """Canonical JSON bytes: equal data always gives equal bytes (and hash)."""
+    return json.dumps(bundle, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+def encode_variants(body: bytes) -> Dict[str, bytes]:
+    """The bundle in every Content-Encoding we can serve."""
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return variants
+
+def team_bundles_sync(db, season: int, team_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """(name, bundle) for the season bundle and each finished week."""
+    games = sorted((_clean(g) for g in db["games"].find({"season": season, "team_id": team_id})), key=_game_sort_key)
+    player_stats = list(db["player_stats"].find(
+        {"season": season, "team_id": team_id},
+        {"_id": 0, "player_id": 1, "player_name": 1, "position": 1, "stats": 1},
+    ))
+    player_stats.sort(key=lambda d: d["player_id"])
+
+    weeks: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for game in games:
+        weeks.setdefault(str((game.get("game") or {}).get("week") or ""), []).append(game)
+    finished = [
+        week for week, week_games in weeks.items()
+        if week and all(((g.get("game") or {}).get("status") or {}).get("short") in OVER_STATUSES for g in week_games)
+    ]
+
+    bundles = [(bundle_name(team_id, season, "season"), {
+        "kind": "season",
+        "team_id": team_id,
+        "season": season,
+        "finished_weeks": finished,
+        "games": games,
+        "player_stats": player_stats,
+    })]
+
+    game_ids = [(g.get("game") or {}).get("id") for w in finished for g in weeks[w]]
+    box_scores = {
+        doc["game_id"]: _clean(doc)
+        for doc in db["boxscores"].find({"_id": {"$in": [gid for gid in game_ids if gid is not None]}})
+    }
+    for week in finished:
+        week_games = weeks[week]
+        bundles.append((bundle_name(team_id, season, week_slug(week)), {
+            "kind": "week",
+            "team_id": team_id,
+            "season": season,
+            "week": week,
+            "games": week_games,
+            "box_scores": [box_scores[gid] for gid in ((g.get("game") or {}).get("id") for g in week_games) if gid in box_scores],
+        }))
+    return bundles
+
+def _export(name: str, content_hash: str, variants: Dict[str, bytes]):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    suffixes = {"identity": "", "gzip": ".gz", "br": ".br"}
+    for encoding, data in variants.items():
+        path = os.path.join(SNAPSHOT_DIR, f"{name}.{content_hash}.json{suffixes[encoding]}")
+        if os.path.exists(path):
+            continue
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+def _prune(db, name: str):
+    """Keep the newest SNAPSHOT_KEEP_VERSIONS versions so clients holding an older URL can still load it."""
+    old = list(db["snapshots"].find({"name": name}, {"_id": 1}).sort("created_at", -1).skip(SNAPSHOT_KEEP_VERSIONS))
+    if old:
+        db["snapshots"].delete_many({"_id": {"$in": [d["_id"] for d in old]}})
+
+def write_snapshot_sync(db, name: str, bundle: Dict[str, Any], order: int = 0) -> Dict[str, Any]:
+    """Store `bundle` as a new version unless the current one has the same content hash.
+    `order` sorts the manifest (season bundle first, then weeks in schedule order).
+    """
+    body = serialize(bundle)
+    content_hash = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    current = db["snapshot_manifest"].find_one({"_id": name}, {"hash": 1})
+    if current and current.get("hash") == content_hash:
+        db["snapshot_manifest"].update_one({"_id": name}, {"$set": {"order": order}})
+        return {"name": name, "hash": content_hash, "written": False}
+
+    now = datetime.utcnow()
+    variants = encode_variants(body)
+    db["snapshots"].replace_one({"_id": f"{name}.{content_hash}"}, {
+        "name": name,
+        "hash": content_hash,
+        "kind": bundle["kind"],
+        "team_id": bundle["team_id"],
+        "season": bundle["season"],
+        "created_at": now,
+        "sizes": {encoding: len(data) for encoding, data in variants.items()},
+        "encodings": {encoding: Binary(data) for encoding, data in variants.items()},
+    }, upsert=True)
+    db["snapshot_manifest"].replace_one({"_id": name}, {
+        "name": name,
+        "hash": content_hash,
+        "kind": bundle["kind"],
+        "team_id": bundle["team_id"],
+        "season": bundle["season"],
+        "week": bundle.get("week"),
+        "order": order,
+        "path": snapshot_path(name, content_hash),
+        "sizes": {encoding: len(data) for encoding, data in variants.items()},
+        "updated_at": now,
+    }, upsert=True)
+    _prune(db, name)
+    if SNAPSHOT_DIR:
+        try:
+            _export(name, content_hash, variants)
+        except OSError as e:
+            print(f"[WARN] Could not export snapshot {name}.{content_hash} to {SNAPSHOT_DIR}: {e}")
+    return {"name": name, "hash": content_hash, "written": True}
+
+def build_team_snapshots_sync(db, season: int, team_id: int) -> Dict[str, Any]:
+    """Rebuild one team's season and finished-week bundles; only changed bundles get a new version."""
+    results = [
+        write_snapshot_sync(db, name, bundle, order=i)
+        for i, (name, bundle) in enumerate(team_bundles_sync(db, season, team_id))
+    ]
+    return {
+        "success": True,
+        "team_id": team_id,
+        "season": season,
+        "bundles": len(results),
+        "written": [f"{r['name']}.{r['hash']}" for r in results if r["written"]],
+    }
+
+# --- Serving (FastAPI process) ---
+
+# Versions never change once written, so every worker can keep them in memory
+_cache: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+
+def parse_snapshot_file(filename: str) -> Optional[Tuple[str, str]]:
+    """"15-2025-season.3f9a1c0b7d2e.json" -> ("15-2025-season", "3f9a1c0b7d2e")."""
+    match = re.fullmatch(r"([a-z0-9-]+)\.([0-9a-f]{%d})\.json" % HASH_LENGTH, filename)
+    return (match.group(1), match.group(2)) if match else None
+
+async def get_snapshot_variants(name: str, content_hash: str) -> Optional[Dict[str, bytes]]:
+    _id = f"{name}.{content_hash}"
+    if _id in _cache:
+        _cache.move_to_end(_id)
+        return _cache[_id]
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return None
+    doc = await db["snapshots"].find_one({"_id": _id}, {"encodings": 1})
+    if not doc:
+        return None
+    variants = {encoding: bytes(data) for encoding, data in doc["encodings"].items()}
+    _cache[_id] = variants
+    while len(_cache) > SNAPSHOT_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+    return variants
+
+async def get_snapshot_manifest(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """Current version of every bundle for a team and season."""
+    from app.services.db_service import get_database
+    db = get_database()
+    if db is None:
+        return {"error": "Database not connected"}
+    return await db["snapshot_manifest"].find({"season": season, "team_id": team_id}, {"_id": 0}).sort("order", 1).to_list(length=None)
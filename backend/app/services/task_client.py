@@ -0,0 +1,36 @@
+"""
+Task publishing for the API process.
+
+The web process only puts messages on the broker and reads results, so it sends
+tasks by name instead of importing the task modules (which pull in the Celery
+canvas, `requests` and the API Sports client). The Celery app itself (broker,
+result backend and queue routing from app.celery_app) is loaded on the first
+publish or status check, not at startup.
+"""
+from typing import Any, Dict, Optional
+
+UPDATE_TEAM_ROSTER = "app.tasks.periodic_tasks.update_team_roster"
+UPDATE_TEAM_STATS = "app.tasks.periodic_tasks.update_team_stats"
+UPDATE_TEAM_GAMES = "app.tasks.periodic_tasks.update_team_games"
+REFRESH_LEAGUE = "app.tasks.periodic_tasks.refresh_league"
+REBUILD_LEADERBOARDS = "app.tasks.periodic_tasks.rebuild_leaderboards"
+BUILD_SNAPSHOTS = "app.tasks.periodic_tasks.build_snapshots"
+PLAN_BACKFILL = "app.tasks.backfill_tasks.plan_backfill"
+RESUME_BACKFILL = "app.tasks.backfill_tasks.resume_backfill"
+
+_celery = None
+
+def get_celery():
+    """The configured Celery app, imported on first use."""
+    global _celery
+    if _celery is None:
+        from app.celery_app import celery_app
+        _celery = celery_app
+    return _celery
+
+def send_task(name: str, kwargs: Optional[Dict[str, Any]] = None, task_id: Optional[str] = None, **options):
+    """Queue task `name` (routed to its queue by app.celery_app's task_routes); returns its AsyncResult."""
+    return get_celery().send_task(name, kwargs=kwargs or {}, task_id=task_id, **options)
+
+def task_result(task_id: str):
+    return get_celery().AsyncResult(task_id)
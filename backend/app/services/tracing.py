@@ -0,0 +1,219 @@
+"""
+Lightweight per-stage timing for Celery ingestion tasks.
+
+A traced task opens a run; helpers wrapped with @stage (API fetches, Mongo writes)
+and `with span(...)` blocks inside it add their wall time to that run, summed per
+stage name. Outside a traced task both are no-ops apart from one ContextVar lookup.
+
+When a run ends its stages are attached to the task result as "timings" and
+appended to the capped `task_runs` collection (see GET /packers/tasks/timings).
+
+Profiling: arm the next run of a task (POST /packers/tasks/{name}/profile, or list it
+in TASK_PROFILE_TASKS) and a sampling profiler records that run's stacks as a
+folded-stack file in PROFILE_DIR, ready for flamegraph.pl or speedscope.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import TASK_RUNS_CAPPED_BYTES, PROFILE_DIR, PROFILE_INTERVAL, TASK_PROFILE_TASKS
+from app.services.redis_client import get_sync_redis, get_async_redis
+
+class _Run:
+    __slots__ = ("task", "started", "stages")
+
+    def __init__(self, task: str):
+        self.task = task
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # name -> [total_ms, count]
+
+    def add(self, name: str, ms: float):
+        entry = self.stages.setdefault(name, [0.0, 0])
+        entry[0] += ms
+        entry[1] += 1
+
+_current_run: ContextVar[Optional[_Run]] = ContextVar("task_run", default=None)
+
+@contextmanager
+def span(name: str):
+    """Time a block as stage `name` of the current run (no-op outside a traced task)."""
+    run = _current_run.get()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add(name, (time.perf_counter() - started) * 1000)
+
+def stage(name: str):
+    """Decorator form of span() for sync helpers."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_run.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _summary(run: _Run) -> Dict[str, Any]:
+    total_ms = (time.perf_counter() - run.started) * 1000
+    stages = [
+        {"name": name, "ms": round(ms, 1), "count": count}
+        for name, (ms, count) in sorted(run.stages.items(), key=lambda item: -item[1][0])
+    ]
+    return {
+        "total_ms": round(total_ms, 1),
+        "slowest_stage": stages[0]["name"] if stages else None,
+        "stages": stages,
+    }
+
+# --- Sampling profiler ---
+
+class SamplingProfiler:
+    """Samples one thread's stack every `interval` seconds and counts folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _profile_key(task: str) -> str:
+    return f"profile:next:{task}"
+
+async def arm_profile(task: str, ttl: int = 3600) -> bool:
+    """Profile the next run of `task` (any worker). False when Redis isn't configured."""
+    client = get_async_redis()
+    if client is None:
+        return False
+    await client.set(_profile_key(task), 1, ex=ttl)
+    return True
+
+def _should_profile(task: str) -> bool:
+    if task in TASK_PROFILE_TASKS:
+        return True
+    client = get_sync_redis()
+    if client is None:
+        return False
+    try:
+        return client.delete(_profile_key(task)) > 0
+    except Exception:
+        return False
+
+# --- Runs ---
+
+_task_runs_ready = False
+
+def _save_run(doc: Dict[str, Any]):
+    """Append to the capped task_runs collection, creating it on first use."""
+    global _task_runs_ready
+    from app.services.db_service import get_sync_database
+    from pymongo.errors import CollectionInvalid
+    try:
+        db = get_sync_database()
+        if not _task_runs_ready:
+            try:
+                db.create_collection("task_runs", capped=True, size=TASK_RUNS_CAPPED_BYTES)
+            except CollectionInvalid:
+                pass  # already exists
+            _task_runs_ready = True
+        db["task_runs"].insert_one(doc)
+    except Exception as e:
+        print(f"[WARN] Could not record task run for {doc.get('task')}: {e}")
+
+def traced(fn):
+    """
+    Wrap a task body in a timing run named after the function. Nested traced calls
+    (a task calling another task's function directly) are folded into the outer run.
+    """
+    task = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _current_run.get() is not None:
+            return fn(*args, **kwargs)
+
+        run = _Run(task)
+        token = _current_run.set(run)
+        profiler = SamplingProfiler(threading.get_ident()) if _should_profile(task) else None
+        if profiler:
+            profiler.start()
+        started_at = datetime.utcnow()
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        finally:
+            _current_run.reset(token)
+            summary = _summary(run)
+            if profiler:
+                profiler.stop()
+                path = os.path.join(PROFILE_DIR, f"{task}-{started_at:%Y%m%dT%H%M%S}.folded")
+                profiler.write_folded(path)
+                summary["profile"] = path
+                print(f"[PROFILE] {task}: {sum(profiler.samples.values())} samples written to {path}")
+            if isinstance(result, dict):
+                result["timings"] = summary
+            _save_run({
+                "task": task,
+                "started_at": started_at,
+                "success": result.get("success") if isinstance(result, dict) else None,
+                **summary,
+            })
+    return wrapper
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Average time per stage across recent runs of one task, slowest first."""
+    totals: Dict[str, List[float]] = {}
+    for run in runs:
+        for entry in run.get("stages", []):
+            acc = totals.setdefault(entry["name"], [0.0, 0])
+            acc[0] += entry["ms"]
+            acc[1] += 1
+    stages = sorted(
+        ({"name": name, "avg_ms": round(ms / len(runs), 1), "runs_with_stage": n} for name, (ms, n) in totals.items()),
+        key=lambda s: -s["avg_ms"],
+    )
+    avg_total = sum(r.get("total_ms", 0) for r in runs) / len(runs) if runs else 0
+    return {
+        "runs": len(runs),
+        "avg_total_ms": round(avg_total, 1),
+        "slowest_stage": stages[0]["name"] if stages else None,
+        "stages": stages,
+    }
@@ -0,0 +1,162 @@
+"""
+Deduplicated manual task triggers.
+
+A Redis key per task and target (e.g. trigger:update_team_roster:15:2025) holds the
+ID of the last task queued for it and when it was queued ("<task_id>|<unix time>").
+Triggering again while that task is queued or running returns its ID instead of
+queuing another refresh; once it has finished, TRIGGER_COOLDOWN_SECONDS (0 = off)
+must pass before the same refresh can run again.
+
+Celery reports unknown task IDs (result expired, message lost by the broker) as
+PENDING, the same as queued ones, so a PENDING task is only treated as lost when its
+message is no longer in the broker's queue lists (the broker is the same Redis) and it
+was queued more than TRIGGER_PENDING_GRACE_SECONDS ago (time for a worker to pick it
+up and record STARTED). A task waiting behind long batch work stays in the queue and
+keeps its lock; a lost one is replaced by the next trigger instead of blocking it for
+TRIGGER_LOCK_TTL. If publishing fails the lock is released again.
+Without Redis every trigger simply queues a task.
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import TRIGGER_COOLDOWN_SECONDS, TRIGGER_LOCK_TTL, TRIGGER_PENDING_GRACE_SECONDS
+from app.services.redis_client import get_async_redis
+from app.services.task_client import send_task, task_result
+
+# Celery states as plain strings: importing celery.states would load Celery in the API process
+PENDING = "PENDING"
+READY_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+# Redis lists kombu keeps app.celery_app's queues in (one per priority step; unprioritized
+# messages go to the bare queue name)
+BROKER_QUEUES = ("batch", "live")
+PRIORITY_SEPARATOR = "\x06\x16"
+PRIORITY_STEPS = (3, 6, 9)
+
+# Replace the lock only if it still names the task we inspected (another request may have won)
+_REPLACE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Release the lock only if it is still ours
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _lock_key(task_name: str, *parts) -> str:
+    name = task_name.rsplit(".", 1)[-1]
+    return "trigger:" + ":".join([name, *(str(p) for p in parts)])
+
+def _lock_value(task_id: str) -> str:
+    return f"{task_id}|{int(time.time())}"
+
+def _parse_lock(value: str) -> Tuple[str, Optional[float]]:
+    """(task_id, queued_at); locks written before the timestamp was added have none."""
+    task_id, _, queued_at = value.partition("|")
+    try:
+        return task_id, float(queued_at)
+    except ValueError:
+        return task_id, None
+
+def _task_state(task_id: str):
+    result = task_result(task_id)
+    return result.state, result.date_done
+
+def _since(date_done) -> float | None:
+    if date_done is None:
+        return None
+    if isinstance(date_done, str):
+        date_done = datetime.fromisoformat(date_done)
+    if date_done.tzinfo is None:
+        date_done = date_done.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - date_done).total_seconds()
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+async def _queued_in_broker(client, task_id: str) -> bool:
+    """Whether the task's message is still waiting in one of the broker queues."""
+    needle = task_id.encode()
+    for queue in BROKER_QUEUES:
+        for key in (queue, *(f"{queue}{PRIORITY_SEPARATOR}{step}" for step in PRIORITY_STEPS)):
+            if any(needle in message for message in await client.lrange(key, 0, -1)):
+                return True
+    return False
+
+async def _publish(task_name: str, kwargs: Dict[str, Any], task_id: Optional[str] = None) -> str:
+    # send_task blocks on the broker connection; keep it off the event loop
+    result = await asyncio.to_thread(send_task, task_name, kwargs, task_id)
+    return result.id
+
+async def _claim(client, key: str, value: str, ttl: int, cooldown: int):
+    """True when the lock now holds `value`, else the dedup response for the task holding it."""
+    if await client.set(key, value, nx=True, ex=ttl):
+        return True
+
+    existing = _decode(await client.get(key))
+    if existing:
+        existing_id, queued_at = _parse_lock(existing)
+        state, date_done = await asyncio.to_thread(_task_state, existing_id)
+        lost = (
+            state == PENDING
+            and queued_at is not None
+            and time.time() - queued_at > TRIGGER_PENDING_GRACE_SECONDS
+            and not await _queued_in_broker(client, existing_id)
+        )
+        if lost:
+            print(f"[WARN] Task {existing_id} is PENDING but no longer queued, treating it as lost")
+        elif state not in READY_STATES:
+            # PENDING (queued), STARTED, RETRY or PROGRESS
+            return {"task_id": existing_id, "deduplicated": True, "state": state}
+        else:
+            age = _since(date_done)
+            if cooldown and age is not None and age < cooldown:
+                return {"task_id": existing_id, "deduplicated": True, "state": state, "retry_after": round(cooldown - age)}
+
+    if await client.eval(_REPLACE_SCRIPT, 1, key, existing or "", value, ttl) or await client.set(key, value, nx=True, ex=ttl):
+        return True
+
+    # Lost a race with a concurrent trigger; report the task it queued
+    winner = _decode(await client.get(key))
+    return {"task_id": _parse_lock(winner)[0] if winner else None, "deduplicated": True}
+
+async def trigger_once(task_name: str, key_parts: tuple, cooldown: int = TRIGGER_COOLDOWN_SECONDS, **kwargs) -> Dict[str, Any]:
+    """
+    Queue task `task_name` (see task_client) with `kwargs` unless the same trigger is
+    already queued/running (or finished less than `cooldown` seconds ago).
+    Returns {"task_id", "deduplicated": bool} plus "retry_after" when cooling down.
+    """
+    client = get_async_redis()
+    if client is None:
+        return {"task_id": await _publish(task_name, kwargs), "deduplicated": False}
+
+    key = _lock_key(task_name, *key_parts)
+    new_id = str(uuid.uuid4())
+    value = _lock_value(new_id)
+    try:
+        claimed = await _claim(client, key, value, max(TRIGGER_LOCK_TTL, cooldown), cooldown)
+    except Exception as e:
+        print(f"[WARN] Trigger lock unavailable ({e}), queuing {task_name} without dedup")
+        return {"task_id": await _publish(task_name, kwargs), "deduplicated": False}
+    if claimed is not True:
+        return claimed
+
+    try:
+        await _publish(task_name, kwargs, new_id)
+    except Exception:
+        # Don't leave the lock pointing at a task that was never queued
+        try:
+            await client.eval(_RELEASE_SCRIPT, 1, key, value)
+        except Exception as e:
+            print(f"[WARN] Could not release trigger lock {key}: {e}")
+        raise
+    return {"task_id": new_id, "deduplicated": False}
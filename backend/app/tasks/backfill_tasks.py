@@ -0,0 +1,221 @@
+import time
+from datetime import datetime
+from app.celery_app import celery_app
+from app.config import (
+    BACKFILL_PARALLELISM,
+    BACKFILL_CHUNK_TIMEOUT,
+    CIRCUIT_OPEN_SECONDS,
+)
+from app.services.NFL_service import get_nfl_teams_sync
+from app.services.db_service import get_sync_database, save_teams_to_db_sync, get_team_ids_sync
+from app.services.quota_governor import use_lane, LANE_BACKFILL
+from app.services.circuit_breaker import is_open_sync
+from app.services.backfill_store import (
+    KIND_ROSTER,
+    KIND_GAMES,
+    KIND_STATS,
+    make_chunk,
+    stats_chunks,
+    get_job_sync,
+    update_job_sync,
+    running_job_ids_sync,
+    plan_chunks_sync,
+    count_chunks_sync,
+    reset_stale_chunks_sync,
+    claim_chunk_sync,
+    start_chunk_sync,
+    acquire_dispatch_lease_sync,
+    release_dispatch_lease_sync,
+    checkpoint_player_sync,
+    complete_chunk_sync,
+    fail_chunk_sync,
+    release_chunk_sync,
+    retry_failed_chunks_sync,
+)
+from app.tasks.periodic_tasks import update_team_roster, update_team_games, refresh_player_stats
+from app.tasks.task_results import compact_errors
+
+# A season with no data for a team is finished, not failed
+EMPTY_RESULT_ERRORS = ("No players found in API response", "No games found in API response")
+
+# Upstream endpoint each chunk kind depends on (checked against the circuit breaker)
+KIND_ENDPOINTS = {KIND_ROSTER: "/players", KIND_GAMES: "/games", KIND_STATS: "/players/statistics"}
+
+def _season_team_ids(season: int) -> list:
+    """Every team for a historical season: API first (stored for later), then whatever is stored."""
+    teams_resp = get_nfl_teams_sync(season=season)
+    if "error" not in teams_resp and teams_resp.get("response"):
+        teams = [t for t in teams_resp["response"] if isinstance(t, dict) and t.get("team", {}).get("id")]
+        save_teams_to_db_sync(teams, season=season)
+        return [t["team"]["id"] for t in teams]
+    print(f"[WARNING] Could not fetch teams for {season} ({teams_resp.get('error')}), using stored team list")
+    return get_team_ids_sync(season=season)
+
+@celery_app.task(name="app.tasks.backfill_tasks.plan_backfill")
+def plan_backfill(job_id: str):
+    """
+    Turn a backfill job into roster + games chunks per season and team, then start
+    the dispatcher. Safe to re-run: chunks that already exist are left as they are.
+    """
+    job = get_job_sync(job_id)
+    if not job:
+        return {"success": False, "error": f"Backfill job {job_id} not found"}
+
+    chunks = []
+    with use_lane(LANE_BACKFILL):
+        for season in job["seasons"]:
+            team_ids = job.get("team_ids") or _season_team_ids(season)
+            if not team_ids:
+                print(f"[WARNING] No teams known for season {season}, skipping it")
+                continue
+            for team_id in team_ids:
+                chunks.append(make_chunk(job_id, season, team_id, KIND_ROSTER))
+                chunks.append(make_chunk(job_id, season, team_id, KIND_GAMES))
+
+    inserted = plan_chunks_sync(chunks)
+    update_job_sync(job_id, {"status": "running", "planned_at": datetime.utcnow()})
+    print(f"[INFO] Backfill {job_id}: planned {inserted} chunks for seasons {job['seasons']}")
+    dispatch_backfill.delay(job_id)
+    return {"success": True, "job_id": job_id, "planned_chunks": inserted, "timestamp": datetime.utcnow().isoformat()}
+
+@celery_app.task(name="app.tasks.backfill_tasks.dispatch_backfill")
+def dispatch_backfill(job_id: str):
+    """
+    Keep up to BACKFILL_PARALLELISM chunks of a job running. Called after planning,
+    after every chunk and by the periodic resume sweep; marks the job finished once
+    nothing is pending or running.
+    """
+    job = get_job_sync(job_id)
+    if not job or job.get("status") != "running":
+        return {"success": False, "job_id": job_id, "status": job.get("status") if job else "missing"}
+
+    lease = acquire_dispatch_lease_sync(job_id)
+    if lease is None:
+        return {"success": True, "job_id": job_id, "status": "running", "started": [], "skipped": "another dispatch is running"}
+    try:
+        reset = reset_stale_chunks_sync(job_id, BACKFILL_CHUNK_TIMEOUT)
+        if reset:
+            print(f"[INFO] Backfill {job_id}: {reset} stale chunks reset")
+
+        running = count_chunks_sync(job_id, "running")
+        started = []
+        while running + len(started) < BACKFILL_PARALLELISM:
+            chunk = claim_chunk_sync(job_id)
+            if not chunk:
+                break
+            run_backfill_chunk.delay(chunk["_id"], chunk["claim_id"])
+            started.append(chunk["_id"])
+    finally:
+        release_dispatch_lease_sync(job_id, lease)
+
+    if not started and running == 0 and count_chunks_sync(job_id, "pending") == 0:
+        failed = count_chunks_sync(job_id, "failed")
+        status = "completed_with_errors" if failed else "completed"
+        update_job_sync(job_id, {"status": status, "finished_at": datetime.utcnow()})
+        print(f"[SUCCESS] Backfill {job_id} {status} ({failed} failed chunks)")
+        return {"success": True, "job_id": job_id, "status": status}
+
+    return {"success": True, "job_id": job_id, "status": "running", "started": started}
+
+def _run_stats_chunk(chunk: dict, force: bool) -> dict:
+    """Stats for a slice of players, checkpointing after each so a retry skips finished players."""
+    done = set(chunk.get("done_player_ids", []))
+    updated = 0
+    errors = []
+    for player_id in chunk.get("player_ids", []):
+        if player_id in done:
+            continue
+        result = refresh_player_stats(player_id, chunk["season"], team_id=chunk["team_id"], force=force)
+        if result.get("circuit_open"):
+            return {"success": False, "circuit_open": True, "error": result["error"]}
+        if result.get("error"):
+            errors.append({"player_id": player_id, "error": result["error"]})
+            continue
+        if result.get("updated"):
+            updated += 1
+        checkpoint_player_sync(chunk["_id"], player_id)
+
+    if errors:
+        # Players that succeeded are checkpointed; the retry only redoes these
+        return {"success": False, "error": f"{len(errors)} players failed", **compact_errors(errors)}
+    return {"success": True, "updated_count": updated}
+
+def _plan_team_stats(chunk: dict) -> int:
+    db = get_sync_database()
+    players = db["players"].find({"team_id": chunk["team_id"], "season": chunk["season"]}, {"player": 1, "id": 1})
+    player_ids = sorted({pid for pid in (p.get("player", {}).get("id") or p.get("id") for p in players) if pid})
+    return plan_chunks_sync(stats_chunks(chunk["job_id"], chunk["season"], chunk["team_id"], player_ids))
+
+def _run_chunk(chunk: dict, force: bool) -> dict:
+    try:
+        with use_lane(LANE_BACKFILL):
+            if chunk["kind"] == KIND_ROSTER:
+                return update_team_roster(team_id=chunk["team_id"], season=chunk["season"])
+            if chunk["kind"] == KIND_GAMES:
+                return update_team_games(team_id=chunk["team_id"], season=chunk["season"])
+            return _run_stats_chunk(chunk, force)
+    except Exception as e:
+        return {"success": False, "error": f"Unexpected error: {e}"}
+
+@celery_app.task(name="app.tasks.backfill_tasks.run_backfill_chunk")
+def run_backfill_chunk(chunk_id: str, claim_id: str | None = None):
+    """Run one claimed chunk in the backfill quota lane, record the outcome and hand back to the dispatcher."""
+    chunk = start_chunk_sync(chunk_id, claim_id)
+    if not chunk:
+        # Reset and handed out again (or already finished) since this task was queued
+        return {"success": False, "chunk_id": chunk_id, "error": "chunk not claimed"}
+    job = get_job_sync(chunk["job_id"]) or {}
+    force = bool(job.get("force"))
+    started_at = time.monotonic()
+
+    if is_open_sync(KIND_ENDPOINTS[chunk["kind"]]):
+        result = {"success": False, "circuit_open": True, "error": f"API Sports {KIND_ENDPOINTS[chunk['kind']]} circuit open"}
+    else:
+        result = _run_chunk(chunk, force)
+
+    if not result.get("success") and result.get("error") in EMPTY_RESULT_ERRORS:
+        result = {"success": True, "empty": True}
+
+    if result.get("circuit_open"):
+        # Don't burn attempts while API Sports is down; try again once the breaker can probe
+        release_chunk_sync(chunk, result["error"])
+        dispatch_backfill.apply_async(args=[chunk["job_id"]], countdown=CIRCUIT_OPEN_SECONDS)
+        return {"success": False, "chunk_id": chunk_id, "status": "pending", "error": result["error"]}
+
+    if result.get("success"):
+        if chunk["kind"] == KIND_ROSTER and job.get("include_stats") and not result.get("empty"):
+            _plan_team_stats(chunk)
+        complete_chunk_sync(chunk, {k: v for k, v in result.items() if k in ("inserted_count", "updated_count", "empty")})
+        status = "done"
+    else:
+        status = fail_chunk_sync(chunk, result.get("error") or "unknown error")
+        print(f"[WARNING] Backfill chunk {chunk_id} failed (attempt {chunk.get('attempts')}): {result.get('error')}")
+
+    dispatch_backfill.delay(chunk["job_id"])
+    return {
+        "success": status == "done",
+        "chunk_id": chunk_id,
+        "status": status,
+        "elapsed_seconds": round(time.monotonic() - started_at, 2),
+    }
+
+@celery_app.task(name="app.tasks.backfill_tasks.resume_backfill")
+def resume_backfill(job_id: str, retry_failed: bool = True):
+    """Restart a stopped or finished-with-errors job from its checkpoints."""
+    job = get_job_sync(job_id)
+    if not job:
+        return {"success": False, "error": f"Backfill job {job_id} not found"}
+    retried = retry_failed_chunks_sync(job_id) if retry_failed else 0
+    if job.get("status") == "planning":
+        return plan_backfill(job_id)
+    update_job_sync(job_id, {"status": "running", "finished_at": None})
+    print(f"[INFO] Resuming backfill {job_id} ({retried} failed chunks retried)")
+    return dispatch_backfill(job_id)
+
+@celery_app.task(name="app.tasks.backfill_tasks.resume_stalled_backfills")
+def resume_stalled_backfills():
+    """Periodic sweep: re-dispatch every running job so work lost with a worker is picked up again."""
+    job_ids = running_job_ids_sync()
+    for job_id in job_ids:
+        dispatch_backfill.delay(job_id)
+    return {"success": True, "jobs": job_ids, "timestamp": datetime.utcnow().isoformat()}
@@ -1,5 +1,9 @@
+import time
+from celery import chord
 from app.celery_app import celery_app
+from app.config import LEAGUE_STATS_SHARDS, LEAGUE_REFRESH_TIMEOUT, PACKERS_TEAM_ID, SNAPSHOT_DEBOUNCE_SECONDS
 from app.services.NFL_service import (
+    get_nfl_teams_sync,
     get_team_roster_sync,
     get_player_statistics_sync,
     get_team_games_sync,
@@ -11,26 +15,37 @@ from app.services.db_service import (
     get_sync_database,
     save_games_to_db_sync,
     get_next_game_sync,
+    save_teams_to_db_sync,
+    get_team_ids_sync,
+    get_team_name_sync,
 )
-from datetime import datetime
+from app.services.tracing import traced, span
+from app.services.leaderboards import rebuild_leaderboards_sync
+from app.services.snapshots import build_team_snapshots_sync
+from app.services.current_game import get_current_game_sync
+from app.services.redis_client import get_sync_redis
+from app.tasks.task_results import compact_errors, ProgressReporter
+from datetime import datetime, timezone
 
-@celery_app.task(name="app.tasks.periodic_tasks.update_packers_roster")
-def update_packers_roster(season: int = 2025):
+@celery_app.task(name="app.tasks.periodic_tasks.update_team_roster")
+@traced
+def update_team_roster(team_id: int = PACKERS_TEAM_ID, season: int = 2025):
     """
-    Celery task to fetch and update the Green Bay Packers roster.
-    This task runs weekly (every Monday at 2 AM) via Celery Beat.
+    Celery task to fetch and update one team's roster.
+    Fanned out per team by refresh_league; update_packers_roster wraps it for the Packers.
     
     Args:
+        team_id: API Sports team ID (default: 15, Green Bay Packers)
         season: The NFL season year (default: 2025)
     
     Returns:
         dict: Status of the update operation
     """
-    print(f"[{datetime.now()}] Starting Packers roster update for season {season}...")
+    print(f"[{datetime.now()}] Starting roster update for team {team_id}, season {season}...")
     
     try:
-        # Fetch roster from API Sports (Team ID 15 = Green Bay Packers)
-        roster_response = get_team_roster_sync(team_id=15, season=season)
+        # Fetch roster from API Sports
+        roster_response = get_team_roster_sync(team_id=team_id, season=season)
         
         # Check for errors in API response
         if "error" in roster_response:
@@ -66,15 +81,22 @@ def update_packers_roster(season: int = 2025):
         print(f"[INFO] Fetched {len(valid_players)} players from API")
         
         # Save roster to database
-        save_result = save_roster_to_db_sync(valid_players, season=season)
+        save_result = save_roster_to_db_sync(
+            valid_players,
+            season=season,
+            team_id=team_id,
+            team_name=get_team_name_sync(team_id, season=season),
+            raw_payload_id=roster_response.get("raw_payload_id"),
+        )
         
         if save_result.get("success"):
-            success_msg = f"Successfully updated {save_result['inserted_count']} players for season {season}"
+            success_msg = f"Successfully updated {save_result['inserted_count']} players for team {team_id}, season {season}"
             print(f"[SUCCESS] {success_msg}")
             return {
                 "success": True,
                 "message": success_msg,
                 "inserted_count": save_result["inserted_count"],
+                "team_id": team_id,
                 "season": season,
                 "timestamp": datetime.utcnow().isoformat()
             }
@@ -97,16 +119,27 @@ def update_packers_roster(season: int = 2025):
         }
 
 
-@celery_app.task(name="app.tasks.periodic_tasks.update_packers_games")
-def update_packers_games(season: int = 2025):
+@celery_app.task(name="app.tasks.periodic_tasks.update_packers_roster")
+@traced
+def update_packers_roster(season: int = 2025):
+    """
+    Celery task to fetch and update the Green Bay Packers roster.
+    This task runs weekly (every Monday at 2 AM) via Celery Beat.
+    """
+    return update_team_roster(team_id=PACKERS_TEAM_ID, season=season)
+
+
+@celery_app.task(name="app.tasks.periodic_tasks.update_team_games")
+@traced
+def update_team_games(team_id: int = PACKERS_TEAM_ID, season: int = 2025):
     """
-    Fetch and store all Packers games for the season.
+    Fetch and store all of a team's games for the season.
     Run this weekly or manually to keep game schedule up to date.
     """
-    print(f"[{datetime.now()}] Fetching Packers games for season {season}...")
+    print(f"[{datetime.now()}] Fetching games for team {team_id}, season {season}...")
     
     try:
-        games_response = get_team_games_sync(team_id=15, season=season)
+        games_response = get_team_games_sync(team_id=team_id, season=season)
         
         if "error" in games_response:
             error_msg = f"Failed to fetch games: {games_response['error']}"
@@ -127,15 +160,17 @@ def update_packers_games(season: int = 2025):
         
         print(f"[INFO] Fetched {len(valid_games)} games")
         
-        save_result = save_games_to_db_sync(valid_games, season=season)
+        save_result = save_games_to_db_sync(valid_games, season=season, team_id=team_id, raw_payload_id=games_response.get("raw_payload_id"))
         
         if save_result.get("success"):
-            msg = f"Successfully stored {save_result['inserted_count']} games"
+            msg = f"Successfully stored {save_result['inserted_count']} games for team {team_id}"
             print(f"[SUCCESS] {msg}")
+            schedule_snapshot_build(season, team_id)
             return {
                 "success": True,
                 "message": msg,
                 "inserted_count": save_result["inserted_count"],
+                "team_id": team_id,
                 "season": season,
                 "timestamp": datetime.utcnow().isoformat(),
             }
@@ -150,74 +185,257 @@ def update_packers_games(season: int = 2025):
         return {"success": False, "error": error_msg, "timestamp": datetime.utcnow().isoformat()}
 
 
-@celery_app.task(name="app.tasks.periodic_tasks.update_packers_stats_postgame")
-def update_packers_stats_postgame(season: int = 2025, force: bool = False):
+@celery_app.task(name="app.tasks.periodic_tasks.update_packers_games")
+@traced
+def update_packers_games(season: int = 2025):
+    """Fetch and store all Packers games for the season."""
+    return update_team_games(team_id=PACKERS_TEAM_ID, season=season)
+
+
+def refresh_player_stats(player_id: int, season: int, team_id: int = PACKERS_TEAM_ID, force: bool = False, fetched_after: float | None = None) -> dict:
     """
-    Refresh all Packers player season stats after games are completed.
-    Checks if a game just finished before running (unless force=True).
-    Intended to run shortly after weekly games.
+    Fetch one player's season stats and upsert them.
+    Returns {"updated": bool, "error": str | None, "circuit_open": bool}; a player
+    with no stats yet is neither updated nor an error.
+    """
+    # force=True (manual trigger) skips the response cache so the refresh is real;
+    # fetched_after refetches responses cached before the team's latest game went final
+    stats_resp = get_player_statistics_sync(player_id, season=season, bypass_cache=force, fetched_after=fetched_after)
+    if isinstance(stats_resp, dict) and stats_resp.get("circuit_open"):
+        return {"updated": False, "error": stats_resp["error"], "circuit_open": True}
+    if not stats_resp or "error" in stats_resp:
+        return {"updated": False, "error": stats_resp.get("error") if isinstance(stats_resp, dict) else "unknown", "circuit_open": False}
+
+    # API returns response as a list of player stats, pass it directly to upsert
+    stats_payload = stats_resp.get("response")
+
+    # Check if response exists (could be empty list [] which is falsy but valid)
+    if stats_payload is None:
+        return {"updated": False, "error": "null stats response", "circuit_open": False}
+
+    # Empty list means no stats for this player yet - skip but don't treat as error
+    if isinstance(stats_payload, list) and len(stats_payload) == 0:
+        return {"updated": False, "error": None, "circuit_open": False}
+
+    # Ensure payload is dict or list
+    if not isinstance(stats_payload, (dict, list)):
+        return {"updated": False, "error": f"invalid stats payload type: {type(stats_payload)}", "circuit_open": False}
+
+    upsert_result = upsert_player_stats_sync(player_id, season, stats_payload, team_id=team_id, raw_payload_id=stats_resp.get("raw_payload_id"))
+    if upsert_result.get("success"):
+        return {"updated": True, "error": None, "circuit_open": False}
+    return {"updated": False, "error": upsert_result.get("error"), "circuit_open": False}
+
+
+def _last_final_at(db, team_id: int, season: int) -> float | None:
+    """When the team's latest game went final (unix time), from its current_games record."""
+    record = get_current_game_sync(db, team_id, season) or {}
+    final_at = record.get("last_final_at")
+    return final_at.replace(tzinfo=timezone.utc).timestamp() if isinstance(final_at, datetime) else None
+
+@celery_app.task(name="app.tasks.periodic_tasks.update_team_stats")
+@traced
+def update_team_stats(team_id: int = PACKERS_TEAM_ID, season: int = 2025, force: bool = False, shard: int = 0, shards: int = 1):
     """
-    print(f"[{datetime.now()}] Starting Packers player stats postgame update for season {season}...")
+    Refresh season stats for a team's players (as stored in the players collection).
+    With shards > 1 only players whose ID falls in `shard` (player_id % shards) are
+    refreshed, so one team's stats can be split across several workers.
+    Cached responses are used unless they predate the team's latest final game.
+    """
+    print(f"[{datetime.now()}] Starting player stats update for team {team_id}, season {season} (shard {shard + 1}/{shards})...")
     
     try:
         db = get_sync_database()
-        players_cursor = db["players"].find({"team_id": 15, "season": season}, {"player": 1, "id": 1})
-        players = list(players_cursor)
+        with span("mongo.find_players"):
+            players = list(db["players"].find({"team_id": team_id, "season": season}, {"player": 1, "id": 1}))
         if not players:
-            msg = "No players found in DB for Packers"
+            msg = f"No players found in DB for team {team_id}"
             print(f"[WARNING] {msg}")
             return {"success": False, "error": msg}
 
         updated = 0
         errors = []
+        player_ids = []
         for p in players:
-            player_id = None
-            if isinstance(p, dict):
-                player_id = p.get("player", {}).get("id") or p.get("id")
-
+            player_id = p.get("player", {}).get("id") or p.get("id")
             if not player_id:
-                errors.append({"player": p, "error": "missing player id"})
-                continue
+                errors.append({"doc_id": str(p.get("_id")), "error": "missing player id"})
+            elif shards <= 1 or player_id % shards == shard:
+                player_ids.append(player_id)
 
-            stats_resp = get_player_statistics_sync(player_id, season=season)
-            if not stats_resp or "error" in stats_resp:
-                errors.append({"player_id": player_id, "error": stats_resp.get("error") if isinstance(stats_resp, dict) else "unknown"})
-                continue
-
-            # API returns response as a list of player stats, pass it directly to upsert
-            stats_payload = stats_resp.get("response")
-            
-            # Check if response exists (could be empty list [] which is falsy but valid)
-            if stats_payload is None:
-                errors.append({"player_id": player_id, "error": "null stats response"})
-                continue
-            
-            # Empty list means no stats for this player yet - skip but don't treat as error
-            if isinstance(stats_payload, list) and len(stats_payload) == 0:
-                continue
-            
-            # Ensure payload is dict or list
-            if not isinstance(stats_payload, (dict, list)):
-                errors.append({"player_id": player_id, "error": f"invalid stats payload type: {type(stats_payload)}"})
-                continue
-
-            upsert_result = upsert_player_stats_sync(player_id, season, stats_payload)
-            if upsert_result.get("success"):
+        fetched_after = _last_final_at(db, team_id, season)
+        progress = ProgressReporter(len(player_ids), team_id=team_id, season=season, stage="player_stats")
+        for done, player_id in enumerate(player_ids):
+            progress.update(done)
+            result = refresh_player_stats(player_id, season, team_id=team_id, force=force, fetched_after=fetched_after)
+            if result.get("updated"):
                 updated += 1
-            else:
-                errors.append({"player_id": player_id, "error": upsert_result.get("error")})
+            elif result.get("error"):
+                errors.append({"player_id": player_id, "error": result["error"]})
+            if result.get("circuit_open"):
+                # Upstream is down; every remaining call would fail fast too
+                print("[WARNING] API Sports circuit open, stopping stats refresh early")
+                break
 
         summary = {
             "success": True,
+            "team_id": team_id,
             "season": season,
+            "player_count": len(player_ids),
             "updated_count": updated,
-            "errors": errors,
+            **compact_errors(errors),
             "timestamp": datetime.utcnow().isoformat(),
         }
         print(f"[INFO] Player stats update complete: {updated} updated, {len(errors)} errors")
+        if updated:
+            schedule_snapshot_build(season, team_id)
         return summary
 
     except Exception as e:
         err = f"Unexpected error during player stats update: {e}"
         print(f"[ERROR] {err}")
         return {"success": False, "error": err, "timestamp": datetime.utcnow().isoformat()}
+
+
+@celery_app.task(name="app.tasks.periodic_tasks.update_packers_stats_postgame")
+@traced
+def update_packers_stats_postgame(season: int = 2025, force: bool = False):
+    """
+    Refresh all Packers player season stats after games are completed.
+    Intended to run shortly after weekly games. Responses cached before the latest
+    game went final are refetched (see update_team_stats); the rest come from the cache.
+    """
+    return update_team_stats(team_id=PACKERS_TEAM_ID, season=season, force=force)
+
+
+# --- League-wide fan-out ---
+
+def _summarize(results) -> dict:
+    """Compact roll-up of fan-out task results."""
+    results = [r for r in (results or []) if isinstance(r, dict)]
+    failed = [r for r in results if not r.get("success")]
+    return {
+        "tasks": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "failed_teams": sorted({r["team_id"] for r in failed if r.get("team_id")}),
+    }
+
+@celery_app.task(name="app.tasks.periodic_tasks.rebuild_leaderboards")
+@traced
+def rebuild_leaderboards(season: int | None = None, team_id: int | None = None):
+    """
+    Recompute the materialized leaderboards from player_stats (all teams/seasons by default).
+    Only needed after bulk imports that bypass upsert_player_stats_sync, or to repair drift
+    reported by `python -m app.services.leaderboards check`.
+    """
+    print(f"[{datetime.now()}] Rebuilding leaderboards (season={season}, team_id={team_id})...")
+    try:
+        result = rebuild_leaderboards_sync(get_sync_database(), season=season, team_id=team_id)
+    except Exception as e:
+        print(f"[ERROR] Leaderboard rebuild failed: {e}")
+        return {"success": False, "error": str(e), "timestamp": datetime.utcnow().isoformat()}
+    return {**result, "season": season, "team_id": team_id, "timestamp": datetime.utcnow().isoformat()}
+
+def schedule_snapshot_build(season: int, team_id: int):
+    """
+    Queue build_snapshots for a team, once per SNAPSHOT_DEBOUNCE_SECONDS: a league
+    refresh finishes one games task and several stats shards per team, and a single
+    build after the last of them covers all of it.
+    """
+    client = get_sync_redis()
+    try:
+        if client is not None and not client.set(f"snapshots:pending:{team_id}:{season}", 1, nx=True, ex=SNAPSHOT_DEBOUNCE_SECONDS):
+            return
+    except Exception as e:
+        print(f"[WARN] Snapshot debounce unavailable ({e}), queueing build anyway")
+    build_snapshots.apply_async(kwargs={"season": season, "team_id": team_id}, countdown=SNAPSHOT_DEBOUNCE_SECONDS)
+
+@celery_app.task(name="app.tasks.periodic_tasks.build_snapshots")
+@traced
+def build_snapshots(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+    """
+    Write the team's season bundle and one bundle per finished week (see app.services.snapshots).
+    Bundles whose content hash didn't change are left alone, so their URLs stay cached.
+    """
+    print(f"[{datetime.now()}] Building snapshots for team {team_id}, season {season}...")
+    try:
+        result = build_team_snapshots_sync(get_sync_database(), season=season, team_id=team_id)
+    except Exception as e:
+        print(f"[ERROR] Snapshot build failed: {e}")
+        return {"success": False, "error": str(e), "timestamp": datetime.utcnow().isoformat()}
+    print(f"[INFO] Snapshots for team {team_id}: {len(result['written'])} of {result['bundles']} bundles changed")
+    return {**result, "timestamp": datetime.utcnow().isoformat()}
+
+@celery_app.task(name="app.tasks.periodic_tasks.refresh_league")
+def refresh_league(season: int = 2025, include_stats: bool = True, stats_shards: int = LEAGUE_STATS_SHARDS, force: bool = False):
+    """
+    Refresh roster and schedule for every team in parallel, then (optionally) stats.
+    Phase 1 is a chord of one roster + one games task per team; its callback fans
+    out the stats shards. All tasks draw from the shared API quota governor, and
+    every fanned-out task expires after LEAGUE_REFRESH_TIMEOUT so a backed-up
+    queue can't stretch the refresh indefinitely.
+    """
+    started_at = time.time()
+    print(f"[{datetime.now()}] Starting league refresh for season {season}...")
+
+    teams_resp = get_nfl_teams_sync(season=season)
+    if "error" not in teams_resp and teams_resp.get("response"):
+        teams = [t for t in teams_resp["response"] if isinstance(t, dict) and t.get("team", {}).get("id")]
+        save_teams_to_db_sync(teams, season=season)
+        team_ids = [t["team"]["id"] for t in teams]
+    else:
+        print(f"[WARNING] Could not fetch teams ({teams_resp.get('error')}), using stored team list")
+        team_ids = get_team_ids_sync(season=season)
+
+    if not team_ids:
+        return {"success": False, "error": "No teams available", "timestamp": datetime.utcnow().isoformat()}
+
+    header = [update_team_roster.si(team_id, season).set(expires=LEAGUE_REFRESH_TIMEOUT) for team_id in team_ids]
+    header += [update_team_games.si(team_id, season).set(expires=LEAGUE_REFRESH_TIMEOUT) for team_id in team_ids]
+    if include_stats:
+        callback = refresh_league_stats.s(season=season, team_ids=team_ids, shards=stats_shards, force=force, started_at=started_at)
+    else:
+        callback = summarize_league_refresh.s(season=season, phase="roster+games", started_at=started_at)
+    result = chord(header)(callback)
+
+    return {
+        "success": True,
+        "season": season,
+        "team_count": len(team_ids),
+        "fanned_out": len(header),
+        "callback_id": result.id,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+@celery_app.task(name="app.tasks.periodic_tasks.refresh_league_stats")
+def refresh_league_stats(phase_results, season: int = 2025, team_ids: list | None = None, shards: int = LEAGUE_STATS_SHARDS, force: bool = False, started_at: float | None = None):
+    """Chord callback for phase 1: fan out stats shards for every team whose roster saved."""
+    roster_phase = _summarize(phase_results)
+    skip = set(roster_phase["failed_teams"])
+    header = [
+        update_team_stats.si(team_id, season, force, shard, shards).set(expires=LEAGUE_REFRESH_TIMEOUT)
+        for team_id in (team_ids or [])
+        if team_id not in skip
+        for shard in range(shards)
+    ]
+    if not header:
+        return summarize_league_refresh([], season=season, phase="stats", started_at=started_at, previous=roster_phase)
+    result = chord(header)(summarize_league_refresh.s(season=season, phase="stats", started_at=started_at, previous=roster_phase))
+    return {"success": True, "season": season, "roster_phase": roster_phase, "stats_tasks": len(header), "callback_id": result.id}
+
+@celery_app.task(name="app.tasks.periodic_tasks.summarize_league_refresh")
+def summarize_league_refresh(results, season: int = 2025, phase: str = "", started_at: float | None = None, previous: dict | None = None):
+    """Final chord callback: log and return a compact summary of the league refresh."""
+    summary = {
+        "success": True,
+        "season": season,
+        "phase": phase,
+        phase: _summarize(results),
+        "elapsed_seconds": round(time.time() - started_at, 1) if started_at else None,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    if previous:
+        summary["roster+games"] = previous
+    print(f"[INFO] League refresh for season {season} finished: {summary}")
+    return summary
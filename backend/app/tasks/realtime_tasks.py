@@ -1,99 +1,72 @@
 from datetime import datetime, timezone
+import time
+from zoneinfo import ZoneInfo
+from celery.exceptions import SoftTimeLimitExceeded
 from app.celery_app import celery_app
-from app.services.NFL_service import get_live_games_sync, get_game_player_statistics_sync
-from app.services.db_service import get_sync_database, upsert_live_stats_sync, get_next_game_sync
+from app.config import LIVE_POLL_INTERVAL, PACKERS_TEAM_ID
+from app.services.NFL_service import get_live_games_sync, get_game_player_statistics_sync, get_game_by_id_sync
+from app.services.db_service import upsert_game_live_stats_bulk_sync, upsert_box_score_sync, has_active_games_sync, get_sync_database
+from app.services.current_game import apply_game_updates_sync, ended_live_games_sync
+from app.services.circuit_breaker import is_open_sync
+from app.services.redis_client import get_sync_redis
+from app.services.metrics import observe_live_poll_lag
+from app.services.live_state import next_live_version_sync, publish_live_update_sync
+from app.services.tracing import traced, span
 
-PACKERS_TEAM_ID = 15
+GAME_TIMEZONE = ZoneInfo("America/Chicago")
 
-@celery_app.task(name="app.tasks.realtime_tasks.update_packers_live_stats")
-def update_packers_live_stats(season: int = 2025):
-	"""
-	Poll live games; if Packers are playing, fetch and upsert player stats in near real-time.
-	Checks game status/times first. This task reschedules itself every 30 seconds.
-	"""
-	print(f"[{datetime.now()}] Checking for active Packers game...")
-	
-	# First check if there's an active or upcoming game from our DB
-	next_game = get_next_game_sync(season=season, team_id=PACKERS_TEAM_ID)
-	if not next_game:
-		print(f"[INFO] No upcoming games found in DB, skipping stats update")
-		return {"success": True, "status": "no-upcoming-game", "timestamp": datetime.utcnow().isoformat()}
-	
-	# Check game status - only run during live games or shortly after
-	game_status = next_game.get("game", {}).get("status", {}).get("short")
-	if game_status in ["FT", "AOT", "CANC", "PST"]:
-		print(f"[INFO] Game already finished or postponed (status: {game_status}), skipping")
-		return {"success": True, "status": "game-not-active", "game_status": game_status, "timestamp": datetime.utcnow().isoformat()}
-	
-	# Now check live games from API to confirm
-	live_resp = get_live_games_sync(season=season)
-	if not live_resp or "error" in live_resp:
-		return {"success": False, "error": live_resp.get("error") if isinstance(live_resp, dict) else "Unknown error"}
+# Redis keys for coordinating per-game pollers across workers
+#   live:game:{id}:active   set by the coordinator while the API lists the game as live
+#   live:game:{id}:poller   held while a poller chain exists for the game
+#   live:game:{id}:ingested last successful ingest (epoch seconds), for the poll-lag metric
+ACTIVE_TTL = LIVE_POLL_INTERVAL * 3
+POLLER_TTL = LIVE_POLL_INTERVAL * 3
+INGESTED_TTL = 3600
 
-	live_games = live_resp.get("response", []) or []
-	# Only keep dicts to satisfy typing/attribute access
-	live_games = [g for g in live_games if isinstance(g, dict)]
-	packers_live = [
-		g for g in live_games
-		if g.get("teams", {}).get("home", {}).get("id") == PACKERS_TEAM_ID
-		or g.get("teams", {}).get("away", {}).get("id") == PACKERS_TEAM_ID
-	]
+def _active_key(game_id: int) -> str:
+	return f"live:game:{game_id}:active"
 
-	if not packers_live:
-		print(f"[INFO] No live Packers game, will check again in 5 minutes")
-		return {"success": True, "status": "no-live-packers-game", "timestamp": datetime.utcnow().isoformat()}
+def _poller_key(game_id: int) -> str:
+	return f"live:game:{game_id}:poller"
 
-	print(f"[INFO] Live Packers game detected! Updating stats and rescheduling in 30 seconds...")
+def _ingested_key(game_id: int) -> str:
+	return f"live:game:{game_id}:ingested"
 
-	# Get the game ID from the live game
-	game_id = packers_live[0].get("game", {}).get("id")
-	if not game_id:
-		return {"success": False, "error": "Could not extract game ID from live game"}
+def _record_poll_lag(redis_client, game_id: int):
+	"""Observe how old the stored stats were when this poll replaced them."""
+	now = time.time()
+	try:
+		previous = redis_client.set(_ingested_key(game_id), now, ex=INGESTED_TTL, get=True)
+	except Exception as e:
+		print(f"[WARN] Could not record poll lag for game {game_id}: {e}")
+		return
+	if previous is not None:
+		observe_live_poll_lag(now - float(previous))
 
-	# Fetch live player stats for this game (returns stats for ALL players in the game)
-	game_stats_resp = get_game_player_statistics_sync(game_id)
-	if not game_stats_resp or "error" in game_stats_resp:
-		return {"success": False, "error": game_stats_resp.get("error") if isinstance(game_stats_resp, dict) else "Unknown error"}
-
-	# Extract player stats from response
-	player_stats_list = game_stats_resp.get("response", [])
-	if not isinstance(player_stats_list, list):
-		return {"success": False, "error": "Invalid game stats response format"}
-
-	# Filter to only Packers players and upsert their stats
-	updated = 0
-	errors = []
-
-	# The API returns: [{team: {...}, groups: [{name: "Passing", players: [{player: {...}, statistics: [...]}]}]}]
-	# Collect all stat groups for each player before upserting
-	players_by_id = {}  # {player_id: {player_info, team_info, groups: [...]}}
-	
+def group_game_player_stats(player_stats_list: list, team_id: int | None = None) -> dict:
+	"""
+	Regroup /games/statistics/players output by player.
+	The API returns: [{team: {...}, groups: [{name: "Passing", players: [{player: {...}, statistics: [...]}]}]}]
+	Returns {player_id: {player_info, team_info, groups: [{name, statistics}]}}, optionally for one team.
+	"""
+	players_by_id = {}
 	for team_data in player_stats_list:
 		if not isinstance(team_data, dict):
 			continue
 		
 		team_info = team_data.get("team", {})
-		team_id = team_info.get("id")
-		
-		# Check if this is Packers team data
-		if team_id != PACKERS_TEAM_ID:
+		if team_id is not None and team_info.get("id") != team_id:
 			continue
 		
-		print(f"[INFO] Processing Packers stats with {len(team_data.get('groups', []))} stat groups")
-		
 		# Iterate through stat groups (Passing, Rushing, Receiving, etc.)
 		for group in team_data.get("groups", []):
 			group_name = group.get("name", "Unknown")
-			players = group.get("players", [])
 			
 			# Iterate through players in this group
-			for player_item in players:
+			for player_item in group.get("players", []):
 				player_info = player_item.get("player", {})
 				player_id = player_info.get("id")
-				
 				if not player_id:
-					print(f"[WARN] Missing player ID in {group_name} group")
-					errors.append({"error": "missing player id", "group": group_name})
 					continue
 				
 				# Collect this group for this player
@@ -108,37 +81,246 @@ def update_packers_live_stats(season: int = 2025):
 					"name": group_name,
 					"statistics": player_item.get("statistics", [])
 				})
+	return players_by_id
+
+# Per-player rates and maxima; adding them up across players means nothing
+NON_ADDITIVE_STATS = ("avg", "average", "long", "rating", "pct", "percent")
+
+def _parse_stat(value):
+	"""12 / "1,234" / "1.5" -> number, "20/31" -> (20, 31), anything else -> None."""
+	if isinstance(value, (int, float)):
+		return value
+	if not isinstance(value, str) or not value.strip():
+		return None
+	parts = value.replace(",", "").split("/")
+	try:
+		numbers = tuple(float(p) if "." in p else int(p) for p in parts)
+	except ValueError:
+		return None
+	return numbers[0] if len(numbers) == 1 else numbers
+
+def _format_stat(value) -> str:
+	if isinstance(value, tuple):
+		return "/".join(_format_stat(v) for v in value)
+	return str(round(value, 1) if isinstance(value, float) else value)
+
+def team_box_score(players_by_id: dict) -> list:
+	"""
+	Team totals per stat group from group_game_player_stats output.
+	Counting stats are summed (made/attempted pairs like "comp att" part by part);
+	averages, longs and ratings are left out.
+	Returns [{team, team_id, player_count, groups: [{name, statistics: [{name, value}]}]}].
+	"""
+	teams = {}
+	for player_data in players_by_id.values():
+		team_info = player_data["team_info"]
+		entry = teams.setdefault(team_info.get("id"), {"team": team_info, "player_count": 0, "groups": {}})
+		entry["player_count"] += 1
+		for group in player_data["groups"]:
+			totals = entry["groups"].setdefault(group["name"], {})
+			for stat in group.get("statistics", []):
+				if not isinstance(stat, dict):
+					continue
+				name = stat.get("name", "")
+				if any(word in name.lower() for word in NON_ADDITIVE_STATS):
+					continue
+				value = _parse_stat(stat.get("value"))
+				if value is None:
+					continue
+				current = totals.get(name)
+				if current is None:
+					totals[name] = value
+				elif isinstance(value, tuple) and isinstance(current, tuple) and len(value) == len(current):
+					totals[name] = tuple(a + b for a, b in zip(current, value))
+				elif not isinstance(value, tuple) and not isinstance(current, tuple):
+					totals[name] = current + value
+	return [
+		{
+			"team": entry["team"],
+			"team_id": team_id,
+			"player_count": entry["player_count"],
+			"groups": [
+				{"name": name, "statistics": [{"name": stat, "value": _format_stat(value)} for stat, value in totals.items()]}
+				for name, totals in entry["groups"].items()
+			],
+		}
+		for team_id, entry in teams.items()
+	]
+
+def ingest_game_stats(game_id: int, season: int = 2025) -> dict:
+	"""Fetch one game's player stats and bulk upsert them (every team in the game)."""
+	game_stats_resp = get_game_player_statistics_sync(game_id)
+	if not game_stats_resp or "error" in game_stats_resp:
+		return {"success": False, "game_id": game_id, "error": game_stats_resp.get("error") if isinstance(game_stats_resp, dict) else "Unknown error"}
+
+	player_stats_list = game_stats_resp.get("response", [])
+	if not isinstance(player_stats_list, list):
+		return {"success": False, "game_id": game_id, "error": "Invalid game stats response format"}
+
+	with span("group_stats"):
+		players_by_id = group_game_player_stats(player_stats_list)
+		box_score = team_box_score(players_by_id)
+	players = [
+		{
+			"player_id": player_id,
+			"team": player_data["team_info"],
+			"player": player_data["player_info"],
+			"groups": player_data["groups"],  # Array of all stat groups
+		}
+		for player_id, player_data in players_by_id.items()
+	]
+	version = next_live_version_sync()
+	now = datetime.utcnow()
+	raw_payload_id = game_stats_resp.get("raw_payload_id")
+	result = upsert_game_live_stats_bulk_sync(game_id, players, season=season, version=version, now=now, raw_payload_id=raw_payload_id)
+	if not result.get("success"):
+		return {"success": False, "game_id": game_id, "error": result.get("error")}
+	upsert_box_score_sync(game_id, box_score, season=season, version=version, now=now, raw_payload_id=raw_payload_id)
+	# Mongo first, then the API workers' in-memory copies
+	with span("redis.publish_live_update"):
+		publish_live_update_sync(game_id, season, version, players, now, box_score=box_score)
+	return {"success": True, "game_id": game_id, "updated_count": len(players_by_id)}
+
+def _game_involves(game: dict, team_id: int) -> bool:
+	teams = game.get("teams", {})
+	return teams.get("home", {}).get("id") == team_id or teams.get("away", {}).get("id") == team_id
+
+def update_current_games(season: int, live_games: list, live_game_ids: list, team_id: int | None = None):
+	"""
+	Keep the stored schedule and the current-game records in step with the live list:
+	status and scores of every live game, and the final result of games that just
+	dropped off it (one /games?id= call per finished game).
+	"""
+	try:
+		db = get_sync_database()
+		changed = apply_game_updates_sync(db, season, live_games)
+		finished = []
+		for game_id in ended_live_games_sync(db, season, live_game_ids, team_id=team_id):
+			resp = get_game_by_id_sync(game_id)
+			games = [g for g in (resp.get("response") or []) if isinstance(g, dict)] if isinstance(resp, dict) and "error" not in resp else []
+			if not games:
+				print(f"[WARN] Could not fetch final result for game {game_id}: {resp.get('error') if isinstance(resp, dict) else resp}")
+				continue
+			finished.append(game_id)
+			changed += apply_game_updates_sync(db, season, games)
+		if changed or finished:
+			print(f"[INFO] Current game updated for teams {sorted(set(changed))}; finished games {finished}")
+	except Exception as e:
+		# Live polling carries on; the records catch up on the next run or schedule refresh
+		print(f"[WARN] Could not update current games: {e}")
+
+@celery_app.task(name="app.tasks.realtime_tasks.coordinate_live_games")
+@traced
+def coordinate_live_games(season: int = 2025, team_id: int | None = None):
+	"""
+	Live ingestion coordinator (Celery Beat, every LIVE_POLL_INTERVAL seconds).
+	Makes one /games?live=all call and makes sure each live game has exactly one
+	poll_live_game chain running. Each game is polled by its own task on its own
+	cadence, so a slow game can't delay the others.
+	"""
+	print(f"[{datetime.now()}] Checking for live games...")
 	
-	# Now upsert each player with ALL their stat groups
-	for player_id, player_data in players_by_id.items():
-		upsert_result = upsert_live_stats_sync(
-			game_id=game_id,
-			player_id=player_id,
-			player_stat={
-				"team": player_data["team_info"],
-				"player": player_data["player_info"],
-				"groups": player_data["groups"]  # Array of all stat groups
-			},
-			season=season
-		)
-		
-		if upsert_result.get("success"):
-			updated += 1
-		else:
-			errors.append({
-				"player_id": player_id,
-				"player_name": player_data["player_info"].get("name"),
-				"error": upsert_result.get("error")
-			})
+	# Skip the API call entirely when nothing is scheduled today
+	today = datetime.now(GAME_TIMEZONE).date().isoformat()
+	if not has_active_games_sync(season=season, team_id=team_id, today=today):
+		return {"success": True, "status": "no-games-today", "timestamp": datetime.utcnow().isoformat()}
+
+	# Don't tie up a worker slot on a dead upstream; a later run probes once the breaker allows it
+	if is_open_sync("/games") or is_open_sync("/games/statistics/players"):
+		print(f"[WARN] API Sports circuit open, skipping live poll")
+		return {"success": False, "status": "upstream-unavailable", "timestamp": datetime.utcnow().isoformat()}
+
+	live_resp = get_live_games_sync(season=season)
+	if not live_resp or "error" in live_resp:
+		return {"success": False, "error": live_resp.get("error") if isinstance(live_resp, dict) else "Unknown error"}
+
+	live_games = [g for g in (live_resp.get("response", []) or []) if isinstance(g, dict)]
+	if team_id is not None:
+		live_games = [g for g in live_games if _game_involves(g, team_id)]
+	game_ids = [g.get("game", {}).get("id") for g in live_games if g.get("game", {}).get("id")]
+
+	with span("mongo.current_games"):
+		update_current_games(season, live_games, game_ids, team_id=team_id)
 
-	# Reschedule this task to run again in 30 seconds since game is still live
-	update_packers_live_stats.apply_async(args=[season], countdown=30)
+	if not game_ids:
+		print(f"[INFO] No live games")
+		return {"success": True, "status": "no-live-games", "timestamp": datetime.utcnow().isoformat()}
 
+	redis_client = get_sync_redis()
+	started = []
+	with span("redis.start_pollers"):
+		for game_id in game_ids:
+			if redis_client is None:
+				# No coordination store: poll each game once per coordinator run
+				poll_live_game.apply_async(args=[game_id, season], kwargs={"reschedule": False}, expires=LIVE_POLL_INTERVAL)
+				started.append(game_id)
+				continue
+			try:
+				redis_client.set(_active_key(game_id), 1, ex=ACTIVE_TTL)
+				if redis_client.set(_poller_key(game_id), 1, nx=True, ex=POLLER_TTL):
+					poll_live_game.apply_async(args=[game_id, season], expires=LIVE_POLL_INTERVAL)
+					started.append(game_id)
+			except Exception as e:
+				print(f"[WARN] Redis unavailable for live coordination ({e}), polling game {game_id} once")
+				poll_live_game.apply_async(args=[game_id, season], kwargs={"reschedule": False}, expires=LIVE_POLL_INTERVAL)
+				started.append(game_id)
+
+	print(f"[INFO] {len(game_ids)} live games, started {len(started)} new pollers")
 	return {
 		"success": True,
-		"updated_count": updated,
-		"errors": errors,
-		"rescheduled_in": "30s",
+		"status": "live",
+		"live_game_ids": game_ids,
+		"pollers_started": started,
+		"timestamp": datetime.utcnow().isoformat(),
+	}
+
+@celery_app.task(name="app.tasks.realtime_tasks.poll_live_game")
+@traced
+def poll_live_game(game_id: int, season: int = 2025, reschedule: bool = True):
+	"""
+	Poll one live game's player stats and reschedule itself LIVE_POLL_INTERVAL after
+	this run started. Stops after a final poll once the coordinator no longer sees
+	the game as live.
+	"""
+	started_at = time.monotonic()
+	try:
+		result = ingest_game_stats(game_id, season=season)
+	except SoftTimeLimitExceeded:
+		# Keep the chain alive; the next poll starts on schedule
+		result = {"success": False, "game_id": game_id, "error": "poll exceeded its time limit"}
+	print(f"[INFO] Game {game_id}: {result}")
+
+	redis_client = get_sync_redis()
+	if redis_client is not None and result.get("success"):
+		_record_poll_lag(redis_client, game_id)
+	if not reschedule or redis_client is None:
+		return {**result, "rescheduled": False, "timestamp": datetime.utcnow().isoformat()}
+
+	try:
+		still_live = bool(redis_client.exists(_active_key(game_id)))
+		if still_live:
+			redis_client.expire(_poller_key(game_id), POLLER_TTL)
+		else:
+			redis_client.delete(_poller_key(game_id))
+	except Exception as e:
+		print(f"[WARN] Redis unavailable, stopping poller for game {game_id}: {e}")
+		still_live = False
+
+	if still_live:
+		countdown = max(0.0, LIVE_POLL_INTERVAL - (time.monotonic() - started_at))
+		poll_live_game.apply_async(args=[game_id, season], countdown=countdown, expires=countdown + LIVE_POLL_INTERVAL)
+
+	return {
+		**result,
+		"rescheduled": still_live,
 		"timestamp": datetime.utcnow().isoformat(),
 	}
 
+@celery_app.task(name="app.tasks.realtime_tasks.update_packers_live_stats")
+@traced
+def update_packers_live_stats(season: int = 2025, team_id: int = PACKERS_TEAM_ID):
+	"""
+	Live stats for one team's games (Packers by default).
+	Runs the coordinator restricted to games involving `team_id`.
+	"""
+	return coordinate_live_games(season=season, team_id=team_id)
@@ -0,0 +1,64 @@
+"""
+Helpers that keep Celery results small and report progress for long tasks.
+
+Results live in Redis until `result_expires`, so task return values carry counts
+and at most MAX_ERROR_SAMPLES error entries. Long loops publish a PROGRESS state
+whose meta GET /packers/roster/task/{task_id} turns into done/total, percent and an ETA.
+"""
+import time
+from typing import Any, Dict, List
+
+MAX_ERROR_SAMPLES = 5
+PROGRESS = "PROGRESS"
+
+def compact_errors(errors: List[Dict[str, Any]], limit: int = MAX_ERROR_SAMPLES) -> Dict[str, Any]:
+    """{"error_count": n, "error_samples": first `limit` errors} for a task result."""
+    return {"error_count": len(errors), "error_samples": errors[:limit]}
+
+class ProgressReporter:
+    """
+    Publishes {"done", "total", "started_at", ...} as PROGRESS meta on the running task,
+    at most every `every` items so a 1,700-player refresh doesn't write per player.
+    Does nothing when the function is called directly instead of as a Celery task.
+    """
+
+    def __init__(self, total: int, every: int = 5, **extra):
+        # Imported here: the API process reads PROGRESS states without loading Celery
+        from celery._state import get_current_worker_task
+        # The task the worker is running, even when this code runs inside another
+        # task's function called directly (update_packers_stats_postgame -> update_team_stats)
+        self._task = get_current_worker_task()
+        self._task_id = self._task.request.id if self._task is not None else None
+        self.total = total
+        self.every = max(1, every)
+        self.extra = extra
+        self.started_at = time.time()
+        self._last_reported = -1
+
+    def update(self, done: int, force: bool = False):
+        if self._task_id is None or self._task.request.is_eager:
+            return
+        if not force and done - self._last_reported < self.every and done < self.total:
+            return
+        self._last_reported = done
+        try:
+            self._task.update_state(task_id=self._task_id, state=PROGRESS, meta={
+                "done": done,
+                "total": self.total,
+                "started_at": self.started_at,
+                **self.extra,
+            })
+        except Exception as e:
+            print(f"[WARN] Could not publish task progress: {e}")
+
+def describe_progress(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Percent and ETA from PROGRESS meta (for the task status endpoint)."""
+    done, total = meta.get("done") or 0, meta.get("total") or 0
+    elapsed = time.time() - meta["started_at"] if meta.get("started_at") else None
+    eta = round(elapsed / done * (total - done), 1) if elapsed and done else None
+    return {
+        **{k: v for k, v in meta.items() if k != "started_at"},
+        "percent": round(100 * done / total, 1) if total else None,
+        "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+        "eta_seconds": eta,
+    }
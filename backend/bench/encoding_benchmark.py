@@ -0,0 +1,109 @@
+"""
+Response encoding benchmark: bytes on the wire and encode CPU per format for a full
+roster (GET /packers/roster) and a season schedule (GET /packers/games).
+
+    python -m bench.encoding_benchmark
+    python -m bench.encoding_benchmark --base-url http://127.0.0.1:8000 --link-kbps 1500
+
+By default the bodies are built from the synthetic league, shaped like the route
+responses; with --base-url they are fetched from a running API (as plain JSON).
+Formats use the same encoders and levels as app.services.response_encoding:
+JSON and MessagePack, each uncompressed, gzip and brotli. Transfer time is bytes
+over --link-kbps (default 1000, congested stadium Wi-Fi), ignoring latency.
+Formats whose optional package (msgpack, brotli) isn't installed are skipped.
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services import response_encoding as enc
+from bench.payloads import SyntheticLeague, PACKERS_TEAM_ID
+
+def _json(content: Any) -> bytes:
+    # Same settings as Starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def formats() -> Dict[str, Callable[[Any], bytes]]:
+    available: Dict[str, Callable[[Any], bytes]] = {"json": _json}
+    for encoding in enc.COMPRESSORS:
+        available[f"json+{encoding}"] = lambda content, e=encoding: enc.compress(_json(content), e)
+    if enc.msgpack is not None:
+        available["msgpack"] = enc.pack
+        for encoding in enc.COMPRESSORS:
+            available[f"msgpack+{encoding}"] = lambda content, e=encoding: enc.compress(enc.pack(content), e)
+    return available
+
+def synthetic_bodies(season: int, team_id: int) -> Dict[str, Any]:
+    """Roster and schedule responses as the routes return them (after JSON encoding of datetimes)."""
+    league = SyntheticLeague(season=season, num_teams=32)
+    now = datetime.utcnow().isoformat()
+    meta = {"season": season, "team_id": team_id, "last_updated": now, "raw_payload_id": "6650f1c2a9d3e41b2c7d8e9f"}
+    players = [{**p, **meta, "_id": f"{i:024x}", "team": "Green Bay Packers"} for i, p in enumerate(league.roster(team_id))]
+    games = [{**g, **meta, "_id": f"{i:024x}"} for i, g in enumerate(league.team_games(team_id, time.time()))]
+    freshness = {"stale": False, "age_seconds": 12.5}
+    return {
+        "roster": {"team_id": team_id, "season": season, "player_count": len(players), "players": players, **freshness},
+        "schedule": {"team_id": team_id, "season": season, "game_count": len(games), "games": games, **freshness},
+    }
+
+def fetched_bodies(base_url: str, season: int, team_id: int) -> Dict[str, Any]:
+    bodies = {}
+    for name, path in (("roster", "roster"), ("schedule", "games")):
+        req = urllib.request.Request(f"{base_url}/packers/{path}?season={season}&team_id={team_id}", headers={"Accept": "application/json", "Accept-Encoding": "identity"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            bodies[name] = json.loads(resp.read())
+    return bodies
+
+def measure(content: Any, encode: Callable[[Any], bytes], repeats: int, link_kbps: float) -> Dict[str, Any]:
+    timings: List[float] = []
+    body = b""
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = encode(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "bytes": len(body),
+        "encode_ms": round(statistics.median(timings), 3),
+        "transfer_ms": round(len(body) * 8 / link_kbps, 1),
+    }
+
+def run(bodies: Dict[str, Any], repeats: int, link_kbps: float) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"link_kbps": link_kbps, "repeats": repeats, "bodies": {}}
+    for name, content in bodies.items():
+        results = {fmt: measure(content, encode, repeats, link_kbps) for fmt, encode in formats().items()}
+        baseline = results["json"]["bytes"]
+        for result in results.values():
+            result["ratio"] = round(baseline / result["bytes"], 2)
+        report["bodies"][name] = results
+    return report
+
+def print_report(report: Dict[str, Any]):
+    for name, results in report["bodies"].items():
+        print(f"{name}:")
+        print(f"  {'format':<15} {'bytes':>9} {'vs json':>8} {'encode ms':>10} {'wire ms @' + str(int(report['link_kbps'])) + 'kbps':>18}")
+        for fmt, r in results.items():
+            print(f"  {fmt:<15} {r['bytes']:>9} {r['ratio']:>7}x {r['encode_ms']:>10} {r['transfer_ms']:>18}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare response encodings for roster and schedule bodies")
+    parser.add_argument("--base-url", help="fetch the bodies from a running API instead of the synthetic league")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--team-id", type=int, default=PACKERS_TEAM_ID)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--link-kbps", type=float, default=1000)
+    parser.add_argument("--output", help="also write the report JSON here")
+    args = parser.parse_args(argv)
+
+    bodies = fetched_bodies(args.base_url, args.season, args.team_id) if args.base_url else synthetic_bodies(args.season, args.team_id)
+    report = run(bodies, args.repeats, args.link_kbps)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
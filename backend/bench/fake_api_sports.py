@@ -0,0 +1,232 @@
+"""
+Local stand-in for the API Sports american-football API.
+
+Serves /teams, /players, /players/statistics, /games and /games/statistics/players
+from recorded payloads (if a matching file exists in --recordings) or from a
+deterministic SyntheticLeague. It can simulate a game timeline, added latency and
+429 rate limiting, and counts every request it serves.
+
+    python -m bench.fake_api_sports --port 8088 --latency-ms 80 --game-duration 600
+    API_SPORTS_BASE_URL=http://127.0.0.1:8088 celery -A app.celery_app worker
+
+Control endpoints:
+    GET  /__stats                     request counts by endpoint, 429s served
+    POST /__reset                     zero the counters
+    POST /__timeline?duration=600     start the in-window games now
+    POST /__timeline?progress=0.5     pin the timeline (0 = kickoff, 1 = final)
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from bench.payloads import SyntheticLeague, load_recording
+
+class FakeApiSports:
+    def __init__(
+        self,
+        league: Optional[SyntheticLeague] = None,
+        recordings: Optional[str] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_limit_per_minute: int = 0,
+        error_429_rate: float = 0.0,
+        daily_limit: int = 0,
+        seed: int = 7,
+    ):
+        self.league = league or SyntheticLeague()
+        self.recordings = recordings
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.error_429_rate = error_429_rate
+        self.daily_limit = daily_limit
+        self._rng = random.Random(seed)
+        self._window: deque = deque()
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self.throttled = 0
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- bookkeeping ---
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"total": sum(self.counts.values()), "by_endpoint": dict(self.counts), "throttled": self.throttled}
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.throttled = 0
+            self._window.clear()
+
+    def _rate_limit(self) -> Dict[str, str]:
+        """Returns rate-limit headers, or raises HTTPTooManyRequests."""
+        now = time.monotonic()
+        with self._lock:
+            while self._window and now - self._window[0] > 60:
+                self._window.popleft()
+            total = sum(self.counts.values())
+            limited = (
+                (self.rate_limit_per_minute and len(self._window) >= self.rate_limit_per_minute)
+                or (self.daily_limit and total >= self.daily_limit)
+                or (self.error_429_rate and self._rng.random() < self.error_429_rate)
+            )
+            headers = {}
+            if self.rate_limit_per_minute:
+                headers["X-RateLimit-Limit"] = str(self.rate_limit_per_minute)
+                headers["X-RateLimit-Remaining"] = str(max(0, self.rate_limit_per_minute - len(self._window) - 1))
+            if self.daily_limit:
+                headers["x-ratelimit-requests-limit"] = str(self.daily_limit)
+                headers["x-ratelimit-requests-remaining"] = str(max(0, self.daily_limit - total - 1))
+            if limited:
+                self.throttled += 1
+                raise web.HTTPTooManyRequests(headers={**headers, "Retry-After": "1"}, text='{"errors": {"rateLimit": "Too many requests"}}')
+            self._window.append(now)
+        return headers
+
+    # --- API handlers ---
+
+    async def _respond(self, request: web.Request, endpoint: str, build):
+        if self.latency_ms or self.jitter_ms:
+            await asyncio.sleep(max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        headers = self._rate_limit()
+        with self._lock:
+            self.counts[endpoint] += 1
+        params = dict(request.query)
+        body = load_recording(self.recordings, endpoint, params)
+        if body is None:
+            response = build(params, time.time())
+            body = {
+                "get": endpoint.strip("/"),
+                "parameters": params,
+                "errors": [],
+                "results": len(response),
+                "response": response,
+            }
+        return web.json_response(body, headers=headers)
+
+    async def teams(self, request):
+        return await self._respond(request, "/teams", lambda params, now: self.league.teams())
+
+    async def players(self, request):
+        def build(params, now):
+            if "search" in params:
+                return self.league.search_players(params["search"])
+            return self.league.roster(int(params.get("team", 0)))
+        return await self._respond(request, "/players", build)
+
+    async def player_statistics(self, request):
+        return await self._respond(request, "/players/statistics", lambda params, now: self.league.player_statistics(int(params.get("id", 0))))
+
+    async def games(self, request):
+        def build(params, now):
+            if params.get("live") == "all":
+                return self.league.live_games(now)
+            if "id" in params:
+                game = self.league.game(int(params["id"]), now)
+                return [game] if game else []
+            return self.league.team_games(int(params.get("team", 0)), now)
+        return await self._respond(request, "/games", build)
+
+    async def game_player_statistics(self, request):
+        return await self._respond(request, "/games/statistics/players", lambda params, now: self.league.game_player_statistics(int(params.get("id", 0)), now))
+
+    # --- control handlers ---
+
+    async def control_stats(self, request):
+        return web.json_response(self.stats())
+
+    async def control_reset(self, request):
+        self.reset()
+        return web.json_response({"reset": True})
+
+    async def control_timeline(self, request):
+        if "progress" in request.query:
+            self.league.timeline.set_progress(float(request.query["progress"]))
+        else:
+            self.league.timeline.start(time.time(), float(request.query.get("duration", 600)))
+        return web.json_response({"progress": self.league.timeline.progress(time.time())})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/teams", self.teams)
+        app.router.add_get("/players", self.players)
+        app.router.add_get("/players/statistics", self.player_statistics)
+        app.router.add_get("/games", self.games)
+        app.router.add_get("/games/statistics/players", self.game_player_statistics)
+        app.router.add_get("/__stats", self.control_stats)
+        app.router.add_post("/__reset", self.control_reset)
+        app.router.add_post("/__timeline", self.control_timeline)
+        return app
+
+    # --- running ---
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve from a background thread (for harnesses). Returns the base URL."""
+        ready = threading.Event()
+        bound: Dict[str, int] = {}
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, host, port)
+            self._loop.run_until_complete(site.start())
+            bound["port"] = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        ready.wait(10)
+        return f"http://{host}:{bound['port']}"
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline API Sports stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--recordings", help="directory of recorded responses (see payloads.recording_filename)")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--current-week", type=int, default=9)
+    parser.add_argument("--game-duration", type=float, default=0, help="start the current week's games now, lasting N seconds")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--daily-limit", type=int, default=0)
+    parser.add_argument("--error-429-rate", type=float, default=0, help="probability of a random 429")
+    args = parser.parse_args()
+
+    league = SyntheticLeague(season=args.season, num_teams=args.teams, current_week=args.current_week)
+    if args.game_duration:
+        league.timeline.start(time.time(), args.game_duration)
+    fake = FakeApiSports(
+        league=league,
+        recordings=args.recordings,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_per_minute=args.rate_limit,
+        error_429_rate=args.error_429_rate,
+        daily_limit=args.daily_limit,
+    )
+    print(f"Fake API Sports on http://{args.host}:{args.port}")
+    web.run_app(fake.app(), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+End-to-end ingestion benchmark: runs the real Celery task functions in-process
+against the offline API Sports stand-in and a local MongoDB, and reports per task:
+wall time, upstream API calls, Mongo commands and peak Python memory.
+
+    python -m bench.ingestion_benchmark --mongo-url mongodb://localhost:27017 --output bench_ingestion.json
+
+The benchmark database is dropped at the start of each run. The response cache and
+Redis-backed quota/circuit state are disabled unless --redis-url is given, so the
+numbers reflect the ingestion code itself.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from pymongo import monitoring
+
+from bench.fake_api_sports import FakeApiSports
+from bench.payloads import SyntheticLeague, PACKERS_TEAM_ID
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """Counts commands (find, insert, update, delete, ...) sent by every MongoClient."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.duration_us = 0
+
+    def started(self, event):
+        self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        self.duration_us += event.duration_micros
+
+    def failed(self, event):
+        self.duration_us += event.duration_micros
+
+    def snapshot(self):
+        return Counter(self.counts), self.duration_us
+
+# Commands issued by the driver itself rather than by our code
+_DRIVER_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "buildInfo", "saslStart", "saslContinue"}
+
+def _measure(name: str, fn: Callable[[], Any], fake: FakeApiSports, mongo: MongoCommandCounter) -> Dict[str, Any]:
+    api_before = fake.stats()["total"]
+    ops_before, mongo_us_before = mongo.snapshot()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ops_after, mongo_us_after = mongo.snapshot()
+    ops = {k: v for k, v in (ops_after - ops_before).items() if k not in _DRIVER_COMMANDS}
+    return {
+        "task": name,
+        "wall_seconds": round(wall, 4),
+        "api_calls": fake.stats()["total"] - api_before,
+        "db_ops": sum(ops.values()),
+        "db_ops_by_command": ops,
+        "db_time_seconds": round((mongo_us_after - mongo_us_before) / 1e6, 4),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "success": bool(result.get("success")) if isinstance(result, dict) else None,
+    }
+
+def run(args) -> List[Dict[str, Any]]:
+    league = SyntheticLeague(season=args.season, num_teams=args.teams, current_week=args.current_week)
+    fake = FakeApiSports(league=league, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit_per_minute=args.rate_limit)
+    base_url = fake.start_in_thread()
+
+    # Configure the app before it is imported; config.py reads the environment once.
+    os.environ["API_SPORTS_BASE_URL"] = base_url
+    os.environ.setdefault("API_KEY", "bench")
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ["REDIS_URL"] = args.redis_url or ""
+    os.environ["API_CACHE_ENABLED"] = "true" if args.redis_url else "false"
+
+    mongo = MongoCommandCounter()
+    monitoring.register(mongo)
+
+    from pymongo import MongoClient
+    from app.celery_app import celery_app
+    from app.tasks.periodic_tasks import update_packers_roster, update_packers_games, update_packers_stats_postgame
+    from app.tasks.realtime_tasks import coordinate_live_games, poll_live_game
+
+    # The coordinator dispatches per-game pollers; keep those messages in memory instead
+    # of a broker and run the polls inline below.
+    celery_app.conf.broker_url = "memory://"
+    celery_app.conf.result_backend = "cache+memory://"
+
+    MongoClient(args.mongo_url).drop_database(args.database)
+
+    results = [
+        _measure("update_packers_roster", lambda: update_packers_roster(season=args.season), fake, mongo),
+        _measure("update_packers_games", lambda: update_packers_games(season=args.season), fake, mongo),
+        _measure("update_packers_stats_postgame", lambda: update_packers_stats_postgame(season=args.season, force=True), fake, mongo),
+    ]
+    def live_tick():
+        coordinated = coordinate_live_games(season=args.season)
+        polls = [poll_live_game(game_id, args.season, reschedule=False) for game_id in coordinated.get("live_game_ids", [])]
+        return {"success": coordinated.get("success") and all(p.get("success") for p in polls)}
+
+    for tick in range(1, args.live_ticks + 1):
+        league.timeline.set_progress(tick / (args.live_ticks + 1))
+        results.append(_measure(f"live_tick[{tick}] ({len(league.live_games(time.time()))} games)", live_tick, fake, mongo))
+
+    fake.stop()
+    return results
+
+def print_table(results: List[Dict[str, Any]]):
+    header = f"{'task':38} {'wall s':>8} {'api':>5} {'db ops':>7} {'db s':>7} {'peak MB':>8} {'ok':>3}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['task']:38} {r['wall_seconds']:>8.3f} {r['api_calls']:>5} {r['db_ops']:>7} {r['db_time_seconds']:>7.3f} {r['peak_memory_mb']:>8.2f} {'y' if r['success'] else 'n':>3}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion tasks against the offline API stand-in")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="packers_hub_bench")
+    parser.add_argument("--redis-url", default="", help="enable cache/quota/circuit state against this Redis")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--current-week", type=int, default=9)
+    parser.add_argument("--live-ticks", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"team_id": PACKERS_TEAM_ID, "args": vars(args), "results": results}, f, indent=2)
+    if not all(r["success"] for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
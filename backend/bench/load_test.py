@@ -0,0 +1,184 @@
+"""
+HTTP load test for the FastAPI read paths.
+
+Drives a running backend (seeded with bench.seed_data) with a weighted traffic
+mix from N concurrent clients and reports throughput and p50/p95/p99 latency
+per route. Results can be saved as a baseline and later runs compared to it.
+
+    uvicorn app.main:app --port 8000 --workers 2        # with DATABASE_NAME=packers_hub_load
+    python -m bench.load_test --mix gameday --concurrency 50 --duration 30 --save-baseline
+    python -m bench.load_test --mix gameday --concurrency 50 --duration 30 --compare
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+import aiohttp
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# route label -> weight. Game day is dominated by the 30s live-stats poll from every
+# open browser; the off-season is mostly roster browsing and search.
+MIXES: Dict[str, Dict[str, float]] = {
+    "gameday": {"live-stats": 0.50, "games": 0.20, "player-search": 0.12, "roster": 0.10, "player-stats": 0.08},
+    "offseason": {"roster": 0.35, "player-search": 0.35, "player-stats": 0.20, "games": 0.10},
+}
+
+class Workload:
+    """Builds requests from the seeded roster so searches and ID lookups hit real data."""
+
+    def __init__(self, season: int, players: List[Dict[str, Any]], rng: random.Random):
+        self.season = season
+        self.players = players
+        self.rng = rng
+
+    def request(self, route: str) -> Tuple[str, str, Any]:
+        if route == "roster":
+            return "GET", f"/packers/roster?season={self.season}", None
+        if route == "games":
+            return "GET", f"/packers/games?season={self.season}", None
+        if route == "player-search":
+            name = self.rng.choice(self.players)["name"]
+            # Users type partial names: last name or a prefix of it
+            term = name.split()[-1][: self.rng.randint(3, 8)]
+            return "GET", f"/packers/player/{term}?season={self.season}", None
+        if route == "player-stats":
+            return "GET", f"/packers/player/{self.rng.choice(self.players)['id']}/stats?season={self.season}", None
+        if route == "live-stats":
+            # A browser polls for its favorites: a handful of players
+            ids = [p["id"] for p in self.rng.sample(self.players, k=min(len(self.players), self.rng.randint(3, 8)))]
+            return "POST", "/packers/live-stats", {"player_ids": ids, "season": self.season}
+        raise ValueError(route)
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+async def _client(session, base_url, workload, mix, deadline, latencies, errors, rng):
+    routes, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        route = rng.choices(routes, weights)[0]
+        method, path, body = workload.request(route)
+        started = time.perf_counter()
+        try:
+            async with session.request(method, base_url + path, json=body) as resp:
+                await resp.read()
+                ok = resp.status == 200
+        except aiohttp.ClientError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if ok:
+            latencies[route].append(elapsed_ms)
+        else:
+            errors[route] += 1
+
+async def run(base_url: str, mix_name: str, concurrency: int, duration: float, season: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.get(f"{base_url}/packers/roster?season={season}") as resp:
+            players = (await resp.json()).get("players", [])
+        if not players:
+            raise SystemExit(f"No roster for season {season} at {base_url}; seed the database first (python -m bench.seed_data)")
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+        await asyncio.gather(*[
+            _client(session, base_url, Workload(season, players, random.Random(seed + i)), MIXES[mix_name], deadline, latencies, errors, random.Random(seed * 31 + i))
+            for i in range(concurrency)
+        ])
+        elapsed = time.monotonic() - started
+
+    routes = {}
+    for route in MIXES[mix_name]:
+        values = sorted(latencies.get(route, []))
+        routes[route] = {
+            "requests": len(values),
+            "errors": errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    total = sum(r["requests"] for r in routes.values())
+    return {
+        "mix": mix_name,
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 2),
+        "total_rps": round(total / elapsed, 1),
+        "routes": routes,
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"mix={report['mix']} concurrency={report['concurrency']} duration={report['duration_seconds']}s total={report['total_rps']} req/s")
+    header = f"{'route':15} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for route, r in report["routes"].items():
+        print(f"{route:15} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Routes whose p95 got worse, or throughput dropped, by more than `tolerance` (0.2 = 20%)."""
+    regressions = []
+    for route, now in report["routes"].items():
+        before = baseline["routes"].get(route)
+        if not before or not before["requests"]:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before["rps"] and now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {before['rps']} -> {now['rps']} req/s")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{route}: errors {before['errors']} -> {now['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Packers Hub read API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="gameday")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_DIR}/<mix>.json")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output", help="also write the report JSON here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.base_url, args.mix, args.concurrency, args.duration, args.season, args.seed))
+    print_report(report)
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.mix}.json")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    if args.compare:
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {baseline_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Synthetic API Sports payloads for the offline stand-in and benchmarks.
+
+Everything is generated deterministically from a seed, shaped like the real
+american-football API responses that NFL_service/db_service parse.
+"""
+import json
+import os
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+PACKERS_TEAM_ID = 15
+LEAGUE = {"id": 1, "name": "NFL", "season": "2025", "logo": ""}
+
+# Roster template: position -> count (53-man roster)
+ROSTER_TEMPLATE = [
+    ("QB", 3), ("RB", 4), ("FB", 1), ("WR", 6), ("TE", 3), ("OT", 5), ("G", 4),
+    ("DE", 4), ("DT", 4), ("LB", 6), ("CB", 6), ("S", 4), ("K", 1), ("P", 1), ("LS", 1),
+]
+OFFENSE = {"QB", "RB", "FB", "WR", "TE", "OT", "G"}
+DEFENSE = {"DE", "DT", "LB", "CB", "S"}
+
+FIRST_NAMES = ["Jordan", "Josh", "Aaron", "Christian", "Jayden", "Romeo", "Tucker", "Rashan", "Xavier", "Jaire", "Quay", "Edgerrin", "Lukas", "Brandon", "Malik"]
+LAST_NAMES = ["Love", "Jacobs", "Watson", "Doubs", "Reed", "Kraft", "Gary", "Walker", "McKinney", "Alexander", "Cooper", "Wyatt", "Van Ness", "McManus", "Willis"]
+
+def team_info(team_id: int) -> Dict[str, Any]:
+    name = "Green Bay Packers" if team_id == PACKERS_TEAM_ID else f"Team {team_id}"
+    return {"id": team_id, "name": name, "logo": f"https://media.example/teams/{team_id}.png"}
+
+def _num(value: float) -> str:
+    """API Sports sends numbers as strings, thousands with commas."""
+    return f"{int(round(value)):,}"
+
+class GameTimeline:
+    """Progress of the in-window game: 0.0 = kickoff pending, 1.0 = final."""
+
+    def __init__(self, duration_seconds: float = 0.0):
+        self.duration_seconds = duration_seconds
+        self.started_at: Optional[float] = None
+        self.manual_progress: Optional[float] = None
+
+    def start(self, now: float, duration_seconds: Optional[float] = None):
+        if duration_seconds is not None:
+            self.duration_seconds = duration_seconds
+        self.started_at = now
+        self.manual_progress = None
+
+    def set_progress(self, progress: float):
+        self.manual_progress = max(0.0, min(1.0, progress))
+
+    def progress(self, now: float) -> float:
+        if self.manual_progress is not None:
+            return self.manual_progress
+        if self.started_at is None or self.duration_seconds <= 0:
+            return 0.0
+        return max(0.0, min(1.0, (now - self.started_at) / self.duration_seconds))
+
+    @staticmethod
+    def status(progress: float) -> Dict[str, Any]:
+        if progress <= 0:
+            return {"short": "NS", "long": "Not Started", "timer": None}
+        if progress >= 1:
+            return {"short": "FT", "long": "Finished", "timer": None}
+        quarter = min(4, int(progress * 4) + 1)
+        remaining = 15 * (1 - (progress * 4 - (quarter - 1)))
+        return {"short": f"Q{quarter}", "long": f"{quarter} Quarter", "timer": f"{int(remaining):02d}:{int(remaining % 1 * 60):02d}"}
+
+class SyntheticLeague:
+    """
+    A deterministic league: `num_teams` teams with 53-man rosters and a round-robin
+    schedule. Weeks before `current_week` are final, `current_week` follows the
+    timeline, later weeks are not started. With anchor_today the current week's
+    games are dated today, so the live coordinator's "games today" gate passes.
+    """
+
+    def __init__(self, season: int = 2025, num_teams: int = 32, weeks: int = 17, current_week: int = 9, seed: int = 7, anchor_today: bool = True):
+        self.season = season
+        self.team_ids = list(range(1, num_teams + 1))
+        if PACKERS_TEAM_ID not in self.team_ids:
+            self.team_ids[-1] = PACKERS_TEAM_ID
+        self.weeks = weeks
+        self.current_week = current_week
+        self.seed = seed
+        self.anchor_today = anchor_today
+        self.timeline = GameTimeline()
+        self._rosters = {team_id: self._build_roster(team_id) for team_id in self.team_ids}
+        self._players = {p["id"]: (team_id, p) for team_id, roster in self._rosters.items() for p in roster}
+        self._schedule = self._build_schedule()
+
+    # --- rosters ---
+
+    def _build_roster(self, team_id: int) -> List[Dict[str, Any]]:
+        rng = random.Random(self.seed * 1000 + team_id)
+        roster = []
+        number = 1
+        for position, count in ROSTER_TEMPLATE:
+            for _ in range(count):
+                player_id = team_id * 1000 + len(roster) + 1
+                group = "Offense" if position in OFFENSE else "Defense" if position in DEFENSE else "Special Teams"
+                roster.append({
+                    "id": player_id,
+                    "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "age": rng.randint(21, 35),
+                    "height": f"6' {rng.randint(0, 6)}\"",
+                    "weight": f"{rng.randint(185, 330)} lbs",
+                    "college": "State",
+                    "group": group,
+                    "position": position,
+                    "number": number,
+                    "salary": None,
+                    "experience": rng.randint(0, 12),
+                    "image": f"https://media.example/players/{player_id}.png",
+                })
+                number += 1
+        return roster
+
+    def roster(self, team_id: int) -> List[Dict[str, Any]]:
+        return self._rosters.get(team_id, [])
+
+    def search_players(self, query: str) -> List[Dict[str, Any]]:
+        q = query.lower()
+        return [p for _, p in self._players.values() if q in p["name"].lower()]
+
+    # --- schedule ---
+
+    def _build_schedule(self) -> Dict[int, Dict[str, Any]]:
+        """Circle-method round robin; one game per team per week."""
+        teams = list(self.team_ids)
+        if len(teams) % 2:
+            teams.append(None)  # bye
+        games = {}
+        if self.anchor_today:
+            kickoff = date.today() - timedelta(days=7 * (self.current_week - 1))
+        else:
+            kickoff = date(self.season, 9, 7)
+        for week in range(1, self.weeks + 1):
+            for i in range(len(teams) // 2):
+                home, away = teams[i], teams[-1 - i]
+                if home is None or away is None:
+                    continue
+                if week % 2 == 0:
+                    home, away = away, home
+                game_id = self.season * 10000 + week * 100 + i
+                games[game_id] = {"id": game_id, "week": week, "home": home, "away": away, "date": kickoff + timedelta(days=7 * (week - 1))}
+            teams = [teams[0], teams[-1]] + teams[1:-1]
+        return games
+
+    def _progress(self, week: int, now: float) -> float:
+        if week < self.current_week:
+            return 1.0
+        if week > self.current_week:
+            return 0.0
+        return self.timeline.progress(now)
+
+    def game(self, game_id: int, now: float) -> Optional[Dict[str, Any]]:
+        g = self._schedule.get(game_id)
+        if g is None:
+            return None
+        progress = self._progress(g["week"], now)
+        rng = random.Random(self.seed + game_id)
+        home_final, away_final = rng.randint(10, 38), rng.randint(10, 38)
+        return {
+            "game": {
+                "id": game_id,
+                "stage": "Regular Season",
+                "week": f"Week {g['week']}",
+                "date": {"timezone": "America/Chicago", "date": g["date"].isoformat(), "time": "12:00", "timestamp": 0},
+                "venue": {"name": f"Stadium {g['home']}", "city": "City"},
+                "status": GameTimeline.status(progress),
+            },
+            "league": LEAGUE,
+            "teams": {"home": team_info(g["home"]), "away": team_info(g["away"])},
+            "scores": {
+                "home": {"total": int(home_final * progress) if progress > 0 else None},
+                "away": {"total": int(away_final * progress) if progress > 0 else None},
+            },
+        }
+
+    def team_games(self, team_id: int, now: float) -> List[Dict[str, Any]]:
+        return [self.game(gid, now) for gid, g in self._schedule.items() if team_id in (g["home"], g["away"])]  # type: ignore[misc]
+
+    def live_games(self, now: float) -> List[Dict[str, Any]]:
+        live = []
+        for gid, g in self._schedule.items():
+            progress = self._progress(g["week"], now)
+            if 0 < progress < 1:
+                live.append(self.game(gid, now))
+        return live  # type: ignore[return-value]
+
+    # --- stats ---
+
+    def _rates(self, player_id: int) -> random.Random:
+        return random.Random(self.seed * 7919 + player_id)
+
+    def player_statistics(self, player_id: int) -> List[Dict[str, Any]]:
+        """Season-to-date stats in the /players/statistics shape."""
+        entry = self._players.get(player_id)
+        if entry is None:
+            return []
+        team_id, player = entry
+        games = self.current_week - 1
+        rng = self._rates(player_id)
+        groups = []
+        position = player["position"]
+        if position == "QB":
+            att = rng.randint(25, 38) * games
+            groups.append({"name": "Passing", "statistics": [
+                {"name": "passing attempts", "value": _num(att)},
+                {"name": "completions", "value": _num(att * 0.65)},
+                {"name": "yards", "value": _num(att * 7.4)},
+                {"name": "passing touchdowns", "value": _num(games * 1.8)},
+                {"name": "interceptions thrown", "value": _num(games * 0.7)},
+            ]})
+        if position in ("QB", "RB", "FB"):
+            carries = rng.randint(2, 18) * games
+            groups.append({"name": "Rushing", "statistics": [
+                {"name": "rushing attempts", "value": _num(carries)},
+                {"name": "yards", "value": _num(carries * 4.3)},
+                {"name": "rushing touchdowns", "value": _num(carries / 30)},
+            ]})
+        if position in ("RB", "WR", "TE"):
+            targets = rng.randint(2, 9) * games
+            groups.append({"name": "Receiving", "statistics": [
+                {"name": "receiving targets", "value": _num(targets)},
+                {"name": "receptions", "value": _num(targets * 0.66)},
+                {"name": "receiving yards", "value": _num(targets * 8.1)},
+                {"name": "receiving touchdowns", "value": _num(targets / 22)},
+            ]})
+        if position in DEFENSE:
+            groups.append({"name": "Defense", "statistics": [
+                {"name": "total tackles", "value": _num(rng.randint(1, 8) * games)},
+                {"name": "sacks", "value": f"{rng.randint(0, 10) * games / 10:.1f}"},
+                {"name": "interceptions", "value": _num(rng.randint(0, 2) * games / 8)},
+                {"name": "forced fumbles", "value": _num(rng.randint(0, 2) * games / 8)},
+            ]})
+        if position == "K":
+            groups.append({"name": "Kicking", "statistics": [
+                {"name": "field goals made", "value": _num(games * 1.7)},
+                {"name": "field goal attempts", "value": _num(games * 2)},
+                {"name": "extra points made", "value": _num(games * 2.5)},
+                {"name": "extra point attempts", "value": _num(games * 2.6)},
+            ]})
+        if position == "P":
+            punts = games * 4
+            groups.append({"name": "Punting", "statistics": [
+                {"name": "punts", "value": _num(punts)},
+                {"name": "gross punt yards", "value": _num(punts * 46)},
+                {"name": "yards per punt avg", "value": "46.0"},
+                {"name": "punts inside 20", "value": _num(punts * 0.4)},
+                {"name": "touchbacks", "value": _num(punts * 0.1)},
+            ]})
+        if not groups:
+            return []
+        return [{
+            "player": {"id": player_id, "name": player["name"], "image": player["image"]},
+            "teams": [{"team": team_info(team_id), "groups": groups}],
+        }]
+
+    def game_player_statistics(self, game_id: int, now: float) -> List[Dict[str, Any]]:
+        """Per-game stats in the /games/statistics/players shape, scaled by game progress."""
+        g = self._schedule.get(game_id)
+        if g is None:
+            return []
+        p = self._progress(g["week"], now)
+        response = []
+        for team_id in (g["home"], g["away"]):
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            starter_qb = self._first(team_id, "QB")
+            for player in self._rosters[team_id]:
+                rng = self._rates(player["id"] + game_id)
+                position = player["position"]
+                stat_player = {"id": player["id"], "name": player["name"], "image": player["image"]}
+
+                def add(group_name, statistics):
+                    groups.setdefault(group_name, []).append({"player": stat_player, "statistics": statistics})
+
+                if player is starter_qb:
+                    att = int(rng.randint(28, 40) * p)
+                    add("Passing", [
+                        {"name": "comp att", "value": f"{int(att * 0.65)}/{att}"},
+                        {"name": "yards", "value": _num(att * 7.2)},
+                        {"name": "passing touch downs", "value": _num(2 * p)},
+                        {"name": "interceptions", "value": _num(rng.randint(0, 1) * p)},
+                    ])
+                if position in ("QB", "RB"):
+                    rushes = int(rng.randint(2, 20) * p)
+                    add("Rushing", [
+                        {"name": "total rushes", "value": _num(rushes)},
+                        {"name": "yards", "value": _num(rushes * 4.2)},
+                        {"name": "rushing touch downs", "value": _num(rushes / 25)},
+                    ])
+                if position in ("RB", "WR", "TE"):
+                    targets = int(rng.randint(1, 10) * p)
+                    add("Receiving", [
+                        {"name": "targets", "value": _num(targets)},
+                        {"name": "total receptions", "value": _num(targets * 0.66)},
+                        {"name": "yards", "value": _num(targets * 8)},
+                        {"name": "receiving touch downs", "value": _num(targets / 20)},
+                    ])
+                if position in DEFENSE:
+                    add("Defensive", [
+                        {"name": "tackles", "value": _num(rng.randint(0, 9) * p)},
+                        {"name": "sacks", "value": _num(rng.randint(0, 2) * p)},
+                        {"name": "ff", "value": _num(rng.randint(0, 1) * p)},
+                    ])
+                if position == "K":
+                    fga = int(3 * p)
+                    add("Kicking", [
+                        {"name": "field goals", "value": f"{max(0, fga - 1)}/{fga}"},
+                        {"name": "extra point", "value": f"{int(3 * p)}/{int(3 * p)}"},
+                        {"name": "points", "value": _num(max(0, fga - 1) * 3 + int(3 * p))},
+                    ])
+                if position == "P":
+                    punts = int(5 * p)
+                    add("Punting", [
+                        {"name": "total", "value": _num(punts)},
+                        {"name": "yards", "value": _num(punts * 45)},
+                    ])
+            if p > 0:
+                response.append({
+                    "team": team_info(team_id),
+                    "groups": [{"name": name, "players": players} for name, players in groups.items()],
+                })
+        return response
+
+    def _first(self, team_id: int, position: str) -> Optional[Dict[str, Any]]:
+        return next((p for p in self._rosters[team_id] if p["position"] == position), None)
+
+    def current_game_id(self, team_id: int) -> Optional[int]:
+        return next((gid for gid, g in self._schedule.items() if g["week"] == self.current_week and team_id in (g["home"], g["away"])), None)
+
+    def teams(self) -> List[Dict[str, Any]]:
+        return [{"team": team_info(team_id)} for team_id in self.team_ids]
+
+# --- Recorded payloads ---
+
+def recording_filename(endpoint: str, params: Dict[str, Any]) -> str:
+    """File name for a recorded response, e.g. players_statistics__id=1049&season=2025.json."""
+    normalized = "&".join(f"{k}={v}" for k, v in sorted((str(k), str(v)) for k, v in params.items()))
+    return f"{endpoint.strip('/').replace('/', '_')}__{normalized}.json"
+
+def load_recording(directory: Optional[str], endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return a recorded full response body if one exists for this request."""
+    if not directory:
+        return None
+    path = os.path.join(directory, recording_filename(endpoint, params))
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_recording(directory: str, endpoint: str, params: Dict[str, Any], body: Dict[str, Any]):
+    """Store a real API response so the stand-in can replay it."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, recording_filename(endpoint, params)), "w") as f:
+        json.dump(body, f)
@@ -0,0 +1,105 @@
+"""
+Seed a MongoDB database with synthetic Packers Hub data at configurable scale.
+
+Documents have the same shape the Celery tasks write (players, games,
+player_stats, live_stats), so the FastAPI read paths can be load tested
+without the upstream API.
+
+    python -m bench.seed_data --mongo-url mongodb://localhost:27017 --database packers_hub_load --seasons 5 --teams 32
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import MongoClient
+
+from bench.payloads import SyntheticLeague, team_info
+
+def _batched_insert(collection, docs: List[Dict[str, Any]], batch_size: int = 5000) -> int:
+    for i in range(0, len(docs), batch_size):
+        collection.insert_many(docs[i:i + batch_size], ordered=False)
+    return len(docs)
+
+def seed(mongo_url: str, database: str, seasons: int, teams: int, last_season: int = 2025, current_week: int = 9, live: bool = True, drop: bool = True) -> Dict[str, int]:
+    # Imported lazily so this module can be used without app configuration
+    from app.services.db_service import aggregate_season_stats
+
+    db = MongoClient(mongo_url)[database]
+    if drop:
+        for name in ("players", "games", "player_stats", "live_stats"):
+            db[name].drop()
+
+    counts = {"players": 0, "games": 0, "player_stats": 0, "live_stats": 0}
+    now = datetime.utcnow()
+    epoch = time.time()
+    for season in range(last_season - seasons + 1, last_season + 1):
+        in_progress = season == last_season
+        league = SyntheticLeague(season=season, num_teams=teams, current_week=current_week if in_progress else 18, seed=season, anchor_today=in_progress)
+        if in_progress and live:
+            league.timeline.set_progress(0.5)
+
+        players, games, stats, live_docs = [], [], [], []
+        seen_games = set()
+        for team_id in league.team_ids:
+            team_name = team_info(team_id)["name"]
+            for player in league.roster(team_id):
+                players.append({**player, "season": season, "last_updated": now, "team": team_name, "team_id": team_id})
+                payload = league.player_statistics(player["id"])
+                if payload:
+                    team_entry = payload[0]["teams"][0]
+                    stats.append({
+                        "player_id": player["id"],
+                        "player_name": player["name"],
+                        "position": player["position"],
+                        "season": season,
+                        "stats": aggregate_season_stats(team_entry["groups"]),
+                        "raw_payload_id": None,
+                        "last_updated": now,
+                    })
+            for game in league.team_games(team_id, epoch):
+                games.append({**game, "season": season, "team_id": team_id, "last_updated": now})
+                game_id = game["game"]["id"]
+                if in_progress and live and game["game"]["status"]["short"].startswith("Q") and game_id not in seen_games:
+                    seen_games.add(game_id)
+                    for team_stats in league.game_player_statistics(game_id, epoch):
+                        by_player: Dict[int, Dict[str, Any]] = {}
+                        for group in team_stats["groups"]:
+                            for item in group["players"]:
+                                entry = by_player.setdefault(item["player"]["id"], {"player": item["player"], "groups": []})
+                                entry["groups"].append({"name": group["name"], "statistics": item["statistics"]})
+                        for player_id, entry in by_player.items():
+                            live_docs.append({
+                                "game_id": game_id,
+                                "player_id": player_id,
+                                "season": season,
+                                "player_data": entry["player"],
+                                "team_data": team_stats["team"],
+                                "groups": entry["groups"],
+                                "last_updated": now,
+                            })
+
+        counts["players"] += _batched_insert(db["players"], players)
+        counts["games"] += _batched_insert(db["games"], games)
+        counts["player_stats"] += _batched_insert(db["player_stats"], stats)
+        if live_docs:
+            counts["live_stats"] += _batched_insert(db["live_stats"], live_docs)
+        print(f"Seeded season {season}: {len(players)} players, {len(games)} games, {len(stats)} stat docs, {len(live_docs)} live docs")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed MongoDB with synthetic Packers Hub data")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="packers_hub_load")
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--last-season", type=int, default=2025)
+    parser.add_argument("--current-week", type=int, default=9)
+    parser.add_argument("--no-live", action="store_true", help="don't create in-progress games / live_stats")
+    parser.add_argument("--keep", action="store_true", help="don't drop existing collections first")
+    args = parser.parse_args()
+    counts = seed(args.mongo_url, args.database, args.seasons, args.teams, args.last_season, args.current_week, live=not args.no_live, drop=not args.keep)
+    print(f"Done: {counts}")
+
+if __name__ == "__main__":
+    main()
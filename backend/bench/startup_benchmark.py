@@ -0,0 +1,153 @@
+"""
+Cold-start benchmark for the API process: how long a fresh process takes to import
+app.main, and how long a freshly spawned uvicorn takes to answer its first
+successful GET /packers/roster (spawn to 200 with a roster body).
+
+    python -m bench.startup_benchmark --mongo-url mongodb://localhost:27017 --database packers_hub_load --runs 5
+    python -m bench.startup_benchmark --imports-only
+
+Every run uses a new interpreter, so module caches don't carry over. The import step
+also lists which heavy modules the web process ended up loading; Celery's app and
+task modules, requests and aiohttp should only appear once a request needs them.
+Seed the database first (python -m bench.seed_data) so the roster request succeeds.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the API process shouldn't need before its first request
+HEAVY_MODULES = ["app.celery_app", "app.tasks.periodic_tasks", "app.tasks.backfill_tasks", "app.services.NFL_service", "kombu", "requests", "aiohttp"]
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def measure_first_roster(env: Dict[str, str], season: int, timeout: float) -> Dict[str, Any]:
+    """Spawn uvicorn and poll /packers/roster until it returns players (or `timeout`)."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/packers/roster?season={season}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    listening_ms, error = None, None
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                error = f"uvicorn exited: {proc.stderr.read()[-500:]}"
+                break
+            remaining = max(0.1, timeout - (time.perf_counter() - started))
+            try:
+                with urllib.request.urlopen(url, timeout=remaining) as resp:
+                    body = json.loads(resp.read())
+                if listening_ms is None:
+                    listening_ms = (time.perf_counter() - started) * 1000
+                if resp.status == 200 and body.get("players"):
+                    return {"first_roster_ms": (time.perf_counter() - started) * 1000, "listening_ms": listening_ms}
+                error = body.get("error") or body.get("message") or "empty roster"
+            except urllib.error.HTTPError as e:
+                if listening_ms is None:
+                    listening_ms = (time.perf_counter() - started) * 1000
+                error = f"HTTP {e.code}"
+            except urllib.error.URLError:
+                pass  # not listening yet
+            except OSError as e:
+                error = f"request failed: {e}"
+            time.sleep(0.01)
+        return {"first_roster_ms": None, "listening_ms": listening_ms, "error": error or "timed out"}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"runs": 0}
+    return {
+        "runs": len(values),
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1),
+    }
+
+def run(runs: int, mongo_url: str, database: str, season: int, timeout: float, imports_only: bool) -> Dict[str, Any]:
+    env = {
+        **os.environ,
+        "MONGO_URL": mongo_url,
+        "DATABASE_NAME": database,
+        "PYTHONPATH": BACKEND_DIR,
+    }
+    imports = [measure_import(env) for _ in range(runs)]
+    report: Dict[str, Any] = {
+        "import": {**_summary([i["ms"] for i in imports]), "heavy_modules_loaded": imports[-1]["loaded"]},
+    }
+    if not imports_only:
+        rosters = [measure_first_roster(env, season, timeout) for _ in range(runs)]
+        report["first_roster"] = {
+            **_summary([r["first_roster_ms"] for r in rosters if r["first_roster_ms"] is not None]),
+            "listening": _summary([r["listening_ms"] for r in rosters if r["listening_ms"] is not None]),
+            "errors": [r["error"] for r in rosters if r.get("error")],
+        }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    imp = report["import"]
+    print(f"import app.main:       median {imp['median_ms']}ms (min {imp['min_ms']}, max {imp['max_ms']}) over {imp['runs']} runs")
+    print(f"heavy modules loaded:  {', '.join(imp['heavy_modules_loaded']) or 'none'}")
+    first = report.get("first_roster")
+    if first is None:
+        return
+    if first["runs"]:
+        print(f"spawn -> first roster: median {first['median_ms']}ms (min {first['min_ms']}, max {first['max_ms']}) over {first['runs']} runs")
+    if first["listening"]["runs"]:
+        print(f"spawn -> listening:    median {first['listening']['median_ms']}ms")
+    for error in first["errors"]:
+        print(f"  failed run: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API process cold start")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="packers_hub_load")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for the first roster per run")
+    parser.add_argument("--imports-only", action="store_true", help="skip the uvicorn / first-request measurement")
+    parser.add_argument("--output", help="also write the report JSON here")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.mongo_url, args.database, args.season, args.timeout, args.imports_only)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report.get("first_roster", {}).get("errors"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
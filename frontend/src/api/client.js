@@ -20,13 +20,17 @@ export const api = {
    * Search for Packers players by name
    * @param {string} playerName - Player name to search
    * @param {boolean} forceRefresh - Force API refresh instead of using DB cache
+   * @param {string[]} include - Joined per result: "season_stats", "live_stats"
    * @returns {Promise<Object>} Search results with players array
    */
-  async searchPlayers(playerName, forceRefresh = false) {
+  async searchPlayers(playerName, forceRefresh = false, include = []) {
+    const includeParam = include.length
+      ? `&include=${include.join(",")}`
+      : "";
     const response = await fetch(
       `${BASE_URL}/packers/player/${encodeURIComponent(
         playerName
-      )}?fallback_api=${forceRefresh}`
+      )}?fallback_api=${forceRefresh}${includeParam}`
     );
     if (!response.ok) throw new Error("Failed to search players");
     return response.json();
@@ -75,6 +79,32 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * Get the Packers' current game (live, or the next one to be played)
+   * @param {number} season - Season year (default: 2025)
+   * @returns {Promise<Object>} { game } with game null when the season is over
+   */
+  async getNextGame(season = 2025) {
+    const response = await fetch(
+      `${BASE_URL}/packers/games/next?season=${season}`
+    );
+    if (!response.ok) throw new Error("Failed to fetch next game");
+    return response.json();
+  },
+
+  /**
+   * Get the Packers' game in progress
+   * @param {number} season - Season year (default: 2025)
+   * @returns {Promise<Object>} { live, game } with game null when none is live
+   */
+  async getLiveGame(season = 2025) {
+    const response = await fetch(
+      `${BASE_URL}/packers/games/live?season=${season}`
+    );
+    if (!response.ok) throw new Error("Failed to fetch live game");
+    return response.json();
+  },
+
   /**
    * Manually trigger roster update (admin function)
    * @param {number} season - Season year
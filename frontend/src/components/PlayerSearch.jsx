@@ -13,7 +13,11 @@ export default function PlayerSearch({ onSearch }) {
 
     setIsSearching(true);
     try {
-      const data = await api.searchPlayers(searchTerm);
+      // Season and live stats come back with the hits: one request per search
+      const data = await api.searchPlayers(searchTerm, false, [
+        "season_stats",
+        "live_stats",
+      ]);
       onSearch(data.players || []);
     } catch (error) {
       console.error("Search error:", error);
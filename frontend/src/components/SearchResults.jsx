@@ -1,5 +1,23 @@
 import "./SearchResults.css";
 
+// One-line season summary from the stats joined into the search result
+const seasonSummary = (seasonStats) => {
+  const stats = seasonStats?.stats;
+  if (!stats) return null;
+  const lines = [
+    [stats.passing?.yards, "pass yds"],
+    [stats.rushing?.yards, "rush yds"],
+    [stats.receiving?.yards, "rec yds"],
+    [stats.defense?.tackles, "tackles"],
+    [stats.scoring?.points, "pts"],
+  ].filter(([value]) => value > 0);
+  if (lines.length === 0) return null;
+  const [value, label] = lines.reduce((best, line) =>
+    line[0] > best[0] ? line : best
+  );
+  return `${value.toLocaleString()} ${label}`;
+};
+
 export default function SearchResults({
   results,
   onAddFavorite,
@@ -49,6 +67,14 @@ export default function SearchResults({
                   {player.age && (
                     <span className="search-result-age">Age {player.age}</span>
                   )}
+                  {seasonSummary(playerData.season_stats) && (
+                    <span className="search-result-season">
+                      {seasonSummary(playerData.season_stats)}
+                    </span>
+                  )}
+                  {playerData.live_stats && (
+                    <span className="search-result-live">🔴 Live</span>
+                  )}
                 </div>
               </div>
               <button
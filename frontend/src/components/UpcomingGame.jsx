@@ -2,27 +2,72 @@ import { useState, useEffect } from "react";
 import api from "../api/client";
 import "./UpcomingGame.css";
 
+const LIVE_POLL_MS = 30000;
+
+const isLive = (status) => {
+  return ["Q1", "Q2", "Q3", "Q4", "HT", "OT"].includes(status.short);
+};
+
 export default function UpcomingGame({ games = [], onRefresh }) {
   const [currentGameIndex, setCurrentGameIndex] = useState(0);
+  // The backend's current game (GET /packers/games/next), kept fresh while live
+  const [current, setCurrent] = useState(null);
 
-  // Find current/upcoming game when games prop changes
+  // Start on the game the backend considers current when games prop changes
   useEffect(() => {
     if (games.length === 0) return;
 
-    const now = new Date();
-    const upcomingGameIndex = games.findIndex((g) => {
-      const gameDate = new Date(g.game.date.date);
-      return gameDate >= now || g.game.status.short === "NS";
-    });
-
-    if (upcomingGameIndex !== -1) {
-      setCurrentGameIndex(upcomingGameIndex);
-    } else if (games.length > 0) {
-      setCurrentGameIndex(games.length - 1);
-    }
+    let cancelled = false;
+    api
+      .getNextGame(2025)
+      .then((data) => {
+        if (cancelled) return;
+        setCurrent(data.game);
+      })
+      .catch((err) => console.error("Error loading next game:", err));
+
+    return () => {
+      cancelled = true;
+    };
   }, [games]);
 
-  const currentGame = games[currentGameIndex];
+  // Show the current game whenever it changes (initial load, or the live game ending)
+  const currentId = current ? current.game.id : null;
+  useEffect(() => {
+    if (games.length === 0) return;
+
+    const index =
+      currentId !== null ? games.findIndex((g) => g.game.id === currentId) : -1;
+    setCurrentGameIndex(index !== -1 ? index : games.length - 1);
+  }, [games, currentId]);
+
+  // While the current game is live, refresh its status and score
+  const currentIsLive = current !== null && isLive(current.game.status);
+  useEffect(() => {
+    if (!currentIsLive) return;
+
+    const timer = setInterval(() => {
+      api
+        .getLiveGame(2025)
+        .then((data) => {
+          if (data.game) {
+            setCurrent(data.game);
+          } else {
+            // Game over: the next game is now current
+            api.getNextGame(2025).then((next) => setCurrent(next.game));
+          }
+        })
+        .catch((err) => console.error("Error loading live game:", err));
+    }, LIVE_POLL_MS);
+
+    return () => clearInterval(timer);
+  }, [currentIsLive]);
+
+  const scheduled = games[currentGameIndex];
+  const currentGame =
+    current && scheduled && current.game.id === scheduled.game.id
+      ? current
+      : scheduled;
   const loading = games.length === 0;
 
   const goToPrevGame = () => {
@@ -65,10 +110,6 @@ export default function UpcomingGame({ games = [], onRefresh }) {
     return statusMap[status.short] || status.long;
   };
 
-  const isLive = (status) => {
-    return ["Q1", "Q2", "Q3", "Q4", "HT", "OT"].includes(status.short);
-  };
-
   if (loading) {
     return (
       <div className="upcoming-game loading">
@@ -39,11 +39,12 @@ fi
 
 echo -e "${GREEN}✅ Starting services...${NC}"
 echo ""
-echo "This will start 4 terminals:"
+echo "This will start 5 terminals:"
 echo "  1️⃣  FastAPI Backend (port 8000)"
-echo "  2️⃣  Celery Worker"
-echo "  3️⃣  Celery Beat (scheduler)"
-echo "  4️⃣  Vite Frontend (port 5173)"
+echo "  2️⃣  Celery Worker (live queue)"
+echo "  3️⃣  Celery Worker (batch queue)"
+echo "  4️⃣  Celery Beat (scheduler)"
+echo "  5️⃣  Vite Frontend (port 5173)"
 echo ""
 echo -e "${YELLOW}Press Ctrl+C in each terminal to stop${NC}"
 echo ""
@@ -59,10 +60,19 @@ EOF
 
     sleep 2
 
-    # Celery Worker
+    # Celery Worker: live queue (realtime polling only)
     osascript <<EOF
 tell application "Terminal"
-    do script "cd \"$PWD/backend\" && source .venv/bin/activate && echo '⚙️  Starting Celery Worker...' && celery -A app.celery_app.celery_app worker --loglevel=info"
+    do script "cd \"$PWD/backend\" && source .venv/bin/activate && echo '⚙️  Starting Celery Worker (live)...' && PROMETHEUS_MULTIPROC_DIR=/tmp/packers-hub-metrics/live CELERY_METRICS_PORT=9808 celery -A app.celery_app.celery_app worker -Q live -n live@%h --concurrency=4 --prefetch-multiplier=1 --loglevel=info"
+end tell
+EOF
+
+    sleep 2
+
+    # Celery Worker: batch queue (roster, games, stats, backfill)
+    osascript <<EOF
+tell application "Terminal"
+    do script "cd \"$PWD/backend\" && source .venv/bin/activate && echo '⚙️  Starting Celery Worker (batch)...' && PROMETHEUS_MULTIPROC_DIR=/tmp/packers-hub-metrics/batch CELERY_METRICS_PORT=9809 celery -A app.celery_app.celery_app worker -Q batch -n batch@%h --concurrency=2 --prefetch-multiplier=1 --max-tasks-per-child=50 --loglevel=info"
 end tell
 EOF
 
@@ -98,12 +108,15 @@ else
     echo "Terminal 1 (Backend):"
     echo "  cd backend && source .venv/bin/activate && uvicorn app.main:app --reload"
     echo ""
-    echo "Terminal 2 (Celery Worker):"
-    echo "  cd backend && source .venv/bin/activate && celery -A app.celery_app.celery_app worker --loglevel=info"
+    echo "Terminal 2 (Celery Worker, live queue):"
+    echo "  cd backend && source .venv/bin/activate && PROMETHEUS_MULTIPROC_DIR=/tmp/packers-hub-metrics/live CELERY_METRICS_PORT=9808 celery -A app.celery_app.celery_app worker -Q live -n live@%h --concurrency=4 --prefetch-multiplier=1 --loglevel=info"
+    echo ""
+    echo "Terminal 3 (Celery Worker, batch queue):"
+    echo "  cd backend && source .venv/bin/activate && PROMETHEUS_MULTIPROC_DIR=/tmp/packers-hub-metrics/batch CELERY_METRICS_PORT=9809 celery -A app.celery_app.celery_app worker -Q batch -n batch@%h --concurrency=2 --prefetch-multiplier=1 --max-tasks-per-child=50 --loglevel=info"
     echo ""
-    echo "Terminal 3 (Celery Beat):"
+    echo "Terminal 4 (Celery Beat):"
     echo "  cd backend && source .venv/bin/activate && celery -A app.celery_app.celery_app beat --loglevel=info"
     echo ""
-    echo "Terminal 4 (Frontend):"
+    echo "Terminal 5 (Frontend):"
     echo "  cd frontend && npm run dev"
 fi